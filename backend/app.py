@@ -3,20 +3,53 @@ MindBridge Backend - Flask API for mood and mental health tracking
 Provides RESTful API endpoints for check-ins, mood quizzes, AI copilot, and chat functionality.
 """
 
-from flask import Flask, request, jsonify
+from flask import (Blueprint, Flask, Response, current_app, g, has_app_context, jsonify, request,
+                   stream_with_context)
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+import click
+from flask_jwt_extended import (create_access_token, create_refresh_token, decode_token, get_jwt,
+                                get_jwt_identity, jwt_required)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from flask_jwt_extended.utils import get_jwt_manager
 import sqlite3
+import base64
+import copy
+import csv
+import functools
+import hashlib
+import importlib
+import io
 import json
+import logging
 import os
-import bcrypt
-from datetime import datetime, timedelta
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
 from werkzeug.exceptions import BadRequest
+from cache import LRUCache, SQLiteCache, TieredCache
+from db import (ConnectionPool, ShardedConnectionPool, apply_pragmas, existing_shard_paths,
+                migrate, rebalance_shards, rebuild_checkin_daily_agg, resolve_pragmas, shard_for,
+                shard_path)
+from hashing import HasherBusyError, PasswordHasher
+from intents import IntentMatcher
+from json_provider import FastJSONProvider
+from logs import LOGGER_NAME, configure_logging, get_log_handler, log_event
+from metrics import Counter, Histogram, MetricsRegistry
+from ratelimit import RateLimiter, retry_after_header
+from tokens import CachingJWTManager, RevocationStore
 
-app = Flask(__name__)
-CORS(app, origins=["https://mind-bridge-1z02yuoq1-nischays-projects-01d68259.vercel.app"])
-@app.route('/auth/register', methods=['POST', 'OPTIONS'])
-def register():
+# Modules imported on first use instead of at startup; warm_up() loads them
+# ahead of time. dass pulls in numpy, the bulk of a cold import.
+LAZY_MODULES = ('dass',)
+
+# Every route, hook and error handler lives on this blueprint; create_app()
+# registers it on each app it builds
+api = Blueprint('api', __name__, cli_group=None)
+
+@api.route('/auth/register', methods=['POST', 'OPTIONS'])
+def register_preflight():
     if request.method == 'OPTIONS':
         # Handle CORS preflight
         return '', 204
@@ -26,27 +59,196 @@ def register():
 
 
 
-# JWT Configuration
-app.config['JWT_SECRET_KEY'] = 'your-secret-key-change-in-production'  # Change this in production
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
-jwt = JWTManager(app)
+logger = logging.getLogger(LOGGER_NAME)
+
+# Request instrumentation, exported at /metrics. Everything here records into
+# per-thread buffers (see metrics.Histogram), so the hot path takes no locks.
+metrics = MetricsRegistry()
+request_duration = Histogram('mindbridge_http_request_duration_seconds',
+                             'Time from before_request to after_request, by route',
+                             ('method', 'route'))
+requests_started = Counter('mindbridge_http_requests_started_total',
+                           'Requests received, by route', ('method', 'route'))
+requests_finished = Counter('mindbridge_http_requests_finished_total',
+                            'Requests whose teardown has run, by route', ('method', 'route'))
+sqlite_duration = Histogram('mindbridge_sqlite_query_duration_seconds',
+                            'Time spent in SQLite calls on pooled connections, by operation',
+                            ('operation',))
+bcrypt_duration = Histogram('mindbridge_bcrypt_duration_seconds',
+                            'hash_password/verify_password time as seen by the caller, '
+                            'including queueing', ('operation',))
+
+def observe_sqlite_query(operation, seconds):
+    """ConnectionPool query_observer feeding sqlite_duration."""
+    sqlite_duration.observe(seconds, operation)
+
+def request_route():
+    """The matched URL rule, so metrics stay per-endpoint rather than per-path."""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@api.before_app_request
+def start_request_timer():
+    """Start timing the request; registered first so it runs before other hooks."""
+    g.request_started = time.perf_counter()
+    g.request_labels = (request.method, request_route())
+    requests_started.inc(*g.request_labels)
+
+@api.after_app_request
+def record_request_duration(response):
+    """
+    Record the request's latency.
+
+    For streamed responses (e.g. /api/export) this is the time to the
+    first byte, since after_request runs before the body is sent.
+    """
+    started = g.get('request_started')
+    if started is not None:
+        request_duration.observe(time.perf_counter() - started, *g.request_labels)
+    return response
+
+@api.teardown_app_request
+def finish_request(exception):
+    """Count the request as finished; teardown runs even if a handler raised."""
+    labels = g.get('request_labels')
+    if labels is not None:
+        requests_finished.inc(*labels)
 
-@app.before_request
+@metrics.register
+def collect_log_metrics():
+    """Report log records dropped because the background writer fell behind."""
+    handler = get_log_handler()
+    if handler is None:
+        return []
+    return [('mindbridge_log_records_dropped_total', 'counter',
+             'Log records dropped because the log queue was full', handler.dropped)]
+
+@metrics.register
+def collect_request_metrics():
+    """Report request latency, in-flight requests, SQLite and bcrypt time."""
+    started = requests_started.values()
+    finished = requests_finished.values()
+    in_flight = [
+        (dict(zip(('method', 'route'), labels)), count - finished.get(labels, 0))
+        for labels, count in sorted(started.items())
+    ]
+    return (
+        request_duration.collect()
+        + requests_started.collect()
+        + [('mindbridge_http_requests_in_flight', 'gauge',
+            'Requests started but not yet finished, by route', in_flight)]
+        + sqlite_duration.collect()
+        + bcrypt_duration.collect()
+    )
+
+@api.before_app_request
 def handle_json_errors():
-    """Handle JSON parsing errors globally."""
-    if request.content_type == 'application/json':
+    """
+    Parse JSON request bodies once and handle parsing errors globally.
+    
+    request.get_json() caches its result on the request, so handlers calling
+    it again get the already-parsed body instead of decoding it a second time.
+    """
+    if request.is_json and request.get_data(cache=True):
         try:
-            if request.data:
-                json.loads(request.data)
-        except json.JSONDecodeError:
+            request.get_json()
+        except BadRequest:
             return jsonify({
                 'success': False,
                 'error': 'Invalid JSON format'
             }), 400
 
-# Database configuration
 DB_NAME = 'mindbridge.db'
 
+# Check-in history page sizes
+CHECKIN_PAGE_DEFAULT = 5
+CHECKIN_PAGE_MAX = 100
+CHECKIN_BATCH_MAX = 500  # Check-ins accepted per POST /api/checkin/batch
+CHECKIN_CLOCK_SKEW = timedelta(minutes=5)  # How far ahead of the server a batch timestamp may be
+
+# Check-in stats window, in days
+STATS_DAYS_DEFAULT = 30
+STATS_DAYS_MAX = 365
+
+# Data export
+EXPORT_CHUNK_SIZE = 1000  # Rows fetched and written per chunk
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+EXPORT_CSV_FIELDS = ['type', 'id', 'timestamp', 'mood', 'stress_level', 'notes',
+                     'depression', 'anxiety', 'stress']
+
+# Static content catalog
+CATALOG_MAX_AGE = 86400  # Seconds clients may reuse the catalog before revalidating
+
+# DASS-21 history
+DASS_HISTORY_PAGE_DEFAULT = 10
+DASS_HISTORY_PAGE_MAX = 100
+DASS_ROLLING_WINDOW = 3  # Assessments in each rolling average, including the current one
+DASS_HISTORY_CACHE_USERS = 1024  # Users whose history pages are kept in memory
+DASS_HISTORY_CACHE_TTL = 300.0  # Seconds a cached page may be served
+DASS_HISTORY_PAGES_PER_USER = 16
+
+# Configuration every app starts from; create_app(config) overrides keys
+DEFAULT_CONFIG = {
+    # JWT
+    'JWT_SECRET_KEY': 'your-secret-key-change-in-production',  # Change this in production
+    # Access tokens are short-lived; clients renew them at /api/auth/refresh
+    # instead of logging in (and running bcrypt) again
+    'JWT_ACCESS_TOKEN_EXPIRES': timedelta(minutes=15),
+    'JWT_REFRESH_TOKEN_EXPIRES': timedelta(days=30),  # Each refresh issues a new one
+    'JWT_CACHE_SIZE': 10000,  # Verified tokens cached per process; 0 verifies every request
+    'JWT_CACHE_TTL': 300.0,  # Seconds a verified token is trusted before checking it again
+    'REVOCATION_FILTER_CAPACITY': 100000,  # Revoked tokens the Bloom filter is sized for
+    'REVOCATION_FILTER_ERROR_RATE': 0.001,  # Unrevoked tokens that still need a lookup
+    'REVOCATION_SYNC_INTERVAL': 1.0,  # Seconds until other workers' revocations apply here
+    'CORS_ORIGINS': ["https://mind-bridge-1z02yuoq1-nischays-projects-01d68259.vercel.app"],
+
+    # JSON
+    'JSON_BACKEND': 'auto',  # 'orjson', 'ujson', 'json', or 'auto' for the fastest installed
+
+    # Logging: structured JSON lines written by a background thread
+    'LOG_LEVEL': os.environ.get('MINDBRIDGE_LOG_LEVEL', 'INFO'),
+    'LOG_DEBUG_SAMPLE_RATE': float(os.environ.get('MINDBRIDGE_LOG_DEBUG_SAMPLE_RATE', '0.01')),
+
+    # Database
+    'DATABASE': DB_NAME,
+    'DB_POOL_SIZE': 5,  # Maximum open connections per process
+    'DB_POOL_TIMEOUT': 5.0,  # Seconds to wait for a free connection
+    'DB_PROFILE': 'fast',  # 'safe' or 'fast', see db.PRAGMA_PROFILES
+    'DB_PRAGMAS': {},  # Per-PRAGMA overrides on top of the profile
+    # Shard files for check-ins and DASS-21 results, picked per user (0 keeps
+    # everything in DATABASE, which always holds users). After changing it,
+    # run `flask --app app rebalance-shards`
+    'DB_SHARDS': 0,
+
+    # Password hashing
+    'BCRYPT_ROUNDS': 12,  # bcrypt cost factor for new hashes
+    'BCRYPT_WORKERS': 2,  # Threads running bcrypt
+    'BCRYPT_MAX_QUEUE': 16,  # Jobs allowed to wait before returning 503
+
+    # Profile cache for GET /api/auth/profile
+    'PROFILE_CACHE_SIZE': 4096,  # Profiles kept in memory per process
+    'PROFILE_CACHE_TTL': 60.0,  # Seconds a cached profile may be served
+    'PROFILE_CACHE_PATH': None,  # SQLite file shared by all workers, or None
+
+    # Rate limits per route group: `requests` per `period` seconds for each
+    # client IP ('ip') or authenticated user ('user'); set a group to None to
+    # disable it
+    'RATE_LIMITS': {
+        'auth': {'requests': 10, 'period': 60, 'key': 'ip'},  # login/register run bcrypt
+        'chat': {'requests': 30, 'period': 60, 'key': 'user'}
+    },
+    'RATE_LIMIT_MAX_KEYS': 10000  # Buckets kept per group before evicting
+}
+
+_app_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_extension_lock = threading.Lock()
+
+_default_app = None
+_initialized_databases = set()
+
 # Pre-defined mood quiz questions
 MOOD_QUIZ_QUESTIONS = [
     {
@@ -111,10 +313,71 @@ Regular practice improves emotional regulation.""",
 • Connect with supportive people in your life"""
 }
 
-def init_db():
-    """Initialize the SQLite database and create tables if they don't exist."""
+# Keyword matching for the rule-based responses. Intents are listed in
+# priority order: when keywords from several intents appear, the first wins.
+# Matchers are compiled once here and shared by every request.
+MOOD_INSIGHT_MATCHER = IntentMatcher([
+    # Concerning responses first (to catch "dissatisfied" before "satisfied")
+    ('concerning', ['tired', 'anxious', 'worried', 'isolated', 'dissatisfied', 'high']),
+    ('positive', ['energized', 'optimistic', 'strong', 'satisfied', 'hopeful']),
+    ('neutral', ['neutral', 'adequate', 'cautious'])
+])
+
+MOOD_INSIGHTS = {
+    'concerning': "It sounds like you might be going through a challenging time. Remember to be kind to yourself and consider reaching out for support.",
+    'positive': "You're showing positive energy and outlook! Keep nurturing this mindset.",
+    'neutral': "You're in a balanced state. Consider what might help you feel more energized.",
+    'default': "Thanks for sharing your thoughts. Self-reflection is an important part of mental wellness."
+}
+
+# Intent names are keys of GROUNDING_EXERCISES
+GROUNDING_KEYWORDS = [
+    ('grounding', ['grounding']),
+    ('breathing', ['breathing', 'breath', 'breathe']),
+    ('mindfulness', ['mindfulness', 'meditation', 'calm'])
+]
+GROUNDING_MATCHER = IntentMatcher(GROUNDING_KEYWORDS)
+
+CHAT_MATCHER = IntentMatcher([
+    ('sad', ['sad', 'down', 'depressed', 'upset', 'hurt']),
+    ('stressed', ['stressed', 'anxious', 'worried', 'overwhelmed', 'panic']),
+    ('happy', ['happy', 'good', 'great', 'excited', 'joy']),
+    ('tired', ['tired', 'exhausted', 'sleepy', 'drained']),
+    ('angry', ['angry', 'mad', 'frustrated', 'annoyed']),
+    ('lonely', ['lonely', 'alone', 'isolated']),
+    ('help', ['help', 'support', 'advice', 'guidance']),
+    ('gratitude', ['thank', 'grateful', 'appreciate'])
+])
+
+CHAT_RESPONSES = {
+    'sad': "I'm sorry to hear that you're feeling this way. It's completely normal to have difficult emotions. Remember to be kind to yourself during tough times. Is there anything specific that's been weighing on you?",
+    'stressed': "Stress and anxiety can be really tough to deal with. Try taking a few deep breaths - in through your nose for 4 counts, hold for 4, and out through your mouth for 6. Remember that this feeling will pass. What's been causing you the most stress lately?",
+    'happy': "I'm so glad to hear you're feeling positive! It's wonderful when we can appreciate the good moments. What's been going well for you recently?",
+    'tired': "It sounds like you might need some rest. Make sure you're getting enough sleep and taking breaks when you need them. Self-care isn't selfish - it's necessary. Have you been able to get enough rest lately?",
+    'angry': "Anger and frustration are valid emotions. It's okay to feel this way. Try to take some time to process these feelings safely. Deep breathing or physical activity can sometimes help. What's been frustrating you?",
+    'lonely': "Feeling lonely can be really difficult. Remember that you're not truly alone, even when it feels that way. Consider reaching out to someone you trust or engaging in activities that connect you with others. I'm here to listen too.",
+    'help': "I'm here to support you. While I can provide general wellness tips and a listening ear, remember that professional help is available if you need more support. What kind of help are you looking for today?",
+    'gratitude': "You're very welcome! I'm glad I could be helpful. Practicing gratitude, like you're doing right now, is actually great for mental health. Keep being kind to yourself.",
+    'default': "Thank you for sharing that with me. I'm here to listen and provide support. How are you feeling right now? Is there anything specific I can help you with today?"
+}
+
+def init_db(app=None, database=None):
+    """
+    Initialize the SQLite database, create tables if they don't exist,
+    and apply any pending schema migrations (see db.MIGRATIONS).
+
+    Shards get the same schema as the directory database, though only
+    their per-user tables (db.SHARDED_TABLES and checkin_daily_agg) are used.
+
+    Args:
+        app (Flask): App whose DATABASE to initialize (default: the current app)
+        database (str): Database file to initialize instead, e.g. a shard
+    """
+    app = app or _get_app()
+    database = database or app.config['DATABASE']
     try:
-        conn = sqlite3.connect(DB_NAME)
+        conn = sqlite3.connect(database)
+        apply_pragmas(conn, get_db_pragmas(app))
         cursor = conn.cursor()
         
         # Create users table
@@ -153,26 +416,341 @@ def init_db():
 
         
         conn.commit()
+        migrate(conn)
         conn.close()
-        print(f"Database {DB_NAME} initialized successfully")
-    except Exception as e:
-        print(f"Error initializing database: {e}")
+        log_event(logger, logging.INFO, 'database_initialized', database=database)
+    except Exception:
+        logger.exception('database_initialization_failed')
+        return False
+    return True
+
+def ensure_db(app=None):
+    """
+    Initialize the app's databases (DATABASE and any shards) once per process.
+
+    Safe to call from any number of threads: the first caller runs
+    init_db() under a lock and later callers return immediately. A
+    gunicorn master that preloads the app (see gunicorn.conf.py) runs it
+    before forking, so workers inherit the initialized state and skip it.
+
+    Args:
+        app (Flask): App whose databases to initialize (default: the current app)
+    """
+    app = app or _get_app()
+    databases = [app.config['DATABASE']]
+    if app.config['DB_SHARDS']:
+        databases += get_user_databases(app)
+    for database in databases:
+        if database in _initialized_databases:
+            continue
+        with _schema_lock:
+            if database not in _initialized_databases and init_db(app, database):
+                _initialized_databases.add(database)
+
+def _get_app():
+    """The app handling the current request, or the default app outside one."""
+    return current_app._get_current_object() if has_app_context() else get_default_app()
+
+def get_db_pragmas(app=None):
+    """Get the PRAGMAs for the configured profile, with any overrides applied."""
+    app = app or _get_app()
+    return resolve_pragmas(app.config['DB_PROFILE'], app.config['DB_PRAGMAS'])
+
+def _get_extension(app, name, build):
+    """
+    Get one of an app's pools, caches or limiters, building it on first use.
+
+    Each is built once per app from the config the app was created with;
+    an app that needs different settings is a different create_app() call.
+
+    Args:
+        app (Flask): App owning the resource
+        name (str): Key in app.extensions
+        build (callable): Called with the app to create the resource
+
+    Returns:
+        The resource stored under app.extensions[name]
+    """
+    resource = app.extensions.get(name)
+    if resource is None:
+        with _extension_lock:
+            resource = app.extensions.get(name)
+            if resource is None:
+                resource = build(app)
+                app.extensions[name] = resource
+    return resource
+
+def get_db_pool():
+    """
+    Get the app's connection pool, creating it on first use.
+
+    The schema is created before the pool is built.
+    """
+    return _get_extension(_get_app(), 'db_pool', _build_db_pool)
+
+def _build_db_pool(app):
+    """Initialize the app's databases and pool connections to DATABASE."""
+    ensure_db(app)
+    return ConnectionPool(
+        app.config['DATABASE'],
+        max_size=app.config['DB_POOL_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        pragmas=get_db_pragmas(app),
+        query_observer=observe_sqlite_query
+    )
+
+def get_user_databases(app=None):
+    """Database files holding per-user rows: the shards, or DATABASE when unsharded."""
+    app = app or _get_app()
+    shards = app.config['DB_SHARDS']
+    if not shards:
+        return [app.config['DATABASE']]
+    return [shard_path(app.config['DATABASE'], index) for index in range(shards)]
+
+def get_shard_pool():
+    """
+    Get the per-shard connection pools, creating them on first use.
+
+    The shards' schema is created before the pools are built.
+    """
+    return _get_extension(_get_app(), 'shard_pool', _build_shard_pool)
+
+def _build_shard_pool(app):
+    """Initialize the app's databases and pool connections to each shard."""
+    ensure_db(app)
+    return ShardedConnectionPool(
+        get_user_databases(app),
+        max_size=app.config['DB_POOL_SIZE'],
+        timeout=app.config['DB_POOL_TIMEOUT'],
+        pragmas=get_db_pragmas(app),
+        query_observer=observe_sqlite_query
+    )
 
 def get_db_connection():
-    """Get a database connection with row factory for easier data access."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Get the database connection for the current request.
+
+    The connection is borrowed from the pool on first use and handed back by
+    close_db() when the app context ends, including on exception paths.
+    Rows are returned as sqlite3.Row for easier data access.
+    """
+    if 'db' not in g:
+        pool = get_db_pool()
+        g.db = pool.acquire()
+        g.db_pool = pool
+    return g.db
+
+def get_user_db_connection(user_id):
+    """
+    Get the connection for a user's check-ins and DASS-21 results.
+
+    That's the request's get_db_connection() unless DB_SHARDS is set, in
+    which case it is borrowed from the user's shard pool and, like the
+    main connection, handed back by close_db().
+    """
+    if not _get_app().config['DB_SHARDS']:
+        return get_db_connection()
+    pool = get_shard_pool().pool_for(user_id)
+    shard_dbs = g.setdefault('shard_dbs', {})
+    if pool.database not in shard_dbs:
+        shard_dbs[pool.database] = (pool, pool.acquire())
+    return shard_dbs[pool.database][1]
+
+def close_db(exception):
+    """Return the request's database connections to their pools."""
+    conn = g.pop('db', None)
+    if conn is not None:
+        g.pop('db_pool').release(conn)
+    for pool, conn in g.pop('shard_dbs', {}).values():
+        pool.release(conn)
+
+def get_password_hasher():
+    """Get the bcrypt worker pool, creating it on first use."""
+    return _get_extension(_get_app(), 'password_hasher', lambda app: PasswordHasher(
+        rounds=app.config['BCRYPT_ROUNDS'],
+        max_workers=app.config['BCRYPT_WORKERS'],
+        max_queue=app.config['BCRYPT_MAX_QUEUE']
+    ))
+
+@metrics.register
+def collect_hasher_metrics():
+    """Report bcrypt pool metrics once the pool exists."""
+    hasher = current_app.extensions.get('password_hasher')
+    return hasher.collect() if hasher is not None else []
+
+def get_profile_cache():
+    """Get the user profile cache, creating it on first use."""
+    return _get_extension(_get_app(), 'profile_cache', _build_profile_cache)
+
+def _build_profile_cache(app):
+    """An in-process profile cache, backed by PROFILE_CACHE_PATH if set."""
+    ttl = app.config['PROFILE_CACHE_TTL']
+    path = app.config['PROFILE_CACHE_PATH']
+    shared = SQLiteCache(path, ttl=ttl) if path else None
+    return TieredCache(LRUCache(max_size=app.config['PROFILE_CACHE_SIZE'], ttl=ttl), shared)
+
+def invalidate_profile(user_id):
+    """Drop a user's cached profile; call after changing their users row."""
+    get_profile_cache().delete(f'profile:{user_id}')
+
+def get_dass_history_cache():
+    """
+    Get the DASS-21 history page cache.
+
+    Maps user_id -> (latest assessment id, {page key: payload}); entries
+    are replaced, never modified in place. See get_dass21_history.
+    """
+    return _get_app().extensions['dass_history_cache']
+
+@metrics.register
+def collect_profile_cache_metrics():
+    """Report profile cache hits and misses once the cache exists."""
+    cache = current_app.extensions.get('profile_cache')
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        ('mindbridge_profile_cache_hits_total', 'counter',
+         'Profile lookups answered from the cache, by tier',
+         [({'tier': tier}, count) for tier, count in stats['hits'].items()]),
+        ('mindbridge_profile_cache_misses_total', 'counter',
+         'Profile lookups that went to the users table', stats['misses']),
+        ('mindbridge_profile_cache_evictions_total', 'counter',
+         'Profiles evicted from the in-process tier to stay within PROFILE_CACHE_SIZE',
+         stats['evictions']),
+        ('mindbridge_profile_cache_entries', 'gauge',
+         'Profiles held in the in-process tier', stats['size'])
+    ]
+
+def get_rate_limiter(name):
+    """
+    Get the token-bucket limiter for a RATE_LIMITS group, or None if disabled.
+
+    Every group's limiter is created on first use.
+    """
+    return _get_extension(_get_app(), 'rate_limiters', _build_rate_limiters).get(name)
+
+def _build_rate_limiters(app):
+    """One limiter per enabled RATE_LIMITS group."""
+    return {
+        name: RateLimiter(config['requests'] / config['period'], config['requests'],
+                          app.config['RATE_LIMIT_MAX_KEYS'])
+        for name, config in app.config['RATE_LIMITS'].items() if config is not None
+    }
+
+def rate_limit(name):
+    """
+    Decorator applying the RATE_LIMITS group `name` to a view.
+
+    Groups keyed by 'user' read get_jwt_identity(), so the decorator must
+    sit below @jwt_required(). CORS preflight requests are never counted.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = get_rate_limiter(name)
+            if limiter is not None and request.method != 'OPTIONS':
+                if current_app.config['RATE_LIMITS'][name]['key'] == 'user':
+                    client = get_jwt_identity()
+                else:
+                    client = request.remote_addr
+                wait = limiter.hit(client)
+                if wait:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Too many requests, please try again later'
+                    }), 429, {'Retry-After': retry_after_header(wait)}
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@metrics.register
+def collect_rate_limit_metrics():
+    """Report rejections and tracked clients per rate limit group."""
+    limiters = current_app.extensions.get('rate_limiters', {})
+    return [
+        ('mindbridge_rate_limited_total', 'counter',
+         'Requests refused with 429, by rate limit group',
+         [({'group': name}, limiter.rejected) for name, limiter in limiters.items()]),
+        ('mindbridge_rate_limit_buckets', 'gauge',
+         'Clients currently tracked, by rate limit group',
+         [({'group': name}, len(limiter)) for name, limiter in limiters.items()])
+    ]
 
 def hash_password(password):
     """Hash a password for storing in the database."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    started = time.perf_counter()
+    try:
+        return get_password_hasher().hash(password)
+    finally:
+        bcrypt_duration.observe(time.perf_counter() - started, 'hash')
 
 def verify_password(password, hashed):
     """Verify a password against its hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+    started = time.perf_counter()
+    try:
+        return get_password_hasher().verify(password, hashed)
+    finally:
+        bcrypt_duration.observe(time.perf_counter() - started, 'verify')
+
+def get_revocation_store():
+    """Get the revoked-token store, creating it on first use."""
+    return _get_extension(_get_app(), 'revocation_store', lambda app: RevocationStore(
+        capacity=app.config['REVOCATION_FILTER_CAPACITY'],
+        error_rate=app.config['REVOCATION_FILTER_ERROR_RATE'],
+        sync_interval=app.config['REVOCATION_SYNC_INTERVAL']
+    ))
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """
+    flask_jwt_extended blocklist callback, run on every request with a token.
+
+    Unrevoked tokens are answered from memory; see tokens.RevocationStore.
+    """
+    return get_revocation_store().is_revoked(jwt_payload['jti'], get_db_connection)
+
+def revoke_token(jwt_payload):
+    """
+    Refuse a token from now on, in every worker.
+
+    Commits the request's connection.
+
+    Args:
+        jwt_payload (dict): The token's claims, e.g. from get_jwt()
+
+    Returns:
+        bool: True if the token was revoked by this call, False if it already was
+    """
+    conn = get_db_connection()
+    revoked = get_revocation_store().revoke(conn, jwt_payload['jti'], int(jwt_payload['sub']),
+                                            jwt_payload.get('exp'))
+    conn.commit()
+    return revoked
+
+def issue_tokens(user_id):
+    """A new access and refresh token pair for a user."""
+    identity = str(user_id)
+    return {
+        'access_token': create_access_token(identity=identity),
+        'refresh_token': create_refresh_token(identity=identity)
+    }
+
+@metrics.register
+def collect_jwt_metrics():
+    """Report verified-token cache and revocation store metrics."""
+    store = current_app.extensions.get('revocation_store')
+    revocations = store.collect() if store is not None else []
+    return get_jwt_manager().collect() + revocations
 
-@app.route('/api/auth/register', methods=['POST', 'OPTIONS'])
+def hasher_busy_response():
+    """Response for auth requests shed because the bcrypt queue is full."""
+    return jsonify({
+        'success': False,
+        'error': 'Server is busy, please try again shortly'
+    }), 503, {'Retry-After': '1'}
+
+@api.route('/api/auth/register', methods=['POST', 'OPTIONS'])
+@rate_limit('auth')
 def register():
     """
     Register a new user.
@@ -230,14 +808,13 @@ def register():
             user_id = cursor.lastrowid
             conn.commit()
 
-            access_token = create_access_token(identity=str(user_id))
-
-            conn.close()
+            tokens = issue_tokens(user_id)
 
             return jsonify({
                 'success': True,
                 'message': 'User registered successfully',
-                'access_token': access_token,
+                'access_token': tokens['access_token'],
+                'refresh_token': tokens['refresh_token'],
                 'user': {
                     'id': user_id,
                     'username': username,
@@ -246,7 +823,6 @@ def register():
             })
 
         except sqlite3.IntegrityError as e:
-            conn.close()
             if 'username' in str(e):
                 return jsonify({
                     'success': False,
@@ -263,13 +839,17 @@ def register():
                     'error': 'User already exists'
                 }), 409
 
+    except HasherBusyError:
+        return hasher_busy_response()
+
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Failed to register user: {str(e)}'
         }), 500
 
-@app.route('/api/auth/login', methods=['POST', 'OPTIONS'])
+@api.route('/api/auth/login', methods=['POST', 'OPTIONS'])
+@rate_limit('auth')
 def login():
     """
     Login user and return access token.
@@ -312,7 +892,9 @@ def login():
         ''', (username,))
         
         user = cursor.fetchone()
-        conn.close()
+        # Hand the connection back before waiting on bcrypt, so a burst of
+        # logins can't hold every pooled connection other requests need
+        close_db(None)
         
         if not user or not verify_password(password, user['password_hash']):
             return jsonify({
@@ -320,13 +902,14 @@ def login():
                 'error': 'Invalid username or password'
             }), 401
         
-        # Create access token
-        access_token = create_access_token(identity=str(user['id']))
+        # Create access and refresh tokens
+        tokens = issue_tokens(user['id'])
         
         return jsonify({
             'success': True,
             'message': 'Login successful',
-            'access_token': access_token,
+            'access_token': tokens['access_token'],
+            'refresh_token': tokens['refresh_token'],
             'user': {
                 'id': user['id'],
                 'username': user['username'],
@@ -334,50 +917,152 @@ def login():
             }
         })
     
+    except HasherBusyError:
+        return hasher_busy_response()
+    
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Failed to login: {str(e)}'
         }), 500
 
-@app.route('/api/auth/profile', methods=['GET'])
+@api.route('/api/auth/refresh', methods=['POST', 'OPTIONS'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Exchange a refresh token for a new access and refresh token pair.
+    
+    Send the refresh token as the Bearer token. Refresh tokens are rotated:
+    the one presented is revoked, so each can be used once, and a second
+    use (a replay, or a stolen copy) is refused.
+    
+    Returns:
+        JSON response with the new access_token and refresh_token
+    """
+
+    if request.method == 'OPTIONS':
+        return '', 204  # CORS preflight response
+
+    try:
+        claims = get_jwt()
+        # The insert into revoked_tokens is atomic, so of two concurrent
+        # refreshes with the same token only one gets new tokens
+        if not revoke_token(claims):
+            return jsonify({
+                'success': False,
+                'error': 'Refresh token has already been used'
+            }), 401
+
+        return jsonify({
+            'success': True,
+            **issue_tokens(claims['sub'])
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to refresh token: {str(e)}'
+        }), 500
+
+@api.route('/api/auth/logout', methods=['POST', 'OPTIONS'])
+@jwt_required(verify_type=False)
+def logout():
+    """
+    Revoke the presented token, and optionally the user's refresh token.
+    
+    Accepts an access or refresh token as the Bearer token.
+    
+    Optional JSON payload:
+        {
+            "refresh_token": "string"
+        }
+    
+    Returns:
+        JSON response with success status
+    """
+
+    if request.method == 'OPTIONS':
+        return '', 204  # CORS preflight response
+
+    try:
+        claims = get_jwt()
+        data = request.get_json(silent=True) or {}
+        refresh_claims = None
+
+        if data.get('refresh_token'):
+            try:
+                refresh_claims = decode_token(data['refresh_token'])
+            except (JWTExtendedException, PyJWTError):
+                refresh_claims = None
+            if (refresh_claims is None or refresh_claims.get('type') != 'refresh'
+                    or refresh_claims['sub'] != claims['sub']):
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid refresh token'
+                }), 400
+
+        revoke_token(claims)
+        if refresh_claims is not None:
+            revoke_token(refresh_claims)
+
+        return jsonify({
+            'success': True,
+            'message': 'Logged out successfully'
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to logout: {str(e)}'
+        }), 500
+
+@api.route('/api/auth/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     """
     Get current user profile.
     
+    Profiles are served from the profile cache when possible, so the
+    per-page-load call usually skips the users table.
+    
     Returns:
         JSON response with user profile information
     """
     try:
         user_id = int(get_jwt_identity())
+        cache = get_profile_cache()
+        cache_key = f'profile:{user_id}'
+        profile = cache.get(cache_key)
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, username, email, created_at 
-            FROM users 
-            WHERE id = ?
-        ''', (user_id,))
-        
-        user = cursor.fetchone()
-        conn.close()
-        
-        if not user:
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        return jsonify({
-            'success': True,
-            'user': {
+        if profile is None:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id, username, email, created_at 
+                FROM users 
+                WHERE id = ?
+            ''', (user_id,))
+            
+            user = cursor.fetchone()
+            
+            if not user:
+                return jsonify({
+                    'success': False,
+                    'error': 'User not found'
+                }), 404
+            
+            profile = {
                 'id': user['id'],
                 'username': user['username'],
                 'email': user['email'],
                 'created_at': user['created_at']
             }
+            cache.set(cache_key, profile)
+        
+        return jsonify({
+            'success': True,
+            'user': profile
         })
     
     except Exception as e:
@@ -386,31 +1071,131 @@ def get_profile():
             'error': f'Failed to get profile: {str(e)}'
         }), 500
 
-@app.route('/api/checkin', methods=['GET'])
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) position as an opaque pagination cursor."""
+    raw = f'{timestamp}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor produced by encode_cursor().
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        return timestamp, int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_date_param(name, value, end_of_day=False):
+    """
+    Parse a date or datetime query parameter into the stored timestamp format.
+    
+    A bare date used as an upper bound (end_of_day=True) covers that whole day,
+    so it is turned into an exclusive bound at midnight of the following day.
+    
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an ISO date or datetime')
+    if parsed.tzinfo is not None:
+        # Stored timestamps are naive UTC, like CURRENT_TIMESTAMP
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+@api.route('/api/checkin', methods=['GET'])
 @jwt_required()
 def get_checkins():
     """
-    Retrieve the last 5 mood check-ins from the database for the current user.
+    Retrieve mood check-ins for the current user, newest first, using keyset pagination.
+    
+    Query parameters (all optional):
+        limit: Page size, 1-100 (default 5)
+        before: Cursor; return check-ins older than it (newest first)
+        after: Cursor; return check-ins newer than it (oldest first)
+        start: Only check-ins at or after this ISO date/datetime
+        end: Only check-ins before this ISO datetime, or on/before this ISO date
+        mood: Only check-ins with this mood
+    
+    Pages are located by seeking the (user_id, timestamp, id) index, so deep
+    pages cost the same as the first. Pass next_cursor back as the same
+    parameter (before or after) to continue in that direction.
     
     Returns:
-        JSON response with checkins data or error message
+        JSON response with checkins data and next_cursor (null on the last page)
     """
     try:
         user_id = int(get_jwt_identity())
+        args = request.args
         
-        conn = get_db_connection()
+        try:
+            limit = int(args.get('limit', CHECKIN_PAGE_DEFAULT))
+            if limit < 1 or limit > CHECKIN_PAGE_MAX:
+                raise ValueError
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be an integer between 1 and {CHECKIN_PAGE_MAX}'
+            }), 400
+        
+        if args.get('before') and args.get('after'):
+            return jsonify({
+                'success': False,
+                'error': 'Use either before or after, not both'
+            }), 400
+        
+        conditions = ['user_id = ?']
+        params = [user_id]
+        forward = bool(args.get('after'))
+        
+        try:
+            if args.get('before'):
+                conditions.append('(timestamp, id) < (?, ?)')
+                params.extend(decode_cursor(args['before']))
+            elif forward:
+                conditions.append('(timestamp, id) > (?, ?)')
+                params.extend(decode_cursor(args['after']))
+            if args.get('start'):
+                conditions.append('timestamp >= ?')
+                params.append(parse_date_param('start', args['start']))
+            if args.get('end'):
+                conditions.append('timestamp < ?' if len(args['end']) == 10 else 'timestamp <= ?')
+                params.append(parse_date_param('end', args['end'], end_of_day=True))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        if args.get('mood'):
+            conditions.append('mood = ?')
+            params.append(args['mood'])
+        
+        order = 'timestamp ASC, id ASC' if forward else 'timestamp DESC, id DESC'
+        
+        conn = get_user_db_connection(user_id)
         cursor = conn.cursor()
         
-        cursor.execute('''
+        # Fetch one extra row to learn whether another page exists
+        cursor.execute(f'''
             SELECT id, mood, stress_level, notes, timestamp 
             FROM checkins 
-            WHERE user_id = ?
-            ORDER BY timestamp DESC 
-            LIMIT 5
-        ''', (user_id,))
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order}
+            LIMIT ?
+        ''', params + [limit + 1])
         
         checkins = cursor.fetchall()
-        conn.close()
+        has_more = len(checkins) > limit
+        checkins = checkins[:limit]
         
         # Convert rows to dictionaries
         checkins_list = []
@@ -423,9 +1208,15 @@ def get_checkins():
                 'timestamp': checkin['timestamp']
             })
         
+        next_cursor = None
+        if has_more:
+            last = checkins[-1]
+            next_cursor = encode_cursor(last['timestamp'], last['id'])
+        
         return jsonify({
             'success': True,
-            'checkins': checkins_list
+            'checkins': checkins_list,
+            'next_cursor': next_cursor
         })
     
     except Exception as e:
@@ -434,7 +1225,61 @@ def get_checkins():
             'error': f'Failed to retrieve check-ins: {str(e)}'
         }), 500
 
-@app.route('/api/checkin', methods=['POST'])
+def validate_checkin(data):
+    """
+    Validate a check-in payload.
+    
+    Args:
+        data (dict): Check-in fields from the request body
+    
+    Returns:
+        tuple: (mood, stress_level, notes) and an error message, which is None if valid
+    """
+    mood = data.get('mood')
+    stress_level = data.get('stress_level')
+    notes = data.get('notes', '')
+    
+    # Validate required fields
+    if not mood or stress_level is None:
+        return None, 'Mood and stress_level are required'
+    
+    # Anything else can't be bound as a query parameter, which would fail
+    # the whole batch at executemany instead of just this item
+    if not isinstance(mood, str):
+        return None, 'Mood must be a string'
+    
+    if notes is not None and not isinstance(notes, str):
+        return None, 'Notes must be a string or null'
+    
+    # Validate stress level range; bool is a subclass of int, so exclude it
+    if (not isinstance(stress_level, int) or isinstance(stress_level, bool)
+            or stress_level < 1 or stress_level > 10):
+        return None, 'Stress level must be an integer between 1 and 10'
+    
+    return (mood, stress_level, notes), None
+
+def update_checkin_daily_agg(cursor, checkin_ids):
+    """
+    Fold newly inserted check-ins into checkin_daily_agg.
+    
+    Must run in the same transaction as the INSERT so the aggregates never
+    drift from the raw rows.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the connection holding the transaction
+        checkin_ids (list): ids of the check-ins just inserted
+    """
+    cursor.executemany('''
+        INSERT INTO checkin_daily_agg (user_id, day, mood, checkin_count, stress_sum)
+        SELECT user_id, date(timestamp), mood, 1, stress_level
+        FROM checkins
+        WHERE id = ?
+        ON CONFLICT (user_id, day, mood) DO UPDATE SET
+            checkin_count = checkin_count + excluded.checkin_count,
+            stress_sum = stress_sum + excluded.stress_sum
+    ''', [(checkin_id,) for checkin_id in checkin_ids])
+
+@api.route('/api/checkin', methods=['POST'])
 @jwt_required()
 def submit_checkin():
     """
@@ -460,35 +1305,25 @@ def submit_checkin():
                 'error': 'No data provided'
             }), 400
         
-        # Validate required fields
-        mood = data.get('mood')
-        stress_level = data.get('stress_level')
-        notes = data.get('notes', '')
-        
-        if not mood or stress_level is None:
+        values, error = validate_checkin(data)
+        if error:
             return jsonify({
                 'success': False,
-                'error': 'Mood and stress_level are required'
-            }), 400
-        
-        # Validate stress level range
-        if not isinstance(stress_level, int) or stress_level < 1 or stress_level > 10:
-            return jsonify({
-                'success': False,
-                'error': 'Stress level must be an integer between 1 and 10'
+                'error': error
             }), 400
+        mood, stress_level, notes = values
         
         # Insert into database
-        conn = get_db_connection()
+        conn = get_user_db_connection(user_id)
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT INTO checkins (user_id, mood, stress_level, notes) 
             VALUES (?, ?, ?, ?)
         ''', (user_id, mood, stress_level, notes))
+        update_checkin_daily_agg(cursor, [cursor.lastrowid])
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -501,7 +1336,350 @@ def submit_checkin():
             'error': f'Failed to submit check-in: {str(e)}'
         }), 500
 
-@app.route('/api/mood_quiz/generate', methods=['GET'])
+@api.route('/api/checkin/batch', methods=['POST'])
+@jwt_required()
+def submit_checkin_batch():
+    """
+    Submit many check-ins at once, e.g. ones queued by a client while offline.
+    
+    Every item is validated like POST /api/checkin. Valid items are written in
+    a single transaction with one executemany, so a replay costs one commit
+    instead of one per check-in. Items whose idempotency_key was already
+    stored for this user (or repeats earlier in the same batch) are skipped,
+    which makes replaying the same queue safe.
+    
+    Expected JSON payload:
+        {
+            "checkins": [
+                {
+                    "mood": "Happy",
+                    "stress_level": 1-10,
+                    "notes": "Optional notes text",
+                    "timestamp": "Optional ISO datetime, not in the future; defaults to now",
+                    "idempotency_key": "Client-generated unique string"
+                }
+            ]
+        }
+    
+    Returns:
+        JSON response with one result per item, in order, each with a status
+        of "created", "duplicate" or "invalid"
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json()
+        
+        items = data.get('checkins') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'checkins must be a non-empty list'
+            }), 400
+        
+        if len(items) > CHECKIN_BATCH_MAX:
+            return jsonify({
+                'success': False,
+                'error': f'At most {CHECKIN_BATCH_MAX} check-ins per batch'
+            }), 400
+        
+        results = []
+        pending = {}  # idempotency_key -> (index, row)
+        now = datetime.now(timezone.utc)
+        latest = (now + CHECKIN_CLOCK_SKEW).strftime('%Y-%m-%d %H:%M:%S')
+        now = now.strftime('%Y-%m-%d %H:%M:%S')
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results.append({'index': index, 'status': 'invalid',
+                                'error': 'Check-in must be an object'})
+                continue
+            
+            key = item.get('idempotency_key')
+            if not isinstance(key, str) or not key:
+                results.append({'index': index, 'status': 'invalid',
+                                'error': 'idempotency_key is required'})
+                continue
+            
+            values, error = validate_checkin(item)
+            timestamp = now
+            if not error and item.get('timestamp') is not None:
+                try:
+                    timestamp = parse_date_param('timestamp', item['timestamp'])
+                except ValueError as e:
+                    error = str(e)
+                else:
+                    # A future check-in would sit in every stats window and streak
+                    if timestamp > latest:
+                        error = 'timestamp must not be in the future'
+            if error:
+                results.append({'index': index, 'status': 'invalid', 'error': error})
+                continue
+            
+            if key in pending:
+                results.append({'index': index, 'status': 'duplicate',
+                                'idempotency_key': key})
+                continue
+            
+            pending[key] = (index, (user_id,) + values + (timestamp, key))
+            results.append(None)  # filled in once the write succeeds
+        
+        if pending:
+            conn = get_user_db_connection(user_id)
+            cursor = conn.cursor()
+            
+            # Hold the write lock from the duplicate check until commit
+            cursor.execute('BEGIN IMMEDIATE')
+            keys = list(pending)
+            placeholders = ','.join('?' * len(keys))
+            cursor.execute(f'''
+                SELECT idempotency_key FROM checkins
+                WHERE user_id = ? AND idempotency_key IN ({placeholders})
+            ''', [user_id] + keys)
+            existing = {row['idempotency_key'] for row in cursor.fetchall()}
+            
+            new_rows = [row for key, (_, row) in pending.items() if key not in existing]
+            cursor.executemany('''
+                INSERT INTO checkins (user_id, mood, stress_level, notes, timestamp, idempotency_key)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', new_rows)
+            
+            cursor.execute(f'''
+                SELECT idempotency_key, id FROM checkins
+                WHERE user_id = ? AND idempotency_key IN ({placeholders})
+            ''', [user_id] + keys)
+            ids = {row['idempotency_key']: row['id'] for row in cursor.fetchall()}
+            update_checkin_daily_agg(cursor, [ids[key] for key in pending if key not in existing])
+            conn.commit()
+            
+            for key, (index, _) in pending.items():
+                results[index] = {
+                    'index': index,
+                    'status': 'duplicate' if key in existing else 'created',
+                    'idempotency_key': key,
+                    'id': ids[key]
+                }
+        
+        return jsonify({
+            'success': True,
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'results': results
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to submit check-ins: {str(e)}'
+        }), 500
+
+@api.route('/api/checkin/stats', methods=['GET'])
+@jwt_required()
+def get_checkin_stats():
+    """
+    Summarize the current user's check-ins for dashboards.
+    
+    Served from checkin_daily_agg, so the cost grows with the number of days
+    covered rather than the number of check-ins.
+    
+    Query parameters (optional):
+        days: Size of the window for daily/weekly/mood stats, 1-365 (default 30)
+    
+    Returns:
+        JSON response with daily and weekly stress averages, mood distribution
+        over the window, and current/longest check-in streaks (in days)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            days = int(request.args.get('days', STATS_DAYS_DEFAULT))
+            if days < 1 or days > STATS_DAYS_MAX:
+                raise ValueError
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': f'days must be an integer between 1 and {STATS_DAYS_MAX}'
+            }), 400
+        
+        today = datetime.now(timezone.utc).date()
+        window_start = (today - timedelta(days=days - 1)).isoformat()
+        
+        conn = get_user_db_connection(user_id)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT day, SUM(checkin_count) AS checkins, SUM(stress_sum) AS stress_sum
+            FROM checkin_daily_agg
+            WHERE user_id = ? AND day >= ?
+            GROUP BY day
+            ORDER BY day
+        ''', (user_id, window_start))
+        daily = []
+        weekly = {}  # Monday of the week -> totals
+        for row in cursor.fetchall():
+            daily.append({
+                'date': row['day'],
+                'checkins': row['checkins'],
+                'avg_stress': round(row['stress_sum'] / row['checkins'], 2)
+            })
+            day = date.fromisoformat(row['day'])
+            week_start = (day - timedelta(days=day.weekday())).isoformat()
+            week = weekly.setdefault(week_start, {'checkins': 0, 'stress_sum': 0})
+            week['checkins'] += row['checkins']
+            week['stress_sum'] += row['stress_sum']
+        
+        cursor.execute('''
+            SELECT mood, SUM(checkin_count) AS checkins
+            FROM checkin_daily_agg
+            WHERE user_id = ? AND day >= ?
+            GROUP BY mood
+            ORDER BY checkins DESC, mood
+        ''', (user_id, window_start))
+        moods = {row['mood']: row['checkins'] for row in cursor.fetchall()}
+        
+        cursor.execute('''
+            SELECT DISTINCT day FROM checkin_daily_agg
+            WHERE user_id = ?
+            ORDER BY day
+        ''', (user_id,))
+        current_streak, longest_streak = count_streaks(
+            [date.fromisoformat(row['day']) for row in cursor.fetchall()], today
+        )
+        
+        return jsonify({
+            'success': True,
+            'days': days,
+            'total_checkins': sum(day['checkins'] for day in daily),
+            'daily': daily,
+            'weekly': [{
+                'week_start': week_start,
+                'checkins': week['checkins'],
+                'avg_stress': round(week['stress_sum'] / week['checkins'], 2)
+            } for week_start, week in weekly.items()],
+            'moods': moods,
+            'streak': {
+                'current': current_streak,
+                'longest': longest_streak
+            }
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to get check-in stats: {str(e)}'
+        }), 500
+
+def count_streaks(days, today):
+    """
+    Count consecutive-day check-in streaks.
+    
+    The current streak counts back from today, or from yesterday if there is
+    no check-in yet today, so it isn't reported as broken before the user
+    has had a chance to check in.
+    
+    Args:
+        days (list): Distinct dates with check-ins, in ascending order
+        today (date): The current date
+    
+    Returns:
+        tuple: (current streak, longest streak) in days
+    """
+    longest = run = 0
+    previous = None
+    for day in days:
+        if day > today:
+            break
+        run = run + 1 if previous is not None and (day - previous).days == 1 else 1
+        longest = max(longest, run)
+        previous = day
+    
+    current = 0
+    if previous is not None and (today - previous).days <= 1:
+        current = run
+    return current, longest
+
+@api.cli.command('rebuild-checkin-aggregates')
+def rebuild_checkin_aggregates_command():
+    """Recompute checkin_daily_agg from the raw checkins table."""
+    for database in get_user_databases():
+        conn = sqlite3.connect(database)
+        apply_pragmas(conn, get_db_pragmas())
+        conn.execute('BEGIN IMMEDIATE')
+        rebuild_checkin_daily_agg(conn)
+        conn.commit()
+        count = conn.execute('SELECT COUNT(*) FROM checkin_daily_agg').fetchone()[0]
+        conn.close()
+        print(f"Rebuilt {count} check-in aggregate rows in {database}")
+
+def move_user_rows():
+    """
+    Move every user's check-ins and DASS-21 results to where DB_SHARDS puts them.
+
+    Scans DATABASE and every shard file next to it, including ones beyond
+    DB_SHARDS left over from a larger shard count; see db.rebalance_shards.
+
+    Returns:
+        dict: Users and rows moved
+    """
+    app = _get_app()
+    ensure_db(app)
+    database, shards = app.config['DATABASE'], app.config['DB_SHARDS']
+    sources = [database] + sorted(set(existing_shard_paths(database)) | set(get_user_databases(app))
+                                  - {database})
+    if shards:
+        target_for = lambda user_id: shard_path(database, shard_for(user_id, shards))
+    else:
+        target_for = lambda user_id: database
+    moved = rebalance_shards(sources, target_for, pragmas=get_db_pragmas(app))
+    get_dass_history_cache().clear()
+    return moved
+
+@api.cli.command('rebalance-shards')
+def rebalance_shards_command():
+    """Move check-ins and DASS-21 results to the shards DB_SHARDS assigns them."""
+    started = time.perf_counter()
+    moved = move_user_rows()
+    print(f"Moved {moved['rows']} rows for {moved['users']} users "
+          f"({time.perf_counter() - started:.1f}s)")
+
+@api.cli.command('generate-data')
+@click.option('--users', default=1000, show_default=True, help='Users to create')
+@click.option('--checkins', default=100, show_default=True, help='Check-ins per user')
+@click.option('--dass', 'dass_count', default=4, show_default=True,
+              help='DASS-21 submissions per user')
+@click.option('--days', default=365, show_default=True,
+              help='Users sign up over this many days before now')
+@click.option('--seed', default=0, show_default=True, help='Random seed')
+@click.option('--password', default=None,
+              help='Password shared by every generated user (default: datagen.DEFAULT_PASSWORD)')
+def generate_data_command(users, checkins, dass_count, days, seed, password):
+    """Bulk-load synthetic users, check-ins and DASS-21 results."""
+    import datagen  # Lazy: pulls in numpy
+
+    ensure_db(current_app)
+    password_hash = datagen.hash_fixture_password(password or datagen.DEFAULT_PASSWORD,
+                                                  current_app.config['BCRYPT_ROUNDS'])
+    # Timestamps end at today's midnight UTC so a seed gives the same rows all day
+    end = int(time.time()) // 86400 * 86400
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(current_app.config['DATABASE'])
+    apply_pragmas(conn, datagen.BULK_LOAD_PRAGMAS)
+    counts = datagen.generate(conn, users, checkins, dass_count, password_hash, end,
+                              seed=seed, days=days)
+    # Back to the serving profile (WAL), with fresh planner statistics;
+    # analysis_limit samples each index instead of scanning all of it
+    apply_pragmas(conn, get_db_pragmas())
+    conn.execute('PRAGMA analysis_limit = 1000')
+    conn.execute('ANALYZE')
+    conn.close()
+    if current_app.config['DB_SHARDS']:
+        # Generated rows land in DATABASE; spread them over the shards
+        move_user_rows()
+    print(f"Generated {counts['users']} users, {counts['checkins']} check-ins and "
+          f"{counts['dass_assessments']} DASS-21 results in {current_app.config['DATABASE']} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+@api.route('/api/mood_quiz/generate', methods=['GET'])
 @jwt_required()
 def generate_mood_quiz():
     """
@@ -527,7 +1705,7 @@ def generate_mood_quiz():
             'error': f'Failed to generate quiz: {str(e)}'
         }), 500
 
-@app.route('/api/mood_quiz/submit', methods=['POST'])
+@api.route('/api/mood_quiz/submit', methods=['POST'])
 @jwt_required()
 def submit_mood_quiz():
     """
@@ -560,8 +1738,8 @@ def submit_mood_quiz():
                 'error': 'Answer is required'
             }), 400
         
-        # Log the answer (for debugging)
-        print(f"Quiz answer received - Question ID: {question_id}, Answer: {answer}")
+        # Sampled debug event; the answer itself is never logged
+        log_event(logger, logging.DEBUG, 'quiz_answer_received', question_id=question_id)
         
         # Generate insight based on answer
         insight = generate_mood_insight(answer)
@@ -576,7 +1754,7 @@ def submit_mood_quiz():
             'success': False,
             'error': f'Failed to submit quiz answer: {str(e)}'
         }), 500
-@app.route('/api/dass21/submit', methods=['POST'])
+@api.route('/api/dass21/submit', methods=['POST'])
 @jwt_required()
 def submit_dass21():
     """
@@ -588,68 +1766,45 @@ def submit_dass21():
         }
     }
     """
+    import dass  # Lazy: numpy is only needed once someone submits a DASS-21
+
     try:
         user_id = int(get_jwt_identity())
         data = request.get_json()
-        
-        data = request.get_json()
-        print("Received DASS-21 submission:", data)  # 👈 Add this line
-
-        answers = data.get('answers')
-        if not answers or len(answers) != 21:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid or incomplete answers'
-            }), 400
+        log_event(logger, logging.DEBUG, 'dass21_submission_received', user_id=user_id)
 
-
-        answers = data.get('answers')
-
-        if not answers or len(answers) != 21:
+        answers = data.get('answers') if data else None
+        try:
+            answer_matrix = dass.parse_answers([answers])
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Invalid or incomplete answers'
+                'error': str(e)
             }), 400
 
-        # Initialize scores
-        scores = {'d': 0, 'a': 0, 's': 0}
-        tags = {
-            1: 's', 2: 'a', 3: 'd', 4: 'a', 5: 'd', 6: 's', 7: 'a',
-            8: 's', 9: 'a', 10: 'd', 11: 's', 12: 's', 13: 'd',
-            14: 's', 15: 'a', 16: 'd', 17: 'd', 18: 's', 19: 'a',
-            20: 'a', 21: 'd'
-        }
-
-        for qid, value in answers.items():
-            tag = tags.get(int(qid))
-            if tag:
-                scores[tag] += int(value)
-
-        # Multiply by 2 as per DASS-21 scoring
-        for k in scores:
-            scores[k] *= 2
+        # Same vectorized path as batch re-scoring, with a batch of one
+        result = dass.score_submissions_matrix(answer_matrix)[0]
+        depression, anxiety, stress = (result['scores'][name] for name in dass.SUBSCALE_NAMES)
+        scores = {'d': depression, 'a': anxiety, 's': stress}
 
-        # Save in database
-        conn = get_db_connection()
+        # Save in database; the legacy JSON scores column is still written
+        # for readers that predate the typed columns
+        conn = get_user_db_connection(user_id)
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO dass_assessments (user_id, scores)
-            VALUES (?, ?)
-        ''', (user_id, json.dumps(scores)))
+            INSERT INTO dass_assessments (user_id, scores, depression, anxiety, stress, answers)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, json.dumps(scores), depression, anxiety, stress,
+              dass.pack_answers(answer_matrix[0])))
         conn.commit()
-        conn.close()
+        get_dass_history_cache().delete(user_id)
 
         # Return scores
         return jsonify({
-    'success': True,
-    'scores': {
-        'Depression': scores['d'],
-        'Anxiety': scores['a'],
-        'Stress': scores['s']
-    },
-    'severity': classify_dass_scores(scores)
-})
-
+            'success': True,
+            'scores': result['scores'],
+            'severity': result['severity']
+        })
 
     except Exception as e:
         return jsonify({
@@ -657,6 +1812,154 @@ def submit_dass21():
             'error': f'Failed to submit DASS-21: {str(e)}'
         }), 500
 
+@api.route('/api/dass21/history', methods=['GET'])
+@jwt_required()
+def get_dass21_history():
+    """
+    Retrieve past DASS-21 results for the current user, newest first.
+    
+    Query parameters (all optional):
+        limit: Page size, 1-100 (default 10)
+        before: Cursor from next_cursor; return results older than it
+    
+    Each result carries its scores and severity, the average of the last
+    DASS_ROLLING_WINDOW assessments up to and including it, and the change
+    from the previous assessment (null for the first). Averages and deltas
+    are computed by SQLite window functions over the user's whole history,
+    so they are correct on every page.
+    
+    Pages are cached per user. A cached page is only served while the user's
+    latest assessment is the one it was built from, so a new submission is
+    visible immediately even if it was handled by another worker.
+    
+    Returns:
+        JSON response with results and next_cursor (null on the last page)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        args = request.args
+        
+        try:
+            limit = int(args.get('limit', DASS_HISTORY_PAGE_DEFAULT))
+            if limit < 1 or limit > DASS_HISTORY_PAGE_MAX:
+                raise ValueError
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be an integer between 1 and {DASS_HISTORY_PAGE_MAX}'
+            }), 400
+        
+        before = args.get('before')
+        try:
+            position = decode_cursor(before) if before else None
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        conn = get_user_db_connection(user_id)
+        cursor = conn.cursor()
+        
+        # One index seek; tells us whether cached pages are still current
+        cursor.execute('''
+            SELECT id FROM dass_assessments
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        ''', (user_id,))
+        latest = cursor.fetchone()
+        latest_id = latest['id'] if latest else None
+        
+        history_cache = get_dass_history_cache()
+        cached = history_cache.get(user_id)
+        # Other threads may be reading this entry's pages, so they are never
+        # changed in place; adding a page stores a new entry (see below)
+        pages = cached[1] if cached is not None and cached[0] == latest_id else {}
+        page_key = (limit, position)
+        payload = pages.get(page_key)
+        if payload is not None:
+            return jsonify(payload)
+        
+        condition = 'WHERE (created_at, id) < (?, ?)' if position else ''
+        params = [user_id] + (list(position) if position else [])
+        
+        # Fetch one extra row to learn whether another page exists
+        cursor.execute(f'''
+            SELECT * FROM (
+                SELECT id, created_at, depression, anxiety, stress,
+                       ROUND(AVG(depression) OVER recent, 2) AS depression_avg,
+                       ROUND(AVG(anxiety) OVER recent, 2) AS anxiety_avg,
+                       ROUND(AVG(stress) OVER recent, 2) AS stress_avg,
+                       depression - LAG(depression) OVER history AS depression_delta,
+                       anxiety - LAG(anxiety) OVER history AS anxiety_delta,
+                       stress - LAG(stress) OVER history AS stress_delta
+                FROM dass_assessments
+                WHERE user_id = ?
+                WINDOW history AS (ORDER BY created_at, id),
+                       recent AS (history ROWS BETWEEN {DASS_ROLLING_WINDOW - 1} PRECEDING AND CURRENT ROW)
+            )
+            {condition}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1])
+        
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        results = []
+        for row in rows:
+            results.append({
+                'id': row['id'],
+                'timestamp': row['created_at'],
+                'scores': {
+                    'Depression': row['depression'],
+                    'Anxiety': row['anxiety'],
+                    'Stress': row['stress']
+                },
+                'severity': classify_dass_scores({
+                    'd': row['depression'],
+                    'a': row['anxiety'],
+                    's': row['stress']
+                }),
+                'rolling_average': {
+                    'Depression': row['depression_avg'],
+                    'Anxiety': row['anxiety_avg'],
+                    'Stress': row['stress_avg']
+                },
+                'delta': None if row['depression_delta'] is None else {
+                    'Depression': row['depression_delta'],
+                    'Anxiety': row['anxiety_delta'],
+                    'Stress': row['stress_delta']
+                }
+            })
+        
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+        
+        payload = {
+            'success': True,
+            'results': results,
+            'next_cursor': next_cursor
+        }
+        pages = dict(pages)
+        if len(pages) >= DASS_HISTORY_PAGES_PER_USER:
+            del pages[next(iter(pages))]
+        pages[page_key] = payload
+        # Concurrent misses for the same user race here and one page may be
+        # dropped; that only costs a later query
+        history_cache.set(user_id, (latest_id, pages))
+        return jsonify(payload)
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to retrieve DASS-21 history: {str(e)}'
+        }), 500
+
 def generate_mood_insight(answer):
     """
     Generate a simple mood insight based on the quiz answer.
@@ -667,51 +1970,24 @@ def generate_mood_insight(answer):
     Returns:
         str: A personalized insight message
     """
-    answer_lower = answer.lower()
-    
-    # Check concerning responses first (to catch "dissatisfied" before "satisfied")
-    if any(word in answer_lower for word in ['tired', 'anxious', 'worried', 'isolated', 'dissatisfied', 'high']):
-        return "It sounds like you might be going through a challenging time. Remember to be kind to yourself and consider reaching out for support."
-    
-    # Positive responses
-    elif any(word in answer_lower for word in ['energized', 'optimistic', 'strong', 'satisfied', 'hopeful']):
-        return "You're showing positive energy and outlook! Keep nurturing this mindset."
-    
-    # Neutral responses
-    elif any(word in answer_lower for word in ['neutral', 'adequate', 'cautious']):
-        return "You're in a balanced state. Consider what might help you feel more energized."
-    
-    # Default response
-    else:
-        return "Thanks for sharing your thoughts. Self-reflection is an important part of mental wellness."
+    intent = MOOD_INSIGHT_MATCHER.match(answer.lower())
+    return MOOD_INSIGHTS.get(intent, MOOD_INSIGHTS['default'])
 def classify_dass_scores(scores):
     """
     Map raw scores to severity levels.
+    
+    Args:
+        scores (dict): Doubled scores keyed 'd', 'a' and 's'
+    
+    Returns:
+        dict: Severity label keyed by subscale name
     """
-    def get_level(scale, score):
-        if scale == 'd':
-            return ("Normal" if score < 10 else
-                    "Mild" if score < 14 else
-                    "Moderate" if score < 21 else
-                    "Severe" if score < 28 else "Extremely Severe")
-        elif scale == 'a':
-            return ("Normal" if score < 8 else
-                    "Mild" if score < 10 else
-                    "Moderate" if score < 15 else
-                    "Severe" if score < 20 else "Extremely Severe")
-        elif scale == 's':
-            return ("Normal" if score < 15 else
-                    "Mild" if score < 19 else
-                    "Moderate" if score < 26 else
-                    "Severe" if score < 34 else "Extremely Severe")
+    import dass
 
-    return {
-        "Depression": get_level('d', scores['d']),
-        "Anxiety": get_level('a', scores['a']),
-        "Stress": get_level('s', scores['s'])
-    }
+    levels = dass.classify([[scores[subscale] for subscale in dass.SUBSCALES]])[0]
+    return dict(zip(dass.SUBSCALE_NAMES, dass.SEVERITY_LEVELS[levels].tolist()))
 
-@app.route('/api/copilot/grounding', methods=['POST'])
+@api.route('/api/copilot/grounding', methods=['POST'])
 @jwt_required()
 def get_grounding_exercise():
     """
@@ -743,14 +2019,7 @@ def get_grounding_exercise():
             }), 400
         
         # Match keywords to appropriate exercises
-        if 'grounding' in prompt:
-            exercise = GROUNDING_EXERCISES['grounding']
-        elif any(word in prompt for word in ['breathing', 'breath', 'breathe']):
-            exercise = GROUNDING_EXERCISES['breathing']
-        elif any(word in prompt for word in ['mindfulness', 'meditation', 'calm']):
-            exercise = GROUNDING_EXERCISES['mindfulness']
-        else:
-            exercise = GROUNDING_EXERCISES['default']
+        exercise = GROUNDING_EXERCISES[GROUNDING_MATCHER.match(prompt) or 'default']
         
         return jsonify({
             'success': True,
@@ -763,8 +2032,9 @@ def get_grounding_exercise():
             'error': f'Failed to get grounding exercise: {str(e)}'
         }), 500
 
-@app.route('/api/chat', methods=['POST'])
+@api.route('/api/chat', methods=['POST'])
 @jwt_required()
+@rate_limit('chat')
 def chat_response():
     """
     Generate a conversational response based on the user's message.
@@ -818,43 +2088,181 @@ def generate_chat_response(message):
     Returns:
         str: Appropriate response based on message content
     """
-    # Sad/down responses
-    if any(word in message for word in ['sad', 'down', 'depressed', 'upset', 'hurt']):
-        return "I'm sorry to hear that you're feeling this way. It's completely normal to have difficult emotions. Remember to be kind to yourself during tough times. Is there anything specific that's been weighing on you?"
+    intent = CHAT_MATCHER.match(message)
+    return CHAT_RESPONSES.get(intent, CHAT_RESPONSES['default'])
+
+def iter_export_rows(conn, user_id):
+    """
+    Yield a user's check-ins and DASS-21 results as flat dicts, oldest first.
     
-    # Stressed/anxious responses
-    elif any(word in message for word in ['stressed', 'anxious', 'worried', 'overwhelmed', 'panic']):
-        return "Stress and anxiety can be really tough to deal with. Try taking a few deep breaths - in through your nose for 4 counts, hold for 4, and out through your mouth for 6. Remember that this feeling will pass. What's been causing you the most stress lately?"
+    Rows are pulled with fetchmany in EXPORT_CHUNK_SIZE batches so only one
+    chunk is in memory at a time, and each chunk is yielded as a list.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, mood, stress_level, notes, timestamp
+        FROM checkins
+        WHERE user_id = ?
+        ORDER BY timestamp, id
+    ''', (user_id,))
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            break
+        yield [{
+            'type': 'checkin',
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'mood': row['mood'],
+            'stress_level': row['stress_level'],
+            'notes': row['notes']
+        } for row in rows]
     
-    # Happy/positive responses
-    elif any(word in message for word in ['happy', 'good', 'great', 'excited', 'joy']):
-        return "I'm so glad to hear you're feeling positive! It's wonderful when we can appreciate the good moments. What's been going well for you recently?"
+    cursor.execute('''
+        SELECT id, depression, anxiety, stress, created_at
+        FROM dass_assessments
+        WHERE user_id = ?
+        ORDER BY created_at, id
+    ''', (user_id,))
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            break
+        yield [{
+            'type': 'dass21',
+            'id': row['id'],
+            'timestamp': row['created_at'],
+            'depression': row['depression'],
+            'anxiety': row['anxiety'],
+            'stress': row['stress']
+        } for row in rows]
+
+def encode_export_chunks(chunks, export_format):
+    """Serialize row chunks as NDJSON or CSV bytes, one output block per chunk."""
+    if export_format == 'ndjson':
+        dumps = current_app.json.dumps
+        for chunk in chunks:
+            yield ''.join(dumps(row) + '\n' for row in chunk).encode('utf-8')
+        return
     
-    # Tired/exhausted responses
-    elif any(word in message for word in ['tired', 'exhausted', 'sleepy', 'drained']):
-        return "It sounds like you might need some rest. Make sure you're getting enough sleep and taking breaks when you need them. Self-care isn't selfish - it's necessary. Have you been able to get enough rest lately?"
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte blocks into a single gzip stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@api.route('/api/export', methods=['GET'])
+@jwt_required()
+def export_data():
+    """
+    Export the current user's check-ins and DASS-21 results.
     
-    # Angry/frustrated responses
-    elif any(word in message for word in ['angry', 'mad', 'frustrated', 'annoyed']):
-        return "Anger and frustration are valid emotions. It's okay to feel this way. Try to take some time to process these feelings safely. Deep breathing or physical activity can sometimes help. What's been frustrating you?"
+    The response is streamed: rows are read in fixed-size chunks and written
+    out as they are produced, so memory use stays constant no matter how long
+    the history is. The body is gzip-compressed when the client accepts it.
     
-    # Lonely responses
-    elif any(word in message for word in ['lonely', 'alone', 'isolated']):
-        return "Feeling lonely can be really difficult. Remember that you're not truly alone, even when it feels that way. Consider reaching out to someone you trust or engaging in activities that connect you with others. I'm here to listen too."
+    Query parameters:
+        format: "ndjson" (default) or "csv"
     
-    # Help/support requests
-    elif any(word in message for word in ['help', 'support', 'advice', 'guidance']):
-        return "I'm here to support you. While I can provide general wellness tips and a listening ear, remember that professional help is available if you need more support. What kind of help are you looking for today?"
+    Returns:
+        Streamed NDJSON (one object per line, each with a "type" of "checkin"
+        or "dass21") or CSV with the columns in EXPORT_CSV_FIELDS
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({
+            'success': False,
+            'error': 'format must be ndjson or csv'
+        }), 400
     
-    # Gratitude/thanks
-    elif any(word in message for word in ['thank', 'grateful', 'appreciate']):
-        return "You're very welcome! I'm glad I could be helpful. Practicing gratitude, like you're doing right now, is actually great for mental health. Keep being kind to yourself."
+    user_id = int(get_jwt_identity())
+    conn = get_user_db_connection(user_id)
     
-    # Default response
-    else:
-        return "Thank you for sharing that with me. I'm here to listen and provide support. How are you feeling right now? Is there anything specific I can help you with today?"
+    body = encode_export_chunks(iter_export_rows(conn, user_id), export_format)
+    headers = {
+        'Content-Disposition': f'attachment; filename=mindbridge-export.{export_format}',
+        'Vary': 'Accept-Encoding'
+    }
+    if request.accept_encodings['gzip']:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+    
+    # stream_with_context keeps the app context, and with it the pooled
+    # connection, alive until the last chunk has been sent
+    return Response(stream_with_context(body), mimetype=EXPORT_MIMETYPES[export_format],
+                    headers=headers)
+
+def build_catalog():
+    """
+    Serialize the quiz and grounding content once, for GET /api/catalog.
+    
+    The content only changes with a deploy, so the body, its gzip encoding
+    and their ETags are computed at import and every request just picks one.
+    
+    Returns:
+        dict: 'identity' and 'gzip' entries, each a (body bytes, ETag) pair
+    """
+    catalog = {
+        'success': True,
+        'mood_quiz': {
+            'questions': MOOD_QUIZ_QUESTIONS
+        },
+        'grounding': {
+            'exercises': GROUNDING_EXERCISES,
+            'keywords': [{'exercise': name, 'keywords': keywords}
+                         for name, keywords in GROUNDING_KEYWORDS]
+        }
+    }
+    body = json.dumps(catalog, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        'identity': (body, digest),
+        'gzip': (b''.join(gzip_chunks([body])), f'{digest}-gz')
+    }
 
-@app.route('/api/health', methods=['GET'])
+CATALOG = build_catalog()
+
+@api.route('/api/catalog', methods=['GET'])
+def get_catalog():
+    """
+    Return every mood quiz question and grounding exercise in one response.
+    
+    Clients can cache the catalog and pick questions and exercises locally
+    (the grounding keywords are included, in priority order). Responses
+    carry an ETag and a long Cache-Control lifetime; a request whose
+    If-None-Match matches gets an empty 304.
+    
+    Returns:
+        JSON catalog with mood_quiz.questions and grounding.exercises/keywords
+    """
+    encoding = 'gzip' if request.accept_encodings['gzip'] else 'identity'
+    body, etag = CATALOG[encoding]
+    
+    response = Response(body, mimetype='application/json')
+    if encoding == 'gzip':
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """
     Simple health check endpoint to verify the API is running.
@@ -868,7 +2276,17 @@ def health_check():
         'message': 'MindBridge API is running'
     })
 
-@app.errorhandler(404)
+@api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Expose in-process metrics in Prometheus text exposition format.
+    
+    Returns:
+        Plain-text metrics for scraping
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@api.app_errorhandler(404)
 def not_found(error):
     """Handle 404 errors with JSON response."""
     return jsonify({
@@ -876,7 +2294,7 @@ def not_found(error):
         'error': 'Endpoint not found'
     }), 404
 
-@app.errorhandler(400)
+@api.app_errorhandler(400)
 def bad_request(error):
     """Handle 400 errors with JSON response."""
     return jsonify({
@@ -884,7 +2302,7 @@ def bad_request(error):
         'error': 'Bad request'
     }), 400
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     """Handle 500 errors with JSON response."""
     return jsonify({
@@ -892,9 +2310,75 @@ def internal_error(error):
         'error': 'Internal server error'
     }), 500
 
+def create_app(config=None):
+    """
+    Build a MindBridge app.
+
+    Building an app is cheap: it touches neither the database nor numpy.
+    The schema is created by the first request that needs a connection
+    (or up front with ensure_db()), and the pools, caches and rate limiters
+    are created when first used. LOG_LEVEL and LOG_DEBUG_SAMPLE_RATE only
+    apply if no app has configured logging yet in this process; use
+    logs.configure_logging() to change them afterwards.
+
+    Args:
+        config (dict): Settings overriding DEFAULT_CONFIG
+
+    Returns:
+        Flask: The configured app
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(copy.deepcopy(DEFAULT_CONFIG))
+    if config:
+        app.config.update(config)
+
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+    jwt = CachingJWTManager(app, cache_size=app.config['JWT_CACHE_SIZE'],
+                            cache_ttl=app.config['JWT_CACHE_TTL'])
+    jwt.token_in_blocklist_loader(is_token_revoked)
+    app.json = FastJSONProvider(app, backend=app.config['JSON_BACKEND'])
+    # Logging is process-wide: the first app sets it up and later apps reuse it
+    configure_logging(level=app.config['LOG_LEVEL'],
+                      debug_sample_rate=app.config['LOG_DEBUG_SAMPLE_RATE'], replace=False)
+
+    app.extensions['dass_history_cache'] = LRUCache(max_size=DASS_HISTORY_CACHE_USERS,
+                                                    ttl=DASS_HISTORY_CACHE_TTL)
+    app.register_blueprint(api)
+    app.teardown_appcontext(close_db)
+    return app
+
+def get_default_app():
+    """Return the app built from DEFAULT_CONFIG, creating it on first use."""
+    global _default_app
+    if _default_app is None:
+        with _app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
+
+def __getattr__(name):
+    # `from app import app`, `gunicorn app:app` and `flask --app app` get the
+    # default app, built on first access instead of at import
+    if name == 'app':
+        return get_default_app()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def warm_up():
+    """
+    Import the modules that handlers otherwise import on first use.
+
+    A preforking server calls this in its master (see gunicorn.conf.py) so
+    the import happens once and every worker shares the loaded modules
+    copy-on-write, instead of each paying for them on its first request.
+    """
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+
 if __name__ == '__main__':
+    app = create_app()
+
     # Initialize database on startup
-    init_db()
+    init_db(app)
     
     # Run the Flask app
     app.run(debug=True, host='0.0.0.0', port=5000) 
@@ -0,0 +1,68 @@
+"""
+MindBridge ASGI entry point - production server for the Flask API
+Serves the app from an asyncio event loop with Flask handlers on a bounded thread pool, so slow bcrypt or
+SQLite work in some requests never stops the server from accepting and answering others.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 [--workers N]
+"""
+
+import logging
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import create_app, ensure_db, logger
+from logs import log_event
+
+# Handler threads per process. Every request occupies one for its whole
+# duration, including time spent waiting on the bcrypt pool or for a pooled
+# SQLite connection, so keep this above BCRYPT_WORKERS + BCRYPT_MAX_QUEUE
+# to leave threads free for chat, quiz and copilot while auth is saturated.
+ASGI_THREADS = int(os.environ.get('MINDBRIDGE_ASGI_THREADS', '32'))
+
+
+def create_application(app, threads=ASGI_THREADS):
+    """
+    Wrap a Flask app for an ASGI server.
+
+    Args:
+        app (Flask): App from create_app()
+        threads (int): Size of the thread pool running Flask handlers
+
+    Returns:
+        An ASGI application
+    """
+    bcrypt_slots = app.config['BCRYPT_WORKERS'] + app.config['BCRYPT_MAX_QUEUE']
+    if threads <= bcrypt_slots:
+        log_event(logger, logging.WARNING, 'asgi_thread_pool_too_small', threads=threads,
+                  bcrypt_slots=bcrypt_slots)
+    return WSGIMiddleware(app, workers=threads)
+
+
+_application = None
+
+
+def get_application():
+    """Return the ASGI app for the default Flask app, building it on first use."""
+    global _application
+    if _application is None:
+        flask_app = create_app()
+        ensure_db(flask_app)
+        _application = create_application(flask_app)
+    return _application
+
+
+def __getattr__(name):
+    # `uvicorn asgi:application` and gunicorn's wsgi_app get the default app,
+    # built on first access so importing create_application has no side effects
+    if name == 'application':
+        return get_application()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('asgi:application', host='0.0.0.0', port=int(os.environ.get('PORT', '5000')),
+                workers=int(os.environ.get('MINDBRIDGE_ASGI_WORKERS', '1')))
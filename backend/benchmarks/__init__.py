@@ -0,0 +1,5 @@
+"""
+MindBridge Benchmarks - performance measurements for the Flask backend
+
+Run from the backend directory, e.g. `python -m benchmarks.bench_json`.
+"""
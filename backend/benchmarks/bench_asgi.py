@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Serving mode load test
+
+Starts the API under the Werkzeug server that `python app.py` uses and under
+uvicorn via asgi.py, each in its own process with a fresh database, then
+drives both with the same mixed load: clients looping on /api/auth/login
+(bcrypt at the production cost) while other clients loop on /api/chat,
+/api/mood_quiz/generate and /api/copilot/grounding. Reports throughput and
+latency percentiles per endpoint, showing whether the cheap endpoints keep
+serving while bcrypt work is in flight. Rate limits are disabled in the
+servers under test.
+
+Usage:
+    python -m benchmarks.bench_asgi [--duration SECONDS] [--login-clients N] [--clients N]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHEAP_REQUESTS = [
+    ('chat', 'POST', '/api/chat', {'message': 'I feel stressed about work'}),
+    ('quiz', 'GET', '/api/mood_quiz/generate', None),
+    ('copilot', 'POST', '/api/copilot/grounding', {'prompt': 'help me with breathing'})
+]
+
+
+def serve(mode, port):
+    """Run the app in this process the way the given serving mode does."""
+    from app import create_app, ensure_db
+
+    flask_app = create_app({'RATE_LIMITS': {}})
+    ensure_db(flask_app)
+    if mode == 'wsgi':
+        flask_app.run(host='127.0.0.1', port=port, use_reloader=False)
+    else:
+        import uvicorn
+        from asgi import create_application
+
+        uvicorn.run(create_application(flask_app), host='127.0.0.1', port=port,
+                    log_level='warning')
+
+
+def request(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def wait_until_up(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            request(conn, 'GET', '/api/health')
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+def run_load(port, duration, login_clients, clients):
+    """Drive one server; returns {endpoint: (latencies, error count)}."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    credentials = {'username': 'loadtest', 'email': 'loadtest@example.com',
+                   'password': 'loadtest-password'}
+    status, body = request(conn, 'POST', '/api/auth/register', credentials)
+    if status != 200:
+        raise RuntimeError(f'Could not register the load test user: {status} {body[:200]}')
+    token = json.loads(body)['access_token']
+    conn.close()
+
+    results = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def record(name, latency, ok):
+        with lock:
+            latencies, errors = results.setdefault(name, ([], [0]))
+            if ok:
+                latencies.append(latency)
+            else:
+                errors[0] += 1
+
+    def client(requests, use_token):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        i = 0
+        while time.monotonic() < deadline:
+            name, method, path, body = requests[i % len(requests)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status, _ = request(conn, method, path, body, token if use_token else None)
+                ok = status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                ok = False
+            record(name, time.perf_counter() - started, ok)
+        conn.close()
+
+    login = [('login', 'POST', '/api/auth/login',
+              {'username': credentials['username'], 'password': credentials['password']})]
+    threads = [threading.Thread(target=client, args=(login, False)) for _ in range(login_clients)]
+    threads += [threading.Thread(target=client, args=(CHEAP_REQUESTS, True)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: (latencies, errors[0]) for name, (latencies, errors) in results.items()}
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--login-clients', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=5101, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"{'server':<10} {'endpoint':<8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'errors':>7}")
+    for offset, mode in enumerate(('wsgi', 'asgi')):
+        port = args.port + offset
+        with tempfile.TemporaryDirectory() as workdir:
+            env = dict(os.environ, PYTHONPATH=BACKEND_DIR, MINDBRIDGE_LOG_LEVEL='WARNING')
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_asgi', '--serve', mode, '--port', str(port)],
+                cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            # The module is imported from BACKEND_DIR; the database lands in workdir
+            try:
+                wait_until_up(port)
+                results = run_load(port, args.duration, args.login_clients, args.clients)
+            finally:
+                server.terminate()
+                server.wait()
+
+        for name in ['login'] + [name for name, *_ in CHEAP_REQUESTS]:
+            latencies, errors = results.get(name, ([], 0))
+            print(f'{mode:<10} {name:<8} {len(latencies) / args.duration:>8.1f} '
+                  f'{statistics.median(latencies) * 1000 if latencies else float("nan"):>9.1f} '
+                  f'{percentile(latencies, 0.95) * 1000:>9.1f} '
+                  f'{percentile(latencies, 0.99) * 1000:>9.1f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Intent matching microbenchmark
+
+Times the chat IntentMatcher against the original chain of
+`any(word in message for word in [...])` checks, for short chat messages and
+for long (10KB+) messages where no keyword matches, which is the worst case
+for both. Each matcher backend available here is measured, and the one the
+app uses (backend='auto') is marked with *.
+
+Usage:
+    python -m benchmarks.bench_intents [--iterations N]
+"""
+
+import argparse
+import random
+import timeit
+
+from intents import IntentMatcher, ahocorasick
+
+
+# The chat keyword groups, in the same priority order as app.CHAT_MATCHER
+CHAT_INTENTS = [
+    ('sad', ['sad', 'down', 'depressed', 'upset', 'hurt']),
+    ('stressed', ['stressed', 'anxious', 'worried', 'overwhelmed', 'panic']),
+    ('happy', ['happy', 'good', 'great', 'excited', 'joy']),
+    ('tired', ['tired', 'exhausted', 'sleepy', 'drained']),
+    ('angry', ['angry', 'mad', 'frustrated', 'annoyed']),
+    ('lonely', ['lonely', 'alone', 'isolated']),
+    ('help', ['help', 'support', 'advice', 'guidance']),
+    ('gratitude', ['thank', 'grateful', 'appreciate'])
+]
+
+
+def legacy_chat_intent(message):
+    """The keyword chain generate_chat_response used before IntentMatcher."""
+    if any(word in message for word in ['sad', 'down', 'depressed', 'upset', 'hurt']):
+        return 'sad'
+    elif any(word in message for word in ['stressed', 'anxious', 'worried', 'overwhelmed', 'panic']):
+        return 'stressed'
+    elif any(word in message for word in ['happy', 'good', 'great', 'excited', 'joy']):
+        return 'happy'
+    elif any(word in message for word in ['tired', 'exhausted', 'sleepy', 'drained']):
+        return 'tired'
+    elif any(word in message for word in ['angry', 'mad', 'frustrated', 'annoyed']):
+        return 'angry'
+    elif any(word in message for word in ['lonely', 'alone', 'isolated']):
+        return 'lonely'
+    elif any(word in message for word in ['help', 'support', 'advice', 'guidance']):
+        return 'help'
+    elif any(word in message for word in ['thank', 'grateful', 'appreciate']):
+        return 'gratitude'
+    return None
+
+
+def long_message(size, seed=0):
+    """Build a keyword-free message of roughly size characters."""
+    rng = random.Random(seed)
+    words = ['the', 'weather', 'is', 'fine', 'today', 'i', 'went', 'to', 'work', 'and',
+             'then', 'came', 'home', 'ate', 'dinner', 'watched', 'tv', 'with', 'friends']
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    backends = ['table'] + (['ahocorasick'] if ahocorasick is not None else [])
+    matchers = {backend: IntentMatcher(CHAT_INTENTS, backend=backend) for backend in backends}
+
+    cases = [
+        ('short, no match', 'random message about my day'),
+        ('short, late intent', 'thank you, that was really useful'),
+        ('10KB, no match', long_message(10_000)),
+        ('100KB, no match', long_message(100_000))
+    ]
+
+    shipped = IntentMatcher(CHAT_INTENTS).backend
+    header = f"{'message':<20} {'legacy':>12}" + ''.join(
+        f"{b + ('*' if b == shipped else ''):>14}" for b in backends)
+    print(header)
+    for name, message in cases:
+        number = args.iterations if len(message) < 1000 else max(1, args.iterations // 20)
+        expected = legacy_chat_intent(message)
+        row = f'{name:<20} '
+        row += f'{timeit.timeit(lambda: legacy_chat_intent(message), number=number) / number * 1e6:>10.2f}us'
+        for backend, matcher in matchers.items():
+            assert matcher.match(message) == expected
+            elapsed = timeit.timeit(lambda: matcher.match(message), number=number) / number
+            row += f'{elapsed * 1e6:>12.2f}us'
+        print(row)
+    if shipped != 'ahocorasick':
+        print('* pyahocorasick is not installed: the app is using the table fallback')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+JSON request/response benchmark
+
+Compares the old before_request hook, which decoded every JSON body with
+json.loads only to validate it before the handler parsed it again, against
+the single cached parse, for each installed JSON backend. Also times
+jsonify-style response encoding per backend.
+
+Usage:
+    python -m benchmarks.bench_json [--iterations N]
+"""
+
+import argparse
+import json
+import timeit
+
+from flask import Flask, request
+
+from json_provider import FastJSONProvider, available_backends
+
+# A chat-sized and a batch-sized request body
+SMALL_BODY = json.dumps({'message': 'I have been feeling stressed and tired all week ' * 4})
+LARGE_BODY = json.dumps({'checkins': [
+    {'mood': 'Happy', 'stress_level': i % 10 + 1, 'notes': 'Slept well, went for a walk',
+     'timestamp': '2025-01-01T08:00:00', 'idempotency_key': f'key-{i}'}
+    for i in range(200)
+]})
+RESPONSE = {'success': True, 'checkins': json.loads(LARGE_BODY)['checkins'], 'next_cursor': None}
+
+
+def make_app(backend):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, backend=backend)
+    return app
+
+
+def time_parse(app, body, double_parse, iterations):
+    """Time parsing one request body, optionally with the old extra json.loads."""
+    def run():
+        with app.test_request_context('/', method='POST', data=body,
+                                      content_type='application/json'):
+            if double_parse:
+                json.loads(request.data)
+            request.get_json()
+            request.get_json()  # handler call, served from the cache
+
+    return timeit.timeit(run, number=iterations) / iterations
+
+
+def time_encode(app, iterations):
+    """Time building a JSON response for a history-sized payload."""
+    with app.app_context():
+        return timeit.timeit(lambda: app.json.response(RESPONSE), number=iterations) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'body':<6} {'double parse':>14} {'single parse':>14} {'saving':>8}")
+    baseline = make_app('json')
+    for backend in available_backends():
+        app = make_app(backend)
+        for name, body in (('small', SMALL_BODY), ('large', LARGE_BODY)):
+            old = time_parse(baseline, body, True, args.iterations)
+            new = time_parse(app, body, False, args.iterations)
+            print(f'{backend:<8} {name:<6} {old * 1e6:>12.1f}us {new * 1e6:>12.1f}us '
+                  f'{(1 - new / old) * 100:>7.1f}%')
+
+    print()
+    print(f"{'backend':<8} {'jsonify (200 check-ins)':>24}")
+    for backend in available_backends():
+        print(f'{backend:<8} {time_encode(make_app(backend), args.iterations) * 1e6:>22.1f}us')
+
+
+if __name__ == '__main__':
+    main()
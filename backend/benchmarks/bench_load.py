@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the /api routes
+
+Replays weighted request mixes against the API and reports throughput and
+latency percentiles per endpoint. The mixes model the traffic we see:
+
+    login     users signing in (bcrypt at the configured cost)
+    checkin   daily check-ins, history pages and stats
+    chat      chat, grounding exercises and the mood quiz
+    dass      DASS-21 submissions and history
+    all       every /api route with equal weight
+
+Two drivers run the same mixes. `inprocess` calls the Flask test client
+from --connections threads in this process, against a fresh database;
+it has no network or server overhead, so it isolates the cost of
+app.py itself. `http` spreads --connections per process over --processes
+load generator processes, against --url or, by default, a uvicorn
+server started on a fresh database (with rate limits off).
+
+Results are written as JSON with --output. With --baseline, every
+endpoint whose p95 latency or throughput got worse than the baseline by
+more than --tolerance is reported and the exit status is 1; --save-baseline
+writes the current results there instead.
+
+Usage:
+    python -m benchmarks.bench_load [--driver inprocess|http] [--mix NAME ...]
+        [--duration SECONDS] [--output FILE] [--baseline FILE [--save-baseline]]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.bench_asgi import BACKEND_DIR, percentile, request, wait_until_up
+
+MOODS = ['Happy', 'Calm', 'Neutral', 'Stressed', 'Anxious', 'Sad', 'Tired']
+NOTES = ['', 'Slept well', 'Long day at work', 'Went for a walk', 'Exam tomorrow']
+CHAT_MESSAGES = ['I feel stressed about work', 'I am anxious about tomorrow',
+                 'Thank you, that helped', 'I feel a bit sad today', 'Hello there']
+GROUNDING_PROMPTS = ['help me with breathing', 'I need to calm down',
+                     'I feel overwhelmed', 'my thoughts are racing']
+QUIZ_ANSWERS = ['Energized', 'Neutral', 'Tired', 'Anxious', 'Optimistic', 'Worried']
+
+
+# Each operation turns a user and a random generator into
+# (method, path, JSON body or None, whether to send the user's token)
+def op_register(user, rng):
+    # Not drawn from rng: warmup replays the same sequence and would collide
+    name = f'load-{uuid.uuid4().hex[:16]}'
+    return 'POST', '/api/auth/register', {
+        'username': name, 'email': f'{name}@example.com', 'password': 'loadtest-password'
+    }, False
+
+
+def op_login(user, rng):
+    return 'POST', '/api/auth/login', {
+        'username': user['username'], 'password': user['password']
+    }, False
+
+
+def op_checkin_submit(user, rng):
+    return 'POST', '/api/checkin', {
+        'mood': rng.choice(MOODS), 'stress_level': rng.randint(1, 10), 'notes': rng.choice(NOTES)
+    }, True
+
+
+def op_checkin_batch(user, rng):
+    return 'POST', '/api/checkin/batch', {'checkins': [{
+        'mood': rng.choice(MOODS), 'stress_level': rng.randint(1, 10), 'notes': rng.choice(NOTES),
+        'idempotency_key': f'{rng.getrandbits(64):016x}'
+    } for _ in range(10)]}, True
+
+
+def op_dass_submit(user, rng):
+    return 'POST', '/api/dass21/submit', {
+        'answers': {str(i): rng.randint(0, 3) for i in range(1, 22)}
+    }, True
+
+
+OPERATIONS = {
+    'register': op_register,
+    'login': op_login,
+    'profile': lambda user, rng: ('GET', '/api/auth/profile', None, True),
+    'checkin_submit': op_checkin_submit,
+    'checkin_batch': op_checkin_batch,
+    'checkin_list': lambda user, rng: ('GET', '/api/checkin?limit=20', None, True),
+    'checkin_stats': lambda user, rng: ('GET', '/api/checkin/stats?days=30', None, True),
+    'quiz_generate': lambda user, rng: ('GET', '/api/mood_quiz/generate', None, True),
+    'quiz_submit': lambda user, rng: ('POST', '/api/mood_quiz/submit', {
+        'question_id': rng.randint(1, 5), 'answer': rng.choice(QUIZ_ANSWERS)
+    }, True),
+    'dass_submit': op_dass_submit,
+    'dass_history': lambda user, rng: ('GET', '/api/dass21/history?limit=10', None, True),
+    'grounding': lambda user, rng: ('POST', '/api/copilot/grounding', {
+        'prompt': rng.choice(GROUNDING_PROMPTS)
+    }, True),
+    'chat': lambda user, rng: ('POST', '/api/chat', {'message': rng.choice(CHAT_MESSAGES)}, True),
+    'export': lambda user, rng: ('GET', '/api/export?format=ndjson', None, True),
+    'catalog': lambda user, rng: ('GET', '/api/catalog', None, False),
+    'health': lambda user, rng: ('GET', '/api/health', None, False)
+}
+
+# Mix name -> {operation: relative weight}
+MIXES = {
+    'login': {'login': 60, 'profile': 25, 'checkin_list': 15},
+    'checkin': {'checkin_submit': 40, 'checkin_batch': 5, 'checkin_list': 30,
+                'checkin_stats': 15, 'profile': 10},
+    'chat': {'chat': 60, 'grounding': 15, 'quiz_generate': 15, 'quiz_submit': 10},
+    'dass': {'dass_submit': 50, 'dass_history': 40, 'profile': 10},
+    'all': {name: 1 for name in OPERATIONS}
+}
+
+
+class Recorder:
+    """Thread-safe per-operation latencies and error counts."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, ok):
+        with self._lock:
+            if ok:
+                self.latencies.setdefault(name, []).append(seconds)
+            else:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def merge(self, latencies, errors):
+        with self._lock:
+            for name, values in latencies.items():
+                self.latencies.setdefault(name, []).extend(values)
+            for name, count in errors.items():
+                self.errors[name] = self.errors.get(name, 0) + count
+
+
+def run_client(send, users, mix, deadline, rng, recorder):
+    """Send requests from `mix` until the deadline; send() returns the status code."""
+    names = list(MIXES[mix])
+    weights = [MIXES[mix][name] for name in names]
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        user = rng.choice(users)
+        method, path, body, use_token = OPERATIONS[name](user, rng)
+        started = time.perf_counter()
+        try:
+            ok = send(method, path, body, user['token'] if use_token else None) == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+        recorder.record(name, time.perf_counter() - started, ok)
+
+
+def run_threads(make_send, users, mix, duration, connections, seed):
+    """Run `connections` clients in threads, each with its own send()."""
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=run_client, args=(make_send(), users, mix, deadline,
+                                                   random.Random(seed * 1000 + i), recorder))
+        for i in range(connections)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+# In-process driver
+
+def test_client_sender(flask_app):
+    def make_send():
+        client = flask_app.test_client()
+
+        def send(method, path, body, token):
+            headers = {'Authorization': f'Bearer {token}'} if token else {}
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()  # Drain streamed bodies such as /api/export
+            return response.status_code
+        return send
+    return make_send
+
+
+def register_users(send, count, seed):
+    """Create `count` users through the API; returns dicts with their tokens."""
+    users = []
+    for i in range(count):
+        user = {'username': f'load-user-{seed}-{i}', 'password': 'loadtest-password'}
+        status, body = send('POST', '/api/auth/register', dict(
+            user, email=f"{user['username']}@example.com"))
+        if status != 200:
+            raise RuntimeError(f'Could not register {user["username"]}: {status} {body[:200]}')
+        user['token'] = json.loads(body)['access_token']
+        users.append(user)
+    return users
+
+
+def run_inprocess(args):
+    from app import create_app, ensure_db
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        flask_app = create_app({
+            'DATABASE': os.path.join(workdir, 'load.db'),
+            'RATE_LIMITS': {},
+            'LOG_LEVEL': 'WARNING',
+            'BCRYPT_ROUNDS': args.bcrypt_rounds
+        })
+        ensure_db(flask_app)
+        client = flask_app.test_client()
+
+        def setup_send(method, path, body):
+            response = client.open(path, method=method, json=body)
+            return response.status_code, response.get_data()
+
+        users = register_users(setup_send, args.users, args.seed)
+        make_send = test_client_sender(flask_app)
+        for mix in args.mix:
+            if args.warmup:
+                run_threads(make_send, users, mix, args.warmup, args.connections, args.seed)
+            recorder = run_threads(make_send, users, mix, args.duration, args.connections,
+                                   args.seed)
+            results[mix] = (recorder.latencies, recorder.errors)
+        flask_app.extensions['db_pool'].close()
+    return results
+
+
+# HTTP driver
+
+def http_sender(host, port):
+    def make_send():
+        conn = [http.client.HTTPConnection(host, port, timeout=60)]
+
+        def send(method, path, body, token):
+            try:
+                return request(conn[0], method, path, body, token)[0]
+            except (OSError, http.client.HTTPException):
+                conn[0].close()
+                conn[0] = http.client.HTTPConnection(host, port, timeout=60)
+                raise
+        return send
+    return make_send
+
+
+def http_worker(task):
+    """One load generator process; returns plain dicts so they can be pickled."""
+    host, port, users, mix, duration, connections, seed = task
+    recorder = run_threads(http_sender(host, port), users, mix, duration, connections, seed)
+    return recorder.latencies, recorder.errors
+
+
+def run_http(args):
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        workdir = tempfile.TemporaryDirectory()
+        env = dict(os.environ, PYTHONPATH=BACKEND_DIR, MINDBRIDGE_LOG_LEVEL='WARNING')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.bench_asgi', '--serve', 'asgi', '--port', str(port)],
+            cwd=workdir.name, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    results = {}
+    try:
+        if server:
+            wait_until_up(port)
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        users = register_users(lambda method, path, body: request(conn, method, path, body),
+                               args.users, args.seed)
+        conn.close()
+
+        with multiprocessing.Pool(args.processes) as pool:
+            for mix in args.mix:
+                if args.warmup:
+                    pool.map(http_worker, [(host, port, users, mix, args.warmup, args.connections,
+                                            args.seed + p) for p in range(args.processes)])
+                recorder = Recorder()
+                for latencies, errors in pool.map(http_worker, [
+                    (host, port, users, mix, args.duration, args.connections, args.seed + p)
+                    for p in range(args.processes)
+                ]):
+                    recorder.merge(latencies, errors)
+                results[mix] = (recorder.latencies, recorder.errors)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+            workdir.cleanup()
+    return results
+
+
+# Reporting
+
+def summarize(latencies, errors, duration):
+    """Per-endpoint and total throughput/latency for one mix."""
+    endpoints = {}
+    for name in sorted(set(latencies) | set(errors)):
+        values = latencies.get(name, [])
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': errors.get(name, 0),
+            'throughput': len(values) / duration,
+            'p50_ms': statistics.median(values) * 1000 if values else None,
+            'p95_ms': percentile(values, 0.95) * 1000 if values else None,
+            'p99_ms': percentile(values, 0.99) * 1000 if values else None
+        }
+    return {
+        'requests': sum(e['requests'] for e in endpoints.values()),
+        'errors': sum(e['errors'] for e in endpoints.values()),
+        'throughput': sum(e['throughput'] for e in endpoints.values()),
+        'endpoints': endpoints
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.2, min_delta_ms=0.5):
+    """
+    List the ways `current` is slower than `baseline`.
+
+    An endpoint regresses when its p95 latency rose by more than `tolerance`
+    (and by at least min_delta_ms, so sub-millisecond jitter is ignored) or
+    its throughput fell by more than `tolerance`. Only mixes and endpoints
+    present in both reports are compared.
+
+    Args:
+        baseline (dict): Report from a previous run
+        current (dict): Report from this run
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%
+        min_delta_ms (float): Smallest p95 increase that counts
+
+    Returns:
+        list: One human-readable line per regression, empty if none
+    """
+    regressions = []
+    for mix, result in current['mixes'].items():
+        base_mix = baseline['mixes'].get(mix)
+        if base_mix is None:
+            continue
+        for name, stats in result['endpoints'].items():
+            base = base_mix['endpoints'].get(name)
+            if base is None:
+                continue
+            old_p95, new_p95 = base['p95_ms'], stats['p95_ms']
+            if (old_p95 is not None and new_p95 is not None
+                    and new_p95 > old_p95 * (1 + tolerance) and new_p95 - old_p95 >= min_delta_ms):
+                regressions.append(f'{mix}/{name}: p95 {old_p95:.2f}ms -> {new_p95:.2f}ms')
+            if stats['throughput'] < base['throughput'] * (1 - tolerance):
+                regressions.append(f"{mix}/{name}: throughput {base['throughput']:.1f}/s -> "
+                                   f"{stats['throughput']:.1f}/s")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'mix':<8} {'endpoint':<15} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7}")
+    fmt = lambda value: f'{value:>8.2f}' if value is not None else f"{'-':>8}"
+    for mix, result in report['mixes'].items():
+        for name, stats in result['endpoints'].items():
+            print(f"{mix:<8} {name:<15} {stats['throughput']:>8.1f} {fmt(stats['p50_ms'])} "
+                  f"{fmt(stats['p95_ms'])} {fmt(stats['p99_ms'])} {stats['errors']:>7}")
+        print(f"{mix:<8} {'TOTAL':<15} {result['throughput']:>8.1f} {'':>26} {result['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--driver', choices=['inprocess', 'http'], default='inprocess')
+    parser.add_argument('--mix', nargs='+', choices=list(MIXES), default=list(MIXES))
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mix')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Untimed seconds before each mix')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--connections', type=int, default=4,
+                        help='Concurrent clients (per process with --driver http)')
+    parser.add_argument('--processes', type=int, default=2, help='Load generator processes (http)')
+    parser.add_argument('--url', help='Server to load (http); default starts one on --port')
+    parser.add_argument('--port', type=int, default=5201)
+    parser.add_argument('--bcrypt-rounds', type=int, default=12, help='bcrypt cost (inprocess)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write this run to --baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    raw = run_http(args) if args.driver == 'http' else run_inprocess(args)
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'driver': args.driver,
+        'python': platform.python_version(),
+        'duration': args.duration,
+        'connections': args.connections,
+        'processes': args.processes if args.driver == 'http' else 1,
+        'mixes': {mix: summarize(latencies, errors, args.duration)
+                  for mix, (latencies, errors) in raw.items()}
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('driver') != report['driver']:
+            print(f"warning: baseline used the {baseline.get('driver')} driver", file=sys.stderr)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
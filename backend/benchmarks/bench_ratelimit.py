@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Rate limiter microbenchmark
+
+Times RateLimiter.hit() for a single hot client and for a stream of mostly
+new clients that keeps the bucket dict at its size cap (the eviction path),
+then the whole @rate_limit decorator around a trivial view, measured as the
+difference from the same view undecorated inside a request context.
+
+Usage:
+    python -m benchmarks.bench_ratelimit [--iterations N]
+"""
+
+import argparse
+import timeit
+
+import app as mindbridge
+from ratelimit import RateLimiter
+
+
+def time_hit(limiter, keys, iterations):
+    """Average seconds per hit() cycling through keys."""
+    count = len(keys)
+    counter = iter(range(iterations))
+
+    def run():
+        limiter.hit(keys[next(counter) % count])
+
+    return timeit.timeit(run, number=iterations) / iterations
+
+
+def time_decorator(iterations):
+    """Per-request overhead of @rate_limit on a view that does nothing."""
+    flask_app = mindbridge.create_app({
+        'RATE_LIMITS': {'auth': {'requests': 10 ** 9, 'period': 1, 'key': 'ip'}}
+    })
+    view = lambda: 'ok'
+    limited = mindbridge.rate_limit('auth')(view)
+
+    with flask_app.test_request_context('/', method='POST',
+                                        environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        plain = timeit.timeit(view, number=iterations) / iterations
+        wrapped = timeit.timeit(limited, number=iterations) / iterations
+    return wrapped - plain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    hot = RateLimiter(rate=10 ** 9, burst=10 ** 9)
+    churn = RateLimiter(rate=1, burst=10, max_keys=10000)
+    churn_keys = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(100000)]
+
+    print(f"{'case':<36} {'per call':>10}")
+    print(f"{'hit(), one hot client':<36} {time_hit(hot, ['10.0.0.1'], args.iterations) * 1e6:>8.2f}us")
+    print(f"{'hit(), 100k clients, 10k cap':<36} "
+          f"{time_hit(churn, churn_keys, args.iterations) * 1e6:>8.2f}us")
+    print(f"{'@rate_limit overhead per request':<36} {time_decorator(args.iterations) * 1e6:>8.2f}us")
+
+
+if __name__ == '__main__':
+    main()
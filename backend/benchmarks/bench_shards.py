@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Sharded storage write throughput benchmark
+
+Runs --processes writer processes, each posting check-ins for random users
+through the Flask test client for --duration seconds, against a fresh
+database with each DB_SHARDS value in turn (0 is a single database file).
+SQLite allows one writer per file, so with one file every commit waits
+for the others; with shards, only commits for users on the same shard do.
+
+Reports check-ins written per second and per-request latency; time spent
+waiting for another process's write lock shows up in the p99.
+
+Usage:
+    python -m benchmarks.bench_shards [--shards 0 2 4 8] [--processes N]
+        [--duration SECONDS] [--profile safe|fast]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_asgi import percentile
+
+
+def writer(database, shards, profile, duration, seed, results):
+    """Post check-ins until the deadline; reports (count, latencies)."""
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+
+    flask_app = create_app({'DATABASE': database, 'DB_SHARDS': shards, 'DB_PROFILE': profile,
+                            'RATE_LIMITS': {}, 'LOG_LEVEL': 'WARNING'})
+    rng = random.Random(seed)
+    with flask_app.app_context():
+        tokens = [create_access_token(identity=str(user_id)) for user_id in range(1, 201)]
+    client = flask_app.test_client()
+
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        token = rng.choice(tokens)
+        started = time.perf_counter()
+        response = client.post('/api/checkin', json={'mood': 'Happy', 'stress_level': 5},
+                               headers={'Authorization': f'Bearer {token}'})
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+    results.put((len(latencies), latencies))
+
+
+def run(shards, processes, duration, profile):
+    """Check-ins per second and latency percentiles for one shard count."""
+    from app import create_app, ensure_db
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, 'bench.db')
+        # Create every schema up front so writers only race on check-ins
+        ensure_db(create_app({'DATABASE': database, 'DB_SHARDS': shards,
+                              'LOG_LEVEL': 'WARNING'}))
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        workers = [context.Process(target=writer,
+                                   args=(database, shards, profile, duration, seed, results))
+                   for seed in range(processes)]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    latencies = sorted(value for _, values in collected for value in values)
+    return {
+        'rate': sum(count for count, _ in collected) / duration,
+        'p50': statistics.median(latencies) if latencies else float('nan'),
+        'p99': percentile(latencies, 0.99) if latencies else float('nan')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 2, 4, 8])
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--profile', choices=['safe', 'fast'], default='safe')
+    args = parser.parse_args()
+
+    print(f"{'shards':>6} {'check-ins/s':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for shards in args.shards:
+        result = run(shards, args.processes, args.duration, args.profile)
+        print(f"{shards:>6} {result['rate']:>12.0f} {result['p50'] * 1000:>8.2f} "
+              f"{result['p99'] * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
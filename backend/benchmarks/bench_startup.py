@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark
+
+Measures how long a fresh worker takes to serve its first requests, in
+three setups, each repeated in new processes:
+
+    eager    a new interpreter that imports numpy up front, as app.py did
+             before the factory refactor
+    lazy     a new interpreter importing app.py as it is now; numpy is
+             imported by the first DASS-21 submission instead
+    forked   a worker forked from a master that already imported app.py,
+             ran ensure_db() and warm_up(), as gunicorn.conf.py does
+
+For each it reports the time to import app.py, to run create_app(), to
+answer the first GET /api/health (including the schema check and pool
+creation) and the first POST /api/dass21/submit, plus the worker's private
+memory afterwards (Linux only), which is what each extra worker costs.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N]
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DASS_ANSWERS = {str(i): i % 4 for i in range(1, 22)}
+COLUMNS = ('import', 'create_app', 'first_request', 'first_dass')
+
+
+def private_memory_mb():
+    """Private (unshared) resident memory of this process, or None off Linux."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if line.startswith('Private_'))
+    except OSError:
+        return None
+    return sum(int(value.split()[0]) for value in fields.values()) / 1024
+
+
+def serve_first_requests(flask_app):
+    """Time the first health check and the first DASS-21 submission."""
+    from flask_jwt_extended import create_access_token
+
+    timings = {}
+    client = flask_app.test_client()
+    started = time.perf_counter()
+    response = client.get('/api/health')
+    timings['first_request'] = time.perf_counter() - started
+    assert response.status_code == 200, response.data
+
+    with flask_app.app_context():
+        token = create_access_token(identity='1')
+    started = time.perf_counter()
+    response = client.post('/api/dass21/submit', json={'answers': DASS_ANSWERS},
+                           headers={'Authorization': f'Bearer {token}'})
+    timings['first_dass'] = time.perf_counter() - started
+    assert response.status_code == 200, response.data
+    return timings
+
+
+def run_cold(database, eager):
+    """One fresh interpreter: import, build the app, serve the first requests."""
+    started = time.perf_counter()
+    if eager:
+        import dass  # noqa: F401
+    import app as mindbridge
+    timings = {'import': time.perf_counter() - started}
+
+    started = time.perf_counter()
+    flask_app = mindbridge.create_app({'DATABASE': database, 'LOG_LEVEL': 'WARNING'})
+    timings['create_app'] = time.perf_counter() - started
+
+    timings.update(serve_first_requests(flask_app))
+    timings['private_mb'] = private_memory_mb()
+    return [timings]
+
+
+def run_forked(database, runs):
+    """Preload like a gunicorn master, then fork one worker per run."""
+    import app as mindbridge
+
+    flask_app = mindbridge.create_app({'DATABASE': database, 'LOG_LEVEL': 'WARNING'})
+    mindbridge.ensure_db(flask_app)
+    mindbridge.warm_up()
+    gc.collect()
+    gc.freeze()
+
+    results = []
+    for _ in range(runs):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            timings = {'import': 0.0, 'create_app': 0.0}
+            timings.update(serve_first_requests(flask_app))
+            timings['private_mb'] = private_memory_mb()
+            os.write(write_fd, json.dumps(timings).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            results.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+def run_child(mode, runs):
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, 'bench.db')
+        if mode == 'forked':
+            results = run_forked(database, runs)
+        else:
+            results = run_cold(database, eager=mode == 'eager')
+    print(json.dumps(results))
+
+
+def measure(mode, runs):
+    """Collect `runs` timings for a mode, each cold run in a new interpreter."""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, MINDBRIDGE_LOG_LEVEL='WARNING')
+
+    def child(*args):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode, *args],
+            cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    if mode == 'forked':
+        return child('--runs', str(runs))
+    return [timings for _ in range(runs) for timings in child()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--child', choices=['eager', 'lazy', 'forked'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.runs)
+        return
+
+    print(f"{'mode':<8} " + ' '.join(f'{name + " ms":>16}' for name in COLUMNS)
+          + f" {'total ms':>10} {'private MB':>11}")
+    for mode in ('eager', 'lazy', 'forked'):
+        results = measure(mode, args.runs)
+        medians = {name: statistics.median(r[name] for r in results) * 1000 for name in COLUMNS}
+        memory = [r['private_mb'] for r in results if r['private_mb'] is not None]
+        print(f'{mode:<8} ' + ' '.join(f'{medians[name]:>16.1f}' for name in COLUMNS)
+              + f' {sum(medians.values()):>10.1f}'
+              + f' {statistics.median(memory) if memory else float("nan"):>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
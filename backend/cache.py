@@ -0,0 +1,234 @@
+"""
+MindBridge Cache - small caches for computed API responses and hot rows
+A thread-safe LRU with an optional time-to-live, plus a SQLite-file tier that several worker processes can share.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A bounded mapping that evicts the least recently used entry when full.
+
+    Entries older than ttl seconds are treated as missing. All operations
+    take one lock and are O(1); the cache is meant for values that are
+    expensive to compute but cheap to keep, such as serialized responses.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, clock=time.monotonic):
+        """
+        Args:
+            max_size (int): Maximum number of entries kept
+            ttl (float): Seconds an entry stays valid, or None for no expiry
+            clock (callable): Monotonic time source, replaceable in tests
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """
+        Store value under key, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl (float): Seconds this entry stays valid, capped at the cache's ttl
+        """
+        if ttl is None or (self.ttl is not None and self.ttl < ttl):
+            ttl = self.ttl
+        expires = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        """Drop key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return a snapshot of entry count, hits, misses and evictions."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions
+            }
+
+
+class SQLiteCache:
+    """
+    A key/value cache in a SQLite file, shared by every process that opens it.
+
+    Stands in for Redis or memcached in multi-worker deployments: each
+    gunicorn worker keeps its own LRUCache in front, and a miss there falls
+    through to this file before reaching the main database. Values must be
+    JSON-serializable. Expired rows are ignored on read and purged every
+    purge_interval writes.
+    """
+
+    def __init__(self, path, ttl=60.0, purge_interval=1000, clock=time.time):
+        """
+        Args:
+            path (str): SQLite file holding the cache table
+            ttl (float): Seconds an entry stays valid
+            purge_interval (int): Writes between deletions of expired rows
+            clock (callable): Wall-clock time source (shared across processes)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = OFF')  # losing the cache is harmless
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND expires > ?',
+                (key, self._clock())
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def set(self, key, value):
+        """Store value under key for ttl seconds."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                (key, json.dumps(value), self._clock() + self.ttl)
+            )
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._conn.execute('DELETE FROM cache WHERE expires <= ?', (self._clock(),))
+
+    def delete(self, key):
+        """Drop key if present."""
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM cache')
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    An in-process LRUCache, optionally backed by a shared cache.
+
+    Reads try the local tier, then the shared one (copying hits into the
+    local tier), and count where each lookup was answered. Writes and
+    deletes go to both tiers. A delete in one process only clears the
+    shared tier and its own local tier, so the local TTL bounds how long
+    other processes can serve a stale value.
+    """
+
+    def __init__(self, local, shared=None):
+        """
+        Args:
+            local (LRUCache): Per-process tier
+            shared (SQLiteCache): Cross-process tier, or None
+        """
+        self.local = local
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._hits = {'local': 0, 'shared': 0}
+        self._misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if neither tier has it."""
+        value = self.local.get(key)
+        tier = 'local'
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            tier = 'shared'
+            if value is not None:
+                self.local.set(key, value)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits[tier] += 1
+        return default if value is None else value
+
+    def set(self, key, value):
+        """Store value in every tier."""
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def delete(self, key):
+        """Drop key from every tier."""
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def close(self):
+        """Release the shared tier's resources."""
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self):
+        """Return hits per tier, misses and the local tier's size and evictions."""
+        local = self.local.stats()
+        with self._lock:
+            return {
+                'hits': dict(self._hits),
+                'misses': self._misses,
+                'size': local['size'],
+                'evictions': local['evictions']
+            }
@@ -0,0 +1,142 @@
+"""
+MindBridge DASS-21 - vectorized scoring and severity classification
+Scores one or many DASS-21 submissions as NumPy matrix operations so the API and batch re-scoring share one code path.
+"""
+
+import numpy as np
+
+ITEM_COUNT = 21
+MAX_ANSWER = 3
+
+# Subscale columns, in the order used by every score/level array
+SUBSCALES = ('d', 'a', 's')
+SUBSCALE_NAMES = ('Depression', 'Anxiety', 'Stress')
+
+# Subscale column of each item, item 1 first
+ITEM_SUBSCALES = np.array([
+    2, 1, 0, 1, 0, 2, 1,
+    2, 1, 0, 2, 2, 0, 2,
+    1, 0, 0, 2, 1, 1, 0
+], dtype=np.intp)
+
+# INDICATOR[item, subscale] is 1 if the item counts towards that subscale
+INDICATOR = np.zeros((ITEM_COUNT, len(SUBSCALES)), dtype=np.int32)
+INDICATOR[np.arange(ITEM_COUNT), ITEM_SUBSCALES] = 1
+
+SEVERITY_LEVELS = np.array(['Normal', 'Mild', 'Moderate', 'Severe', 'Extremely Severe'])
+
+# Lowest (doubled) score for Mild, Moderate, Severe and Extremely Severe,
+# one row per subscale in SUBSCALES order
+SEVERITY_THRESHOLDS = np.array([
+    [10, 14, 21, 28],
+    [8, 10, 15, 20],
+    [15, 19, 26, 34]
+])
+
+
+def parse_answers(submissions):
+    """
+    Convert answer dicts into an answer matrix.
+
+    Args:
+        submissions (list): Dicts mapping item number ("1".."21") to an answer 0-3
+
+    Returns:
+        numpy.ndarray: uint8 array of shape (len(submissions), 21)
+
+    Raises:
+        ValueError: If a submission is missing items, has extra items, or has
+            answers that aren't integers from 0 to 3 (floats, bools and
+            numeric strings included)
+    """
+    matrix = np.empty((len(submissions), ITEM_COUNT), dtype=np.uint8)
+    for row, answers in enumerate(submissions):
+        if not isinstance(answers, dict) or len(answers) != ITEM_COUNT:
+            raise ValueError('Invalid or incomplete answers')
+        try:
+            values = [answers[str(item)] for item in range(1, ITEM_COUNT + 1)]
+        except KeyError:
+            raise ValueError('Invalid or incomplete answers')
+        # No coercion: int() would truncate 1.7 to 1 and accept True and "2"
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            raise ValueError(f'Answers must be integers between 0 and {MAX_ANSWER}')
+        if min(values) < 0 or max(values) > MAX_ANSWER:
+            raise ValueError(f'Answers must be between 0 and {MAX_ANSWER}')
+        matrix[row] = values
+    return matrix
+
+
+def answers_from_blobs(blobs):
+    """
+    Build an answer matrix from packed answer vectors (see pack_answers).
+
+    Args:
+        blobs (list): 21-byte answer vectors
+
+    Returns:
+        numpy.ndarray: uint8 array of shape (len(blobs), 21)
+    """
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(-1, ITEM_COUNT)
+
+
+def pack_answers(answers):
+    """Pack one row of an answer matrix into a compact 21-byte vector."""
+    return np.asarray(answers, dtype=np.uint8).tobytes()
+
+
+def score(answers):
+    """
+    Score an answer matrix.
+
+    Args:
+        answers (numpy.ndarray): Array of shape (n, 21)
+
+    Returns:
+        numpy.ndarray: int array of shape (n, 3) with the Depression, Anxiety
+            and Stress scores, already doubled as per DASS-21 scoring
+    """
+    return (np.asarray(answers, dtype=np.int32) @ INDICATOR) * 2
+
+
+def classify(scores):
+    """
+    Map scores to severity level indices.
+
+    Args:
+        scores (numpy.ndarray): Array of shape (n, 3) from score()
+
+    Returns:
+        numpy.ndarray: int array of shape (n, 3) indexing SEVERITY_LEVELS
+    """
+    scores = np.asarray(scores)
+    levels = np.empty(scores.shape, dtype=np.intp)
+    for column, thresholds in enumerate(SEVERITY_THRESHOLDS):
+        levels[:, column] = np.searchsorted(thresholds, scores[:, column], side='right')
+    return levels
+
+
+def score_submissions(submissions):
+    """
+    Score and classify many answer dicts at once.
+
+    Args:
+        submissions (list): Answer dicts as accepted by parse_answers()
+
+    Returns:
+        list: One dict per submission with 'scores' and 'severity', each
+            keyed by subscale name ("Depression", "Anxiety", "Stress")
+    """
+    return score_submissions_matrix(parse_answers(submissions))
+
+
+def score_submissions_matrix(answers):
+    """Like score_submissions(), for an answer matrix of shape (n, 21)."""
+    scores = score(answers)
+    labels = SEVERITY_LEVELS[classify(scores)]
+    return [
+        {
+            'scores': dict(zip(SUBSCALE_NAMES, row_scores.tolist())),
+            'severity': dict(zip(SUBSCALE_NAMES, row_labels.tolist()))
+        }
+        for row_scores, row_labels in zip(scores, labels)
+    ]
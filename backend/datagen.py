@@ -0,0 +1,180 @@
+"""
+MindBridge Data Generator - synthetic users, check-ins and DASS-21 results in bulk
+Fills an initialized database with production-scale data for index, pagination and aggregation work;
+the same seed always produces the same rows. Run it with `flask --app app generate-data`.
+"""
+
+import json
+
+import bcrypt
+import numpy as np
+
+import dass
+
+# Relaxed settings for loading into a database nothing else is using. Not
+# crash safe: an interrupted load can leave a corrupt file, so only point
+# this at a database you can regenerate.
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -262144,  # 256 MB
+    'temp_store': 'MEMORY'
+}
+
+DEFAULT_PASSWORD = 'mindbridge-demo'
+USER_CHUNK_SIZE = 1000  # Users generated and inserted per executemany round
+
+# Check-in moods from best to worst, as offered by the frontend
+MOODS = ['Very Happy', 'Happy', 'Neutral', 'Sad', 'Very Sad']
+NOTES = ['Slept well', 'Long day at work', 'Went for a walk', 'Exam tomorrow',
+         'Saw friends', 'Could not sleep', 'Busy but okay', 'Feeling better today']
+NOTE_PROBABILITY = 0.3
+
+# Time of day people check in: a morning and an evening peak, in hours
+CHECKIN_PEAKS = ((8.5, 1.5, 0.6), (21.0, 1.5, 0.4))  # (mean, stddev, share)
+
+SECONDS_PER_DAY = 86400
+
+
+def hash_fixture_password(password=DEFAULT_PASSWORD, rounds=12):
+    """
+    Hash the password every generated user shares.
+
+    bcrypt runs once per load instead of once per user. Use the app's
+    BCRYPT_ROUNDS so logging in as a generated user costs what it does in
+    production.
+    """
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+
+def format_timestamps(seconds):
+    """Format Unix timestamps the way SQLite's CURRENT_TIMESTAMP does."""
+    text = np.datetime_as_string(np.asarray(seconds, dtype='datetime64[s]'), unit='s')
+    return [value.replace('T', ' ') for value in text.tolist()]
+
+
+def checkin_timestamps(rng, signup, end, count):
+    """
+    Draw `count` check-in times per user between signup and end, oldest first.
+
+    Days are spread uniformly over each user's active period; times of day
+    follow CHECKIN_PEAKS.
+
+    Args:
+        rng (numpy.random.Generator): Random source
+        signup (numpy.ndarray): Signup time per user, Unix seconds
+        end (int): Latest possible check-in, Unix seconds
+        count (int): Check-ins per user
+
+    Returns:
+        numpy.ndarray: int64 array of shape (len(signup), count)
+    """
+    users = len(signup)
+    first_day = signup // SECONDS_PER_DAY
+    active_days = end // SECONDS_PER_DAY - first_day + 1
+    day = first_day[:, None] + (rng.random((users, count)) * active_days[:, None]).astype(np.int64)
+
+    means, stddevs, shares = (np.array(column) for column in zip(*CHECKIN_PEAKS))
+    peak = rng.choice(len(shares), size=(users, count), p=shares)
+    hour = np.clip(rng.normal(means[peak], stddevs[peak]), 0, 24 - 1 / 3600)
+
+    timestamps = day * SECONDS_PER_DAY + (hour * 3600).astype(np.int64)
+    timestamps = np.clip(timestamps, signup[:, None], end)
+    timestamps.sort(axis=1)
+    return timestamps
+
+
+def generate(conn, users, checkins_per_user, dass_per_user, password_hash, end, seed=0,
+             days=365):
+    """
+    Insert synthetic users with their check-ins and DASS-21 results.
+
+    Everything is written in one transaction with executemany, one chunk
+    of USER_CHUNK_SIZE users at a time, in (user_id, timestamp) order so
+    index updates stay append-like. Each user has a stress baseline that
+    their check-in stress levels and moods, and their DASS-21 answers, vary
+    around. checkin_daily_agg is filled for the new users at the end.
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database set up by init_db()
+        users (int): Users to create
+        checkins_per_user (int): Check-ins per user
+        dass_per_user (int): DASS-21 submissions per user
+        password_hash (bytes): From hash_fixture_password(), shared by every user
+        end (int): Unix time of the newest generated row
+        seed (int): Random seed; the same arguments always produce the same rows
+        days (int): Users sign up uniformly over the `days` days before end
+
+    Returns:
+        dict: Rows inserted per table
+    """
+    rng = np.random.default_rng(seed)
+    conn.execute('BEGIN')
+    first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM users').fetchone()[0]
+
+    for start in range(0, users, USER_CHUNK_SIZE):
+        ids = np.arange(first_id + start, first_id + min(start + USER_CHUNK_SIZE, users))
+        count = len(ids)
+        signup = end - (rng.random(count) * days * SECONDS_PER_DAY).astype(np.int64)
+        baseline = np.clip(rng.normal(5.0, 1.5, count), 1, 10)
+
+        conn.executemany(
+            'INSERT INTO users (id, username, email, password_hash, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            zip(ids.tolist(), [f'user{i}' for i in ids.tolist()],
+                [f'user{i}@example.com' for i in ids.tolist()],
+                [password_hash] * count, format_timestamps(signup))
+        )
+
+        if checkins_per_user:
+            timestamps = checkin_timestamps(rng, signup, end, checkins_per_user)
+            stress = np.clip(np.rint(baseline[:, None]
+                                     + rng.normal(0, 2, timestamps.shape)), 1, 10).astype(int)
+            # Mood follows stress, with some days better or worse than that
+            mood = np.clip((stress - 1) * len(MOODS) // 10
+                           + rng.integers(-1, 2, timestamps.shape), 0, len(MOODS) - 1)
+            has_note = rng.random(timestamps.shape) < NOTE_PROBABILITY
+            note = rng.integers(0, len(NOTES), timestamps.shape)
+            conn.executemany(
+                'INSERT INTO checkins (user_id, mood, stress_level, notes, timestamp) '
+                'VALUES (?, ?, ?, ?, ?)',
+                zip(np.repeat(ids, checkins_per_user).tolist(),
+                    [MOODS[m] for m in mood.ravel().tolist()],
+                    stress.ravel().tolist(),
+                    [NOTES[n] if flag else '' for n, flag in
+                     zip(note.ravel().tolist(), has_note.ravel().tolist())],
+                    format_timestamps(timestamps.ravel()))
+            )
+
+        if dass_per_user:
+            created = checkin_timestamps(rng, signup, end, dass_per_user)
+            # Chance of a higher answer tracks the user's stress baseline
+            tendency = np.clip(baseline / 10 + rng.normal(0, 0.1, count), 0.02, 0.98)
+            answers = rng.binomial(dass.MAX_ANSWER, np.repeat(tendency, dass_per_user)[:, None],
+                                   (count * dass_per_user, dass.ITEM_COUNT)).astype(np.uint8)
+            scores = dass.score(answers).tolist()
+            conn.executemany(
+                'INSERT INTO dass_assessments '
+                '(user_id, scores, depression, anxiety, stress, answers, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                zip(np.repeat(ids, dass_per_user).tolist(),
+                    [json.dumps(dict(zip(dass.SUBSCALES, row))) for row in scores],
+                    *zip(*scores),
+                    [dass.pack_answers(row) for row in answers],
+                    format_timestamps(created.ravel()))
+            )
+
+    # Same totals rebuild_checkin_daily_agg computes, for the new users only
+    conn.execute('''
+        INSERT INTO checkin_daily_agg (user_id, day, mood, checkin_count, stress_sum)
+        SELECT user_id, date(timestamp), mood, COUNT(*), SUM(stress_level)
+        FROM checkins
+        WHERE user_id >= ?
+        GROUP BY user_id, date(timestamp), mood
+    ''', (first_id,))
+    conn.commit()
+    return {
+        'users': users,
+        'checkins': users * checkins_per_user,
+        'dass_assessments': users * dass_per_user
+    }
@@ -0,0 +1,684 @@
+"""
+MindBridge Database - pooled SQLite connections for the Flask API
+Keeps a bounded set of open connections so requests don't pay for connect/close and schema parsing,
+applies a WAL-based PRAGMA profile to every connection, and runs versioned schema migrations.
+Optionally spreads per-user tables over several shard files, each with its own pool and its own writer.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Durability/performance profiles, selected with app.config['DB_PROFILE'].
+# Both use WAL so readers never block behind a writer; "safe" still fsyncs on
+# every commit, "fast" only at checkpoints (a power loss may drop the last
+# few commits but never corrupts the database).
+PRAGMA_PROFILES = {
+    'safe': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,  # negative means KiB, so 8 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT'
+    },
+    'fast': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,  # 64 MB
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY'
+    }
+}
+
+# Rows per UPDATE batch when backfilling typed DASS-21 score columns
+DASS_BACKFILL_CHUNK_SIZE = 1000
+
+# Tables whose rows belong to one user and live on that user's shard, with
+# the columns copied when a user moves (ids are reassigned by the target).
+# checkin_daily_agg also lives on the shard, but is recomputed rather than copied.
+SHARDED_TABLES = {
+    'checkins': ('user_id', 'mood', 'stress_level', 'notes', 'timestamp', 'idempotency_key'),
+    'dass_assessments': ('user_id', 'scores', 'created_at', 'depression', 'anxiety', 'stress',
+                         'answers')
+}
+
+# Users moved per pair of transactions by rebalance_shards()
+REBALANCE_CHUNK_SIZE = 500
+
+
+def resolve_pragmas(profile, overrides=None):
+    """
+    Build the PRAGMA set for a named profile.
+
+    Args:
+        profile (str): Key into PRAGMA_PROFILES
+        overrides (dict): Individual PRAGMAs that replace the profile's values
+
+    Returns:
+        dict: PRAGMA name -> value, in the order they should be applied
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(
+            f"Unknown database profile '{profile}', expected one of {sorted(PRAGMA_PROFILES)}"
+        )
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    pragmas.update(overrides or {})
+    return pragmas
+
+
+def apply_pragmas(conn, pragmas):
+    """Run each PRAGMA on the connection, in order."""
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def rebuild_checkin_daily_agg(conn):
+    """
+    Recompute checkin_daily_agg from the raw checkins table.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    conn.execute('DELETE FROM checkin_daily_agg')
+    conn.execute('''
+        INSERT INTO checkin_daily_agg (user_id, day, mood, checkin_count, stress_sum)
+        SELECT user_id, date(timestamp), mood, COUNT(*), SUM(stress_level)
+        FROM checkins
+        GROUP BY user_id, date(timestamp), mood
+    ''')
+
+
+def rebuild_user_checkin_daily_agg(conn, schema, user_ids):
+    """
+    Recompute checkin_daily_agg for some users in one attached database.
+
+    Runs inside the caller's transaction; the caller commits.
+
+    Args:
+        conn (sqlite3.Connection): Connection the database is attached to
+        schema (str): Its schema name, e.g. 'main'
+        user_ids (list): Users whose totals to recompute
+    """
+    placeholders = ','.join('?' * len(user_ids))
+    conn.execute(f'DELETE FROM {schema}.checkin_daily_agg WHERE user_id IN ({placeholders})',
+                 user_ids)
+    conn.execute(f'''
+        INSERT INTO {schema}.checkin_daily_agg (user_id, day, mood, checkin_count, stress_sum)
+        SELECT user_id, date(timestamp), mood, COUNT(*), SUM(stress_level)
+        FROM {schema}.checkins
+        WHERE user_id IN ({placeholders})
+        GROUP BY user_id, date(timestamp), mood
+    ''', user_ids)
+
+
+def backfill_dass_score_columns(conn, chunk_size=DASS_BACKFILL_CHUNK_SIZE):
+    """
+    Copy legacy JSON DASS-21 scores into the typed score columns.
+
+    Walks dass_assessments in id order and commits every chunk_size rows in
+    a short transaction of its own, so memory stays flat and other
+    connections can write between chunks however many assessments exist.
+    Rows already backfilled are skipped, so an interrupted run resumes.
+    Must not be called inside an open transaction.
+
+    Returns:
+        int: Number of rows backfilled
+    """
+    last_id = 0
+    total = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Served by idx_dass_assessments_unscored, which only holds these rows
+            rows = conn.execute('''
+                SELECT id, scores FROM dass_assessments
+                WHERE id > ? AND depression IS NULL
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, chunk_size)).fetchall()
+            updates = []
+            for row_id, scores in rows:
+                scores = json.loads(scores)
+                updates.append((scores['d'], scores['a'], scores['s'], row_id))
+            conn.executemany(
+                'UPDATE dass_assessments SET depression = ?, anxiety = ?, stress = ? WHERE id = ?',
+                updates
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if not rows:
+            return total
+        last_id = rows[-1][0]
+        total += len(rows)
+
+
+# Schema migrations applied by migrate(), tracked with PRAGMA user_version.
+# Entry N (1-based) brings the database to version N. Each entry is a list of
+# SQL statements or callables taking the connection. Never edit or reorder a
+# released entry; append a new one instead.
+MIGRATIONS = [
+    # 1: check-in history by user, newest first (matches get_checkins ORDER BY)
+    [
+        '''CREATE INDEX IF NOT EXISTS idx_checkins_user_timestamp
+           ON checkins (user_id, timestamp DESC, id DESC)'''
+    ],
+    # 2: DASS-21 history by user
+    [
+        '''CREATE INDEX IF NOT EXISTS idx_dass_assessments_user_created
+           ON dass_assessments (user_id, created_at)'''
+    ],
+    # 3: client idempotency keys for batch check-in replay
+    [
+        'ALTER TABLE checkins ADD COLUMN idempotency_key TEXT',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_checkins_user_idempotency_key
+           ON checkins (user_id, idempotency_key)
+           WHERE idempotency_key IS NOT NULL'''
+    ],
+    # 4: per-user, per-day, per-mood check-in totals kept up to date on write
+    [
+        '''CREATE TABLE IF NOT EXISTS checkin_daily_agg (
+               user_id INTEGER NOT NULL,
+               day DATE NOT NULL,
+               mood TEXT NOT NULL,
+               checkin_count INTEGER NOT NULL,
+               stress_sum INTEGER NOT NULL,
+               PRIMARY KEY (user_id, day, mood)
+           ) WITHOUT ROWID''',
+        rebuild_checkin_daily_agg
+    ],
+    # 5: typed DASS-21 scores and the packed answer vector (see dass.pack_answers);
+    # history lookups keep using idx_dass_assessments_user_created from 2. Legacy
+    # rows are filled in by backfill_dass_score_columns (see BACKFILLS), not
+    # here, so the copy doesn't hold the write lock for the whole table
+    [
+        'ALTER TABLE dass_assessments ADD COLUMN depression INTEGER',
+        'ALTER TABLE dass_assessments ADD COLUMN anxiety INTEGER',
+        'ALTER TABLE dass_assessments ADD COLUMN stress INTEGER',
+        'ALTER TABLE dass_assessments ADD COLUMN answers BLOB'
+    ],
+    # 6: revoked JWT ids (see tokens.RevocationStore). AUTOINCREMENT so ids are
+    # never reused after a purge; workers sync by reading ids above the last seen
+    [
+        '''CREATE TABLE IF NOT EXISTS revoked_tokens (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               jti BLOB NOT NULL UNIQUE,
+               user_id INTEGER NOT NULL,
+               expires_at INTEGER
+           )''',
+        '''CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at
+           ON revoked_tokens (expires_at)'''
+    ],
+    # 7: source rows rebalance_shards() has copied into this database but not
+    # yet deleted from their source, so an interrupted move never copies twice
+    [
+        '''CREATE TABLE IF NOT EXISTS rebalance_journal (
+               source TEXT NOT NULL,
+               table_name TEXT NOT NULL,
+               source_id INTEGER NOT NULL,
+               user_id INTEGER NOT NULL,
+               PRIMARY KEY (source, table_name, source_id)
+           ) WITHOUT ROWID'''
+    ],
+    # 8: assessments still waiting for backfill_dass_score_columns; empty once
+    # it has run, so checking for work on every start is one index seek
+    [
+        '''CREATE INDEX IF NOT EXISTS idx_dass_assessments_unscored
+           ON dass_assessments (id) WHERE depression IS NULL'''
+    ]
+]
+
+# Data copies run by migrate() after the schema is current, as
+# (schema version they need, callable taking the connection). Each commits
+# in chunks of its own and skips work already done, so it is safe to run on
+# every start and to interrupt.
+BACKFILLS = [
+    (5, backfill_dass_score_columns)
+]
+
+
+def get_schema_version(conn):
+    """Return the database's PRAGMA user_version."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, migrations=None):
+    """
+    Bring the schema up to date by applying pending migrations.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction together with
+    the user_version bump, so a failed step leaves the database at the last
+    good version, and concurrent workers starting up apply it only once.
+    BACKFILLS then run outside those transactions.
+
+    Args:
+        conn (sqlite3.Connection): Connection to migrate
+        migrations (list): Migrations to apply, defaults to MIGRATIONS
+
+    Returns:
+        int: The schema version after migrating
+    """
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    for version, steps in enumerate(migrations, start=1):
+        if get_schema_version(conn) >= version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have migrated while we waited for the lock
+            if get_schema_version(conn) < version:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    version = get_schema_version(conn)
+    for required, backfill in BACKFILLS:
+        if version >= required:
+            backfill(conn)
+    return version
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor that reports how long each execute and fetch call took.
+
+    Durations go to the owning TimedConnection's query_observer as
+    (operation, seconds), with operation 'execute', 'executemany' or
+    'fetch'. A SELECT does most of its work while rows are fetched, so
+    fetches are timed too.
+    """
+
+    def _timed(self, operation, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            self.connection.query_observer(operation, time.perf_counter() - started)
+
+    def execute(self, sql, parameters=()):
+        return self._timed('execute', sqlite3.Cursor.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed('executemany', sqlite3.Cursor.executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._timed('fetch', sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        return self._timed('fetch', sqlite3.Cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed('fetch', sqlite3.Cursor.fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute's) are TimedCursors."""
+
+    query_observer = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute doesn't go through cursor(), so route it there
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of SQLite connections.
+
+    Idle connections are handed out most-recently-used first so a busy worker
+    keeps reusing the same warm connection. A connection is only ever used by
+    one thread at a time, so connections are opened with check_same_thread=False
+    and may move between threads as requests are served.
+    """
+
+    def __init__(self, database, max_size=5, timeout=5.0, pragmas=None,
+                 health_check_interval=30.0, query_observer=None):
+        """
+        Args:
+            database (str): Path to the SQLite database file
+            max_size (int): Maximum number of open connections
+            timeout (float): Seconds to wait for a free connection before giving up
+            pragmas (dict): PRAGMA name -> value applied to every new connection
+            health_check_interval (float): Idle seconds after which a connection
+                is pinged before being handed out again
+            query_observer (callable): If given, connections time their queries
+                and call query_observer(operation, seconds) (see TimedCursor)
+        """
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self.health_check_interval = health_check_interval
+        self.query_observer = query_observer
+
+        self._idle = []  # list of (connection, released_at)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+    def _connect(self):
+        """Open a new connection and apply the configured PRAGMAs."""
+        if self.query_observer is not None:
+            conn = sqlite3.connect(self.database, check_same_thread=False,
+                                   factory=TimedConnection)
+            conn.query_observer = self.query_observer
+        else:
+            conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _is_healthy(self, conn):
+        """Return True if the connection still answers a trivial query."""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """
+        Take a connection from the pool, opening a new one if there is room.
+
+        Returns:
+            sqlite3.Connection: A connection reserved for the caller
+
+        Raises:
+            PoolExhaustedError: If the pool is full and nothing is released in time
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolExhaustedError('Connection pool is closed')
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, released_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f'No database connection available after {self.timeout}s'
+                    )
+                self._cond.wait(remaining)
+
+        # Connect and ping outside the lock so other threads aren't held up
+        try:
+            if conn is not None:
+                idle_for = time.monotonic() - released_at
+                if idle_for < self.health_check_interval or self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+                with self._cond:
+                    self._size += 1
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """
+        Return a connection to the pool.
+
+        Any transaction the caller left open (e.g. because a statement raised
+        before commit) is rolled back so the next user starts clean.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            with self._cond:
+                self._cond.notify()
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        """Close a broken connection and free its slot."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+
+    def close(self):
+        """Close every idle connection; busy ones are closed as they are released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self):
+        """Return a snapshot of pool usage."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size
+            }
+
+
+def shard_for(user_id, shards):
+    """
+    Pick the shard (0 to shards - 1) holding a user's rows.
+
+    Jump consistent hashing (Lamping and Veach) over a blake2b hash of the
+    user id: users spread evenly, and going from N to N + 1 shards only moves
+    the 1 / (N + 1) of users that land on the new shard.
+    """
+    key = int.from_bytes(hashlib.blake2b(str(user_id).encode('ascii'), digest_size=8).digest(),
+                         'little')
+    bucket, jump = -1, 0
+    while jump < shards:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_path(database, index):
+    """Path of shard `index` next to the directory database, e.g. mindbridge.shard0.db."""
+    root, ext = os.path.splitext(database)
+    return f'{root}.shard{index}{ext}'
+
+
+def existing_shard_paths(database):
+    """Shard files that exist next to the directory database, in index order."""
+    paths = []
+    while os.path.exists(shard_path(database, len(paths))):
+        paths.append(shard_path(database, len(paths)))
+    return paths
+
+
+class ShardedConnectionPool:
+    """
+    One ConnectionPool per shard file, picked by user id.
+
+    Each shard is its own SQLite database with its own write lock, so writes
+    for users on different shards don't wait for each other.
+    """
+
+    def __init__(self, databases, **pool_kwargs):
+        """
+        Args:
+            databases (list): Shard database paths, in shard order
+            **pool_kwargs: Passed to every ConnectionPool
+        """
+        self.databases = list(databases)
+        self.pools = [ConnectionPool(database, **pool_kwargs) for database in self.databases]
+
+    def pool_for(self, user_id):
+        """The pool for the shard holding a user's rows."""
+        return self.pools[shard_for(user_id, len(self.pools))]
+
+    def close(self):
+        """Close every shard's pool."""
+        for pool in self.pools:
+            pool.close()
+
+    def stats(self):
+        """Return a snapshot of each shard pool's usage, in shard order."""
+        return [pool.stats() for pool in self.pools]
+
+
+def rebalance_shards(sources, target_for, pragmas=None, chunk_size=REBALANCE_CHUNK_SIZE):
+    """
+    Move each user's SHARDED_TABLES rows to the database target_for() names.
+
+    Every source is scanned for users whose rows don't belong there, so this
+    works after changing the shard count in either direction, and for moving
+    between a single database and shards. Rows already in the target, e.g.
+    written by the API after a restart with the new DB_SHARDS, are kept.
+
+    For each chunk of users, rows not yet copied are inserted into the
+    target together with their source ids in its rebalance_journal, in one
+    transaction. Then exactly the journaled rows are deleted from the source,
+    and finally the journal entries, in transactions of their own. A run
+    interrupted at any point can be repeated: journaled rows are never
+    copied again, and rows written to the source meanwhile are left for the
+    next run rather than deleted. checkin_daily_agg is recomputed for the
+    moved users on both sides. Moved rows get new ids in the target.
+
+    Args:
+        sources (list): Database paths that may hold user rows
+        target_for (callable): user_id -> database path the user's rows belong in
+        pragmas (dict): PRAGMAs for every connection opened
+        chunk_size (int): Users moved per round of transactions
+
+    Returns:
+        dict: Users and rows moved
+    """
+    moved = {'users': 0, 'rows': 0}
+    for source in sources:
+        source = os.path.abspath(source)
+        conn = sqlite3.connect(source)
+        apply_pragmas(conn, pragmas or {})
+        user_ids = [row[0] for row in conn.execute(' UNION '.join(
+            f'SELECT user_id FROM {table}' for table in SHARDED_TABLES
+        ))]
+        conn.close()
+
+        moves = {}
+        for user_id in user_ids:
+            target = os.path.abspath(target_for(user_id))
+            if target != source:
+                moves.setdefault(target, []).append(user_id)
+
+        for target, ids in moves.items():
+            conn = sqlite3.connect(target)
+            try:
+                apply_pragmas(conn, pragmas or {})
+                conn.execute('ATTACH DATABASE ? AS source', (source,))
+                _forget_deleted_sources(conn, source)
+                for start in range(0, len(ids), chunk_size):
+                    chunk = ids[start:start + chunk_size]
+                    moved['rows'] += _move_chunk(conn, source, chunk)
+                    moved['users'] += len(chunk)
+            finally:
+                # Rolls back whatever an error interrupted
+                conn.close()
+    return moved
+
+
+def _forget_deleted_sources(conn, source):
+    """Drop journal entries whose source rows are gone (a crash after the source delete)."""
+    conn.execute('BEGIN IMMEDIATE')
+    for table in SHARDED_TABLES:
+        conn.execute(f'''
+            DELETE FROM main.rebalance_journal
+            WHERE source = ? AND table_name = ?
+              AND source_id NOT IN (SELECT id FROM source.{table})
+        ''', (source, table))
+    conn.commit()
+
+
+def _move_chunk(conn, source, user_ids):
+    """Copy, then delete from the source, one chunk of users' rows; returns rows copied."""
+    placeholders = ','.join('?' * len(user_ids))
+    copied = 0
+
+    conn.execute('BEGIN IMMEDIATE')
+    for table, columns in SHARDED_TABLES.items():
+        cursor = conn.execute(f'''
+            INSERT INTO main.{table} ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM source.{table} AS s
+            WHERE s.user_id IN ({placeholders})
+              AND NOT EXISTS (SELECT 1 FROM main.rebalance_journal AS j
+                              WHERE j.source = ? AND j.table_name = ? AND j.source_id = s.id)
+            ORDER BY s.id
+        ''', user_ids + [source, table])
+        copied += cursor.rowcount
+        conn.execute(f'''
+            INSERT OR IGNORE INTO main.rebalance_journal (source, table_name, source_id, user_id)
+            SELECT ?, ?, id, user_id FROM source.{table}
+            WHERE user_id IN ({placeholders})
+        ''', [source, table] + user_ids)
+    rebuild_user_checkin_daily_agg(conn, 'main', user_ids)
+    conn.commit()
+
+    # Separate files don't commit atomically under WAL, so the source delete
+    # and the journal cleanup are ordered: a crash between them leaves stale
+    # entries that _forget_deleted_sources() drops, never uncopied rows
+    conn.execute('BEGIN IMMEDIATE')
+    for table in SHARDED_TABLES:
+        conn.execute(f'''
+            DELETE FROM source.{table}
+            WHERE id IN (SELECT source_id FROM main.rebalance_journal
+                         WHERE source = ? AND table_name = ? AND user_id IN ({placeholders}))
+        ''', [source, table] + user_ids)
+    rebuild_user_checkin_daily_agg(conn, 'source', user_ids)
+    conn.commit()
+
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute(f'''
+        DELETE FROM main.rebalance_journal
+        WHERE source = ? AND user_id IN ({placeholders})
+    ''', [source] + user_ids)
+    conn.commit()
+    return copied
@@ -0,0 +1,35 @@
+"""
+MindBridge gunicorn configuration - preforking production server
+Loads the app once in the master and forks workers from it, so the imports, schema check and static
+content are paid for once and shared copy-on-write instead of repeated in every worker.
+
+Run with:
+    gunicorn -c gunicorn.conf.py
+"""
+
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'asgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker'
+bind = os.environ.get('MINDBRIDGE_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('MINDBRIDGE_WORKERS', multiprocessing.cpu_count()))
+
+# Load asgi:application (which builds the app and runs ensure_db) in the master.
+# Nothing at import opens a pooled connection or starts a thread: the SQLite
+# pool, bcrypt pool and log writer are created lazily in each worker, so
+# none of them is shared across fork().
+preload_app = True
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker is forked."""
+    from app import warm_up
+
+    warm_up()
+    # Move everything loaded so far out of the garbage collector's reach:
+    # otherwise the first collection in each worker writes to the GC headers
+    # of every inherited object and un-shares those pages
+    gc.collect()
+    gc.freeze()
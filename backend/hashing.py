@@ -0,0 +1,133 @@
+"""
+MindBridge Password Hashing - bcrypt work on a bounded worker pool
+Keeps slow bcrypt calls off the request threads and sheds load when too many are queued.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class HasherBusyError(Exception):
+    """Raised when the bcrypt queue is full and the request should be retried later."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated thread pool.
+
+    bcrypt releases the GIL while it works, so a small thread pool runs hashes
+    in parallel without a process pool's pickling and fork overhead, while
+    capping how many CPU cores bcrypt can take from the rest of the app.
+    At most max_workers + max_queue jobs are admitted; anything beyond that is
+    rejected immediately with HasherBusyError instead of waiting.
+    """
+
+    def __init__(self, rounds=12, max_workers=2, max_queue=16, timeout=10.0):
+        """
+        Args:
+            rounds (int): bcrypt cost factor used for new hashes
+            max_workers (int): Number of threads running bcrypt
+            max_queue (int): Jobs allowed to wait for a free worker
+            timeout (float): Seconds a caller waits for its result
+        """
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._work_seconds = 0.0
+
+    def hash(self, password):
+        """Hash a password for storing in the database."""
+        return self._submit(self._hash, password.encode('utf-8'))
+
+    def verify(self, password, hashed):
+        """Verify a password against its hash."""
+        return self._submit(bcrypt.checkpw, password.encode('utf-8'), hashed)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password, bcrypt.gensalt(self.rounds))
+
+    def _submit(self, func, *args):
+        """Run func on the pool and wait for its result, or reject if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusyError('Password hashing queue is full')
+
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self._executor.submit(self._run, time.perf_counter(), func, args)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        return future.result(self.timeout)
+
+    def _run(self, submitted_at, func, args):
+        """Worker-side wrapper that records queue wait and bcrypt time."""
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_seconds += started_at - submitted_at
+                self._work_seconds += finished_at - started_at
+            # Free the admission slot when the work is done, not when the
+            # caller stops waiting, so timed-out jobs still count against the limit
+            self._slots.release()
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads once queued jobs finish."""
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        """Return a snapshot of queue depth, throughput and latency totals."""
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'wait_seconds': self._wait_seconds,
+                'work_seconds': self._work_seconds
+            }
+
+    def collect(self):
+        """Return this hasher's metric families for the /metrics endpoint."""
+        stats = self.stats()
+        return [
+            ('mindbridge_bcrypt_queue_depth', 'gauge',
+             'bcrypt jobs waiting for a worker', stats['queued']),
+            ('mindbridge_bcrypt_running', 'gauge',
+             'bcrypt jobs currently running', stats['running']),
+            ('mindbridge_bcrypt_completed_total', 'counter',
+             'bcrypt jobs completed', stats['completed']),
+            ('mindbridge_bcrypt_rejected_total', 'counter',
+             'bcrypt jobs rejected because the queue was full', stats['rejected']),
+            ('mindbridge_bcrypt_wait_seconds_total', 'counter',
+             'Time bcrypt jobs spent queued', stats['wait_seconds']),
+            ('mindbridge_bcrypt_work_seconds_total', 'counter',
+             'Time spent running bcrypt', stats['work_seconds'])
+        ]
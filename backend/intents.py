@@ -0,0 +1,76 @@
+"""
+MindBridge Intents - keyword-based intent matching for the rule-based responses
+Compiles prioritized keyword groups once so chat, quiz and copilot matching is a single lookup per message.
+"""
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class IntentMatcher:
+    """
+    Finds the highest-priority intent whose keywords occur in a text.
+
+    Keywords match as plain substrings (so 'sad' matches 'saddened'), exactly
+    like the `any(word in text for word in [...])` chains this replaces.
+    Intents are given in priority order; when keywords from several intents
+    occur, the earliest intent wins regardless of where in the text they are.
+
+    The keywords are compiled into an Aho-Corasick automaton (pyahocorasick,
+    from requirements.txt) and the text is scanned once, in time linear in its
+    length however many keywords there are. If pyahocorasick can't be
+    imported they are flattened into one priority-ordered table checked with
+    `in`: correct, but one pass over the text per keyword, so no faster than
+    the chains it replaces on long messages.
+    """
+
+    def __init__(self, intents, backend='auto'):
+        """
+        Args:
+            intents (list): (name, keywords) pairs in priority order
+            backend (str): 'ahocorasick', 'table', or 'auto' for ahocorasick when importable
+        """
+        self.names = [name for name, _ in intents]
+        if backend == 'auto':
+            backend = 'ahocorasick' if ahocorasick is not None else 'table'
+        self.backend = backend
+
+        if backend == 'ahocorasick':
+            self._automaton = ahocorasick.Automaton()
+            for priority, (_, keywords) in enumerate(intents):
+                for keyword in keywords:
+                    # A keyword listed under two intents keeps the higher priority
+                    if not self._automaton.exists(keyword):
+                        self._automaton.add_word(keyword, priority)
+            self._automaton.make_automaton()
+        elif backend == 'table':
+            self._table = tuple(
+                (keyword, priority)
+                for priority, (_, keywords) in enumerate(intents)
+                for keyword in keywords
+            )
+        else:
+            raise ValueError(f"Unknown intent matcher backend '{backend}'")
+
+    def match(self, text):
+        """
+        Return the name of the highest-priority intent found in text, or None.
+
+        Args:
+            text (str): Text to search, already lowercased by the caller
+        """
+        if self.backend == 'table':
+            for keyword, priority in self._table:
+                if keyword in text:
+                    return self.names[priority]
+            return None
+
+        best = None
+        for _, priority in self._automaton.iter(text):
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.names[best] if best is not None else None
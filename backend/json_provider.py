@@ -0,0 +1,88 @@
+"""
+MindBridge JSON - Flask JSON provider backed by the fastest installed JSON library
+Uses orjson or ujson when available for request parsing and jsonify, and the standard library otherwise.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def available_backends():
+    """Return the JSON backends importable here, fastest first."""
+    backends = []
+    if orjson is not None:
+        backends.append('orjson')
+    if ujson is not None:
+        backends.append('ujson')
+    backends.append('json')
+    return backends
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    A drop-in replacement for Flask's DefaultJSONProvider.
+
+    Output matches the default provider apart from non-ASCII characters being
+    written as UTF-8 rather than \\u escapes. Calls that pass stdlib-specific
+    options (object_hook, cls, ...) and debug-mode pretty printing fall back
+    to the standard library.
+    """
+
+    def __init__(self, app, backend='auto'):
+        """
+        Args:
+            app (Flask): The application
+            backend (str): 'orjson', 'ujson', 'json', or 'auto' for the fastest installed
+        """
+        super().__init__(app)
+        if backend == 'auto':
+            backend = available_backends()[0]
+        if backend not in available_backends():
+            raise ValueError(
+                f"JSON backend '{backend}' is not available, expected one of {available_backends()}"
+            )
+        self.backend = backend
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a str or bytes."""
+        if kwargs or self.backend == 'json':
+            return json.loads(s, **kwargs)
+        if self.backend == 'orjson':
+            return orjson.loads(s)
+        return ujson.loads(s)
+
+    def _dumps_bytes(self, obj):
+        """Serialize compactly to UTF-8 bytes with the fast backend."""
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=self.default, option=option)
+        return ujson.dumps(obj, sort_keys=self.sort_keys, ensure_ascii=False,
+                           escape_forward_slashes=False, default=self.default).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as a JSON string."""
+        if kwargs or self.backend == 'json':
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response, skipping the str round trip on the fast path."""
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if pretty or self.backend == 'json':
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,235 @@
+"""
+MindBridge Logging - structured JSON logs written by a background thread
+Request threads only enqueue records; a QueueListener does the formatting I/O, with sampling for chatty
+debug events and redaction of answer payloads and other sensitive fields before anything leaves the request.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+LOGGER_NAME = 'mindbridge'
+
+# Field names whose values never reach a log line, at any nesting depth
+REDACTED_FIELDS = frozenset({
+    'answer', 'answers', 'notes', 'message', 'prompt', 'password', 'password_hash',
+    'scores', 'severity', 'access_token', 'refresh_token'
+})
+REDACTED = '[REDACTED]'
+
+_configure_lock = threading.Lock()
+
+
+def redact(value):
+    """Return a copy of value with every REDACTED_FIELDS entry masked."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACTED_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def log_event(logger, level, event, **fields):
+    """
+    Log a structured event.
+
+    Args:
+        logger (logging.Logger): Logger to write to
+        level (int): logging level, e.g. logging.INFO
+        event (str): Short snake_case event name, used as the message
+        **fields: Extra JSON-serializable context; sensitive keys are redacted
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+
+class RedactionFilter(logging.Filter):
+    """Masks sensitive structured fields and dict arguments on every record."""
+
+    def filter(self, record):
+        fields = getattr(record, 'fields', None)
+        if fields:
+            record.fields = redact(fields)
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through only a fraction of records at or below a level.
+
+    High-volume DEBUG events (one per quiz answer, say) are kept at
+    sample_rate so turning on debug logging in production doesn't flood the
+    log pipeline; records above the level always pass.
+    """
+
+    def __init__(self, sample_rate=1.0, level=logging.DEBUG):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.level = level
+
+    def filter(self, record):
+        if record.levelno > self.level or self.sample_rate >= 1.0:
+            return True
+        return random.random() < self.sample_rate
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _BlockingStopListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue for its sentinel."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and owns its QueueListener.
+
+    Records go into a bounded queue with put_nowait; when the writer falls
+    behind and the queue is full, records are dropped and counted instead
+    of stalling the request thread. The listener thread is (re)started
+    lazily in whichever process first logs, so it survives gunicorn
+    forking workers from a preloaded app.
+    """
+
+    def __init__(self, target, max_queue=10000):
+        """
+        Args:
+            target (logging.Handler): Handler doing the actual I/O in the background
+            max_queue (int): Records buffered before new ones are dropped
+        """
+        super().__init__(queue.Queue(max_queue))
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                # A listener inherited through fork() has no running thread
+                self._listener = _BlockingStopListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        """
+        Make the record safe to hand to another thread, keeping its structure.
+
+        Unlike QueueHandler.prepare this doesn't pre-format the record into a
+        text line: the message is merged with its args and any traceback is
+        rendered to text, and the JSON formatting is left to the listener.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def configure_logging(level='INFO', debug_sample_rate=1.0, stream=None, max_queue=10000,
+                      replace=True):
+    """
+    Set up (or reconfigure) the 'mindbridge' logger.
+
+    The logger, its handler and listener thread are shared by the whole
+    process, whichever app is logging.
+
+    Args:
+        level (str): Minimum level to log, e.g. 'INFO' or 'DEBUG'
+        debug_sample_rate (float): Fraction of DEBUG records kept, 0-1
+        stream: File-like object the background writer writes to (default stderr)
+        max_queue (int): Records buffered before new ones are dropped
+        replace (bool): If False, keep the current setup when there is one
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    with _configure_lock:
+        if not replace and get_log_handler() is not None:
+            return logger
+        for handler in list(logger.handlers):
+            if isinstance(handler, AsyncLogHandler):
+                logger.removeHandler(handler)
+                handler.close()
+
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JSONFormatter())
+        handler = AsyncLogHandler(target, max_queue=max_queue)
+        handler.addFilter(SamplingFilter(debug_sample_rate))
+        handler.addFilter(RedactionFilter())
+
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    return logger
+
+
+def get_log_handler():
+    """Return the 'mindbridge' logger's AsyncLogHandler, or None."""
+    for handler in logging.getLogger(LOGGER_NAME).handlers:
+        if isinstance(handler, AsyncLogHandler):
+            return handler
+    return None
+
+
+@atexit.register
+def _flush_on_exit():
+    handler = get_log_handler()
+    if handler is not None:
+        handler.flush()
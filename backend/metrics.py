@@ -0,0 +1,233 @@
+"""
+MindBridge Metrics - in-process metrics in Prometheus text exposition format
+Components expose collector callables; the /metrics endpoint renders whatever they report.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Latency bucket upper bounds in seconds, from sub-millisecond queries to slow bcrypt
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return '{' + pairs + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+class MetricsRegistry:
+    """
+    A list of collectors rendered together at scrape time.
+
+    A collector is a callable returning metric families as
+    (name, type, help, value) tuples, where value is either a number or a
+    list of samples. A sample is a (labels dict, number) pair, or a
+    (name suffix, labels dict, number) triple for families such as
+    histograms whose samples are named e.g. <name>_bucket and <name>_sum.
+    """
+
+    def __init__(self):
+        self._collectors = []
+
+    def register(self, collector):
+        """Add a collector; returns it so this can be used as a decorator."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        """Render every collector's metrics as Prometheus exposition text."""
+        lines = []
+        for collector in self._collectors:
+            for name, metric_type, help_text, value in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                samples = value if isinstance(value, list) else [({}, value)]
+                for sample in samples:
+                    suffix, labels, number = sample if len(sample) == 3 else ('',) + tuple(sample)
+                    lines.append(f'{name}{suffix}{_format_labels(labels)} {number}')
+        return '\n'.join(lines) + '\n'
+
+
+class _PerThread:
+    """
+    Per-thread metric buffers, merged only when the metric is read.
+
+    Each thread writes to its own dict of label values -> list of numbers,
+    so recording a value takes no lock and never contends with other
+    request threads. The lock is only taken when a thread records its
+    first value, and when reading. Buffers of threads that have exited are
+    folded into one retired buffer so short-lived threads (e.g. the
+    development server's thread per request) don't accumulate.
+    """
+
+    def __init__(self, width):
+        self._width = width
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buffers = []  # (thread, buffer) pairs
+        self._retired = {}
+
+    def _buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = {}
+            with self._lock:
+                self._fold_dead_threads()
+                self._buffers.append((threading.current_thread(), buffer))
+            return buffer
+
+    def _row(self, buffer, labels):
+        row = buffer.get(labels)
+        if row is None:
+            row = buffer[labels] = [0] * self._width
+        return row
+
+    def _fold_dead_threads(self):
+        live = []
+        for thread, buffer in self._buffers:
+            if thread.is_alive():
+                live.append((thread, buffer))
+            else:
+                self._add_into(self._retired, buffer)
+        self._buffers = live
+
+    def _add_into(self, total, buffer):
+        # list() snapshots the dict in one step, so a writer adding a new
+        # label set concurrently can't break the iteration
+        for labels, row in list(buffer.items()):
+            merged = self._row(total, labels)
+            for i, number in enumerate(list(row)):
+                merged[i] += number
+
+    def merged(self):
+        """Return label values -> summed row across every thread."""
+        with self._lock:
+            self._fold_dead_threads()
+            total = {}
+            self._add_into(total, self._retired)
+            for _, buffer in self._buffers:
+                self._add_into(total, buffer)
+        return total
+
+
+class Counter(_PerThread):
+    """A monotonically increasing count per label set, recorded without locks."""
+
+    def __init__(self, name, help_text, label_names=()):
+        """
+        Args:
+            name (str): Metric name, conventionally ending in _total
+            help_text (str): HELP line text
+            label_names (tuple): Names of the label values passed to inc()
+        """
+        super().__init__(1)
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+
+    def inc(self, *label_values, amount=1):
+        """Add amount to the counter for these label values."""
+        self._row(self._buffer(), label_values)[0] += amount
+
+    def values(self):
+        """Return label values -> current count."""
+        return {labels: row[0] for labels, row in self.merged().items()}
+
+    def collect(self):
+        """Return this counter as a metric family for MetricsRegistry."""
+        return [(self.name, 'counter', self.help_text, [
+            (dict(zip(self.label_names, labels)), count)
+            for labels, count in sorted(self.values().items())
+        ])]
+
+
+class Histogram(_PerThread):
+    """
+    A Prometheus histogram per label set, recorded without locks.
+
+    An observation is one bisect over the bucket bounds and two list
+    updates in the calling thread's own buffer. Besides the usual
+    _bucket/_sum/_count samples, collect() reports p50/p95/p99 estimated
+    from the buckets (the same interpolation as PromQL histogram_quantile),
+    as a separate <name>_quantile gauge.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            name (str): Metric name
+            help_text (str): HELP line text
+            label_names (tuple): Names of the label values passed to observe()
+            buckets (tuple): Sorted bucket upper bounds; +Inf is added automatically
+        """
+        self.buckets = tuple(buckets)
+        # One count per bucket, one for +Inf, then the sum
+        super().__init__(len(self.buckets) + 2)
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+
+    def observe(self, value, *label_values):
+        """Record one observation for these label values."""
+        row = self._row(self._buffer(), label_values)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def snapshot(self):
+        """Return label values -> (cumulative bucket counts incl. +Inf, sum, count)."""
+        result = {}
+        for labels, row in self.merged().items():
+            cumulative = []
+            running = 0
+            for count in row[:-1]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, row[-1], running)
+        return result
+
+    def quantile(self, q, cumulative):
+        """Estimate quantile q from cumulative bucket counts, or None if empty."""
+        count = cumulative[-1]
+        if count == 0:
+            return None
+        rank = q * count
+        index = bisect_left(cumulative, rank)
+        if index >= len(self.buckets):
+            # Beyond the last finite bucket; report its bound, like histogram_quantile
+            return self.buckets[-1]
+        lower = self.buckets[index - 1] if index > 0 else 0.0
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bucket = cumulative[index] - below
+        return lower + (self.buckets[index] - lower) * (rank - below) / in_bucket
+
+    def collect(self):
+        """Return the histogram and its quantile estimates as metric families."""
+        samples = []
+        quantiles = []
+        bounds = self.buckets + (float('inf'),)
+        for labels, (cumulative, total, count) in sorted(self.snapshot().items()):
+            base = dict(zip(self.label_names, labels))
+            for bound, bucket_count in zip(bounds, cumulative):
+                samples.append(('_bucket', dict(base, le=_format_bound(bound)), bucket_count))
+            samples.append(('_sum', base, total))
+            samples.append(('_count', base, count))
+            for q in self.QUANTILES:
+                quantiles.append((dict(base, quantile=str(q)), self.quantile(q, cumulative)))
+        return [
+            (self.name, 'histogram', self.help_text, samples),
+            (f'{self.name}_quantile', 'gauge',
+             f'p50/p95/p99 of {self.name} estimated from its buckets', quantiles)
+        ]
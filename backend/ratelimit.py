@@ -0,0 +1,84 @@
+"""
+MindBridge Rate Limiting - in-memory token buckets per client IP or user
+Throttles expensive or abusable endpoints (bcrypt-backed auth, chat) with O(1) work and bounded memory per limiter.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Tokens left and when they were last topped up, for one key."""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed by an arbitrary string (IP, user id, ...).
+
+    Each key gets a bucket of `burst` tokens refilled at `rate` tokens per
+    second; a request takes one token or is refused. Buckets live in an
+    OrderedDict kept in least-recently-used order and capped at max_keys,
+    so memory is bounded however many distinct clients show up. Evicting a
+    bucket forgets that client's debt; with max_keys well above the number
+    of concurrently active clients, only idle (and so refilled) buckets
+    are dropped.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Bucket capacity, i.e. requests allowed back to back
+            max_keys (int): Buckets kept before the least recently used is evicted
+            clock (callable): Monotonic time source, replaceable in tests
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def hit(self, key):
+        """
+        Take a token from key's bucket.
+
+        Returns:
+            float: 0.0 if the request is allowed, otherwise the seconds until
+                a token will be available
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.burst, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            self.rejected += 1
+            return (1 - bucket.tokens) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def retry_after_header(wait):
+    """Format a wait in seconds as a Retry-After value (whole seconds, at least 1)."""
+    return str(max(1, math.ceil(wait)))
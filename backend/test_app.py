@@ -2,39 +2,92 @@
 Unit tests for MindBridge Flask backend API endpoints.
 
 This test suite covers all API endpoints with expected use cases, edge cases, and failure scenarios.
-Tests use an in-memory SQLite database to avoid interfering with the main database.
+Tests use a temporary SQLite database file to avoid interfering with the main database.
 """
 
 import unittest
+import asyncio
+import io
 import json
+import logging
 import tempfile
 import os
 import sqlite3
-from app import app, init_db, DB_NAME
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+from flask_jwt_extended import create_access_token, decode_token
+from app import (init_db, get_db_connection, get_password_hasher,
+                 classify_dass_scores, count_streaks, encode_cursor, get_dass_history_cache,
+                 GROUNDING_EXERCISES, MOOD_QUIZ_QUESTIONS, get_profile_cache, invalidate_profile,
+                 create_app, ensure_db, revoke_token, move_user_rows, DEFAULT_CONFIG)
+from cache import LRUCache, SQLiteCache, TieredCache
+from ratelimit import RateLimiter, retry_after_header
+from tokens import BloomFilter, RevocationStore
+import dass
+from hashing import HasherBusyError, PasswordHasher
+from intents import IntentMatcher, ahocorasick
+from json_provider import FastJSONProvider, available_backends
+from metrics import Counter, Histogram, MetricsRegistry
+from logs import AsyncLogHandler, configure_logging, get_log_handler, log_event
+from db import (MIGRATIONS, ConnectionPool, PoolExhaustedError, backfill_dass_score_columns,
+                get_schema_version, migrate, rebuild_checkin_daily_agg, resolve_pragmas,
+                shard_for, shard_path)
+from asgi import create_application
+from benchmarks.bench_load import compare_reports, summarize
+import datagen
+import db
 
-class MindBridgeAPITestCase(unittest.TestCase):
-    """Test case for MindBridge API endpoints."""
+class AppTestCase(unittest.TestCase):
+    """Base test case running against its own app and temporary database."""
+    
+    # Settings for self.app on top of TESTING and DATABASE
+    config = {}
     
     def setUp(self):
-        """Set up test environment before each test."""
-        # Use in-memory database for testing
-        app.config['TESTING'] = True
-        
-        # Override the database name for testing
-        global DB_NAME
-        self.original_db_name = DB_NAME
-        DB_NAME = ':memory:'
+        """Build an initialized app and a client authenticated as user 1."""
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.workdir.name, 'test.db')
+        self.apps = []
+        self.app = self.make_app()
+        ensure_db(self.app)
         
-        # Initialize test database
-        init_db()
-        
-        # Create test client
-        self.client = app.test_client()
+        self.access_token = self.token()
+        self.client = self.app.test_client()
+        self.client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {self.access_token}'
     
     def tearDown(self):
-        """Clean up after each test."""
-        global DB_NAME
-        DB_NAME = self.original_db_name
+        """Shut down every app's pools and caches and remove the database."""
+        for flask_app in self.apps:
+            for name in ('db_pool', 'shard_pool', 'profile_cache'):
+                resource = flask_app.extensions.get(name)
+                if resource is not None:
+                    resource.close()
+            hasher = flask_app.extensions.get('password_hasher')
+            if hasher is not None:
+                hasher.shutdown()
+        self.workdir.cleanup()
+    
+    def make_app(self, **config):
+        """An app on this test's database, with the class config and `config` applied."""
+        flask_app = create_app({'TESTING': True, 'DATABASE': self.db_path,
+                                **self.config, **config})
+        self.apps.append(flask_app)
+        return flask_app
+    
+    def token(self, user_id=1, flask_app=None, **kwargs):
+        """An access token for a user, signed by self.app unless another app is given."""
+        with (flask_app or self.app).app_context():
+            return create_access_token(identity=str(user_id), **kwargs)
+
+class MindBridgeAPITestCase(AppTestCase):
+    """Test case for MindBridge API endpoints."""
     
     def test_health_check(self):
         """Test the health check endpoint."""
@@ -248,6 +301,40 @@ class MindBridgeAPITestCase(unittest.TestCase):
         self.assertFalse(data['success'])
         self.assertIn('required', data['error'])
     
+    def test_submit_dass21(self):
+        """Test DASS-21 submission scoring and validation."""
+        answers = {str(item): 2 for item in range(1, 22)}
+        response = self.client.post('/api/dass21/submit',
+                                   data=json.dumps({'answers': answers}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['scores'], {'Depression': 28, 'Anxiety': 28, 'Stress': 28})
+        self.assertEqual(data['severity'], {'Depression': 'Extremely Severe',
+                                            'Anxiety': 'Extremely Severe',
+                                            'Stress': 'Severe'})
+        
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT depression, anxiety, stress, answers FROM dass_assessments'
+        ).fetchone()
+        conn.close()
+        self.assertEqual(row[:3], (28, 28, 28))
+        self.assertEqual(row[3], bytes([2] * 21))
+        
+        answers['5'] = 7
+        response = self.client.post('/api/dass21/submit',
+                                   data=json.dumps({'answers': answers}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        
+        fractional = {str(i): 1.7 for i in range(1, 22)}
+        response = self.client.post('/api/dass21/submit',
+                                   data=json.dumps({'answers': fractional}),
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('integers', json.loads(response.data)['error'])
+    
     def test_invalid_endpoint(self):
         """Test accessing non-existent endpoint."""
         response = self.client.get('/api/nonexistent')
@@ -267,6 +354,1707 @@ class MindBridgeAPITestCase(unittest.TestCase):
         data = json.loads(response.data)
         self.assertFalse(data['success'])
 
+class JSONHandlingTestCase(AppTestCase):
+    """Test case for request body parsing and the pluggable JSON backend."""
+    
+    def test_body_parsed_once(self):
+        """Test that the before_request hook and handler share one parse."""
+        calls = []
+        original_loads = self.app.json.loads
+        
+        def counting_loads(s, **kwargs):
+            calls.append(s)
+            return original_loads(s, **kwargs)
+        
+        self.app.json.loads = counting_loads
+        response = self.client.post('/api/chat',
+                                    data=json.dumps({'message': 'I feel happy'}),
+                                    content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 1)
+    
+    def test_invalid_json_with_charset(self):
+        """Test that malformed JSON is rejected for any JSON content type."""
+        response = self.client.post('/api/chat', data='{"message": ',
+                                    content_type='application/json; charset=utf-8')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)['error'], 'Invalid JSON format')
+    
+    def test_backends_round_trip(self):
+        """Test that every installed backend encodes and decodes the same data."""
+        payload = {'b': [1, 2.5, None, True], 'a': 'caf\u00e9 \u2764', 'c': {'z': 1, 'y': 2}}
+        expected = json.loads(json.dumps(payload))
+        for backend in available_backends():
+            provider = FastJSONProvider(self.app, backend=backend)
+            with self.app.app_context():
+                encoded = provider.response(payload).get_data()
+            self.assertEqual(json.loads(encoded), expected, backend)
+            self.assertEqual(provider.loads(encoded), expected, backend)
+            self.assertEqual(list(provider.loads(provider.dumps(payload))), ['a', 'b', 'c'])
+    
+    def test_unknown_backend(self):
+        """Test that an unavailable backend is rejected."""
+        with self.assertRaises(ValueError):
+            FastJSONProvider(self.app, backend='simdjson')
+
+class CheckinHistoryTestCase(AppTestCase):
+    """Test case for keyset-paginated check-in history."""
+    
+    def setUp(self):
+        """Set up a temporary database with a spread of check-ins."""
+        super().setUp()
+        with self.app.app_context():
+            conn = get_db_connection()
+            # 12 check-ins for user 1 over 6 days, two sharing each timestamp,
+            # plus one for another user that must never show up
+            rows = []
+            for day in range(1, 7):
+                for mood in ('Happy', 'Sad'):
+                    rows.append((1, mood, day, f'2025-01-0{day} 09:00:00'))
+            rows.append((2, 'Happy', 5, '2025-01-03 12:00:00'))
+            conn.executemany('''
+                INSERT INTO checkins (user_id, mood, stress_level, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+    
+    def get(self, **params):
+        response = self.client.get('/api/checkin', query_string=params)
+        return response.status_code, json.loads(response.data)
+    
+    def test_default_page(self):
+        """Test that the default page is the 5 newest check-ins."""
+        status, data = self.get()
+        self.assertEqual(status, 200)
+        self.assertEqual([c['id'] for c in data['checkins']], [12, 11, 10, 9, 8])
+        self.assertIsNotNone(data['next_cursor'])
+    
+    def test_walk_full_history_with_before(self):
+        """Test that following next_cursor visits every check-in exactly once."""
+        seen = []
+        params = {'limit': 5}
+        while True:
+            status, data = self.get(**params)
+            self.assertEqual(status, 200)
+            seen.extend(c['id'] for c in data['checkins'])
+            if data['next_cursor'] is None:
+                break
+            params['before'] = data['next_cursor']
+        self.assertEqual(seen, list(range(12, 0, -1)))
+    
+    def test_after_walks_forward(self):
+        """Test that after returns newer check-ins, oldest first."""
+        _, data = self.get(limit=8)
+        oldest = data['checkins'][-1]
+        self.assertEqual(oldest['id'], 5)
+        
+        status, data = self.get(limit=3, after=encode_cursor(oldest['timestamp'], oldest['id']))
+        self.assertEqual(status, 200)
+        self.assertEqual([c['id'] for c in data['checkins']], [6, 7, 8])
+        self.assertIsNotNone(data['next_cursor'])
+    
+    def test_date_and_mood_filters(self):
+        """Test date-range and mood filtering."""
+        _, data = self.get(start='2025-01-02', end='2025-01-04', mood='Sad', limit=100)
+        self.assertEqual([c['timestamp'][:10] for c in data['checkins']],
+                         ['2025-01-04', '2025-01-03', '2025-01-02'])
+        self.assertTrue(all(c['mood'] == 'Sad' for c in data['checkins']))
+        self.assertIsNone(data['next_cursor'])
+    
+    def test_invalid_parameters(self):
+        """Test that bad paging parameters are rejected."""
+        self.assertEqual(self.get(limit=0)[0], 400)
+        self.assertEqual(self.get(limit='abc')[0], 400)
+        self.assertEqual(self.get(before='not-a-cursor')[0], 400)
+        self.assertEqual(self.get(start='yesterday')[0], 400)
+        cursor = self.get()[1]['next_cursor']
+        self.assertEqual(self.get(before=cursor, after=cursor)[0], 400)
+
+class CheckinBatchTestCase(AppTestCase):
+    """Test case for bulk check-in ingestion."""
+    
+    def post_batch(self, checkins):
+        response = self.client.post('/api/checkin/batch',
+                                    data=json.dumps({'checkins': checkins}),
+                                    content_type='application/json')
+        return response.status_code, json.loads(response.data)
+    
+    def test_batch_insert_and_replay(self):
+        """Test that a batch is stored once and replaying it creates nothing new."""
+        checkins = [
+            {'mood': 'Happy', 'stress_level': 2, 'timestamp': '2025-01-01T08:00:00',
+             'idempotency_key': 'a'},
+            {'mood': 'Sad', 'stress_level': 7, 'notes': 'Rough night',
+             'timestamp': '2025-01-01T22:30:00+02:00', 'idempotency_key': 'b'}
+        ]
+        status, data = self.post_batch(checkins)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['created'], 2)
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'created'])
+        
+        status, replay = self.post_batch(checkins)
+        self.assertEqual(replay['created'], 0)
+        self.assertEqual([r['status'] for r in replay['results']], ['duplicate', 'duplicate'])
+        self.assertEqual([r['id'] for r in replay['results']],
+                         [r['id'] for r in data['results']])
+        
+        history = json.loads(self.client.get('/api/checkin').data)['checkins']
+        self.assertEqual([c['timestamp'] for c in history],
+                         ['2025-01-01 20:30:00', '2025-01-01 08:00:00'])
+    
+    def test_per_item_validation(self):
+        """Test that invalid items are reported without blocking valid ones."""
+        status, data = self.post_batch([
+            {'mood': 'Happy', 'stress_level': 3, 'idempotency_key': 'ok'},
+            {'mood': 'Happy', 'stress_level': 15, 'idempotency_key': 'bad-stress'},
+            {'stress_level': 3, 'idempotency_key': 'no-mood'},
+            {'mood': 'Happy', 'stress_level': 3},
+            {'mood': 'Happy', 'stress_level': 3, 'timestamp': 'soon',
+             'idempotency_key': 'bad-time'},
+            {'mood': 'Calm', 'stress_level': 4, 'idempotency_key': 'ok'}
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([r['status'] for r in data['results']],
+                         ['created', 'invalid', 'invalid', 'invalid', 'invalid', 'duplicate'])
+        self.assertIn('between 1 and 10', data['results'][1]['error'])
+        self.assertIn('required', data['results'][2]['error'])
+        self.assertEqual(data['created'], 1)
+    
+    def test_malformed_items_rejected_individually(self):
+        """Test that values that can't be stored are invalid items, not a failed batch."""
+        status, data = self.post_batch([
+            {'mood': 'Happy', 'stress_level': 3, 'idempotency_key': 'ok'},
+            {'mood': ['Sad'], 'stress_level': 3, 'idempotency_key': 'list-mood'},
+            {'mood': 'Sad', 'stress_level': 3, 'notes': {'x': 1}, 'idempotency_key': 'dict-notes'},
+            {'mood': 'Sad', 'stress_level': True, 'idempotency_key': 'bool-stress'},
+            {'mood': 'Calm', 'stress_level': 4, 'notes': None, 'idempotency_key': 'null-notes'}
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([r['status'] for r in data['results']],
+                         ['created', 'invalid', 'invalid', 'invalid', 'created'])
+        self.assertIn('Mood must be a string', data['results'][1]['error'])
+        self.assertIn('Notes must be a string or null', data['results'][2]['error'])
+        self.assertIn('between 1 and 10', data['results'][3]['error'])
+        self.assertEqual(data['created'], 2)
+        
+        response = self.client.post('/api/checkin', json={'mood': ['Sad'], 'stress_level': 3})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_future_timestamp_rejected(self):
+        """Test that items dated past the clock-skew allowance are invalid."""
+        now = datetime.now(timezone.utc)
+        status, data = self.post_batch([
+            {'mood': 'Happy', 'stress_level': 3, 'timestamp': '2099-01-01T00:00:00',
+             'idempotency_key': 'far'},
+            {'mood': 'Happy', 'stress_level': 3,
+             'timestamp': (now + timedelta(hours=1)).isoformat(), 'idempotency_key': 'hour'},
+            {'mood': 'Calm', 'stress_level': 4,
+             'timestamp': (now + timedelta(minutes=1)).isoformat(), 'idempotency_key': 'skew'}
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([r['status'] for r in data['results']], ['invalid', 'invalid', 'created'])
+        self.assertIn('future', data['results'][0]['error'])
+        self.assertEqual(data['created'], 1)
+    
+    def test_rejects_bad_envelope(self):
+        """Test that a missing, empty or oversized list is rejected."""
+        self.assertEqual(self.post_batch([])[0], 400)
+        self.assertEqual(self.post_batch('nope')[0], 400)
+        too_many = [{'mood': 'Happy', 'stress_level': 1, 'idempotency_key': str(i)}
+                    for i in range(501)]
+        self.assertEqual(self.post_batch(too_many)[0], 400)
+
+class CheckinStatsTestCase(AppTestCase):
+    """Test case for check-in analytics backed by checkin_daily_agg."""
+    
+    def setUp(self):
+        """Set up a temporary database and an authenticated client."""
+        super().setUp()
+        self.today = datetime.now(timezone.utc).date()
+    
+    def post_batch(self, checkins):
+        return self.client.post('/api/checkin/batch',
+                                data=json.dumps({'checkins': checkins}),
+                                content_type='application/json')
+    
+    def days_ago(self, days, hour=9):
+        return f'{(self.today - timedelta(days=days)).isoformat()}T{hour:02d}:00:00'
+    
+    def aggregate_rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT user_id, day, mood, checkin_count, stress_sum
+            FROM checkin_daily_agg ORDER BY user_id, day, mood
+        ''').fetchall()
+        conn.close()
+        return rows
+    
+    def test_stats_from_aggregates(self):
+        """Test daily/weekly averages, mood distribution and streaks."""
+        self.post_batch([
+            # Today's are at midnight so they are never ahead of the server clock
+            {'mood': 'Happy', 'stress_level': 2, 'timestamp': self.days_ago(0, 0), 'idempotency_key': '1'},
+            {'mood': 'Sad', 'stress_level': 6, 'timestamp': self.days_ago(0, 0), 'idempotency_key': '2'},
+            {'mood': 'Happy', 'stress_level': 4, 'timestamp': self.days_ago(1), 'idempotency_key': '3'},
+            {'mood': 'Calm', 'stress_level': 3, 'timestamp': self.days_ago(5), 'idempotency_key': '4'},
+            {'mood': 'Calm', 'stress_level': 3, 'timestamp': self.days_ago(6), 'idempotency_key': '5'},
+            {'mood': 'Calm', 'stress_level': 3, 'timestamp': self.days_ago(7), 'idempotency_key': '6'},
+            {'mood': 'Sad', 'stress_level': 9, 'timestamp': self.days_ago(60), 'idempotency_key': '7'}
+        ])
+        self.client.post('/api/checkin', data=json.dumps({'mood': 'Happy', 'stress_level': 1}),
+                         content_type='application/json')
+        
+        response = self.client.get('/api/checkin/stats', query_string={'days': 14})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        
+        self.assertEqual(data['total_checkins'], 7)
+        self.assertEqual(data['daily'][-1], {'date': self.today.isoformat(),
+                                             'checkins': 3, 'avg_stress': 3.0})
+        self.assertEqual(len(data['daily']), 5)
+        self.assertEqual(sum(w['checkins'] for w in data['weekly']), 7)
+        for week in data['weekly']:
+            self.assertEqual(date.fromisoformat(week['week_start']).weekday(), 0)
+        self.assertEqual(data['moods'], {'Calm': 3, 'Happy': 3, 'Sad': 1})
+        self.assertEqual(data['streak'], {'current': 2, 'longest': 3})
+    
+    def test_aggregates_match_rebuild(self):
+        """Test that incremental updates agree with a full rebuild."""
+        for i in range(10):
+            self.client.post('/api/checkin',
+                             data=json.dumps({'mood': ['Happy', 'Sad'][i % 2], 'stress_level': i + 1}),
+                             content_type='application/json')
+        self.post_batch([
+            {'mood': 'Happy', 'stress_level': 5, 'timestamp': self.days_ago(3), 'idempotency_key': 'a'},
+            {'mood': 'Happy', 'stress_level': 7, 'timestamp': self.days_ago(3), 'idempotency_key': 'b'}
+        ])
+        incremental = self.aggregate_rows()
+        
+        result = self.app.test_cli_runner().invoke(args=['rebuild-checkin-aggregates'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.aggregate_rows(), incremental)
+        self.assertIn((1, self.today.isoformat(), 'Happy', 5, 25), incremental)
+    
+    def test_invalid_window(self):
+        """Test that an out-of-range window is rejected."""
+        response = self.client.get('/api/checkin/stats', query_string={'days': 0})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_count_streaks(self):
+        """Test streak counting edge cases."""
+        today = date(2025, 3, 10)
+        day = lambda n: today - timedelta(days=n)
+        self.assertEqual(count_streaks([], today), (0, 0))
+        self.assertEqual(count_streaks([day(2), day(1)], today), (2, 2))
+        self.assertEqual(count_streaks([day(5), day(4), day(3), day(2)], today), (0, 4))
+        self.assertEqual(count_streaks([day(9), day(0)], today), (1, 1))
+        # Days after today (stored before future timestamps were refused) don't count
+        self.assertEqual(count_streaks([day(1), day(0), day(-3)], today), (2, 2))
+
+class DassHistoryTestCase(AppTestCase):
+    """Test case for DASS-21 history, rolling averages and caching."""
+    
+    def cache_hits(self):
+        with self.app.app_context():
+            return get_dass_history_cache().stats()['hits']
+    
+    def insert_assessments(self, scores, user_id=1):
+        """Insert (d, a, s) results one day apart, oldest first."""
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            INSERT INTO dass_assessments (user_id, scores, depression, anxiety, stress, created_at)
+            VALUES (?, '{}', ?, ?, ?, ?)
+        ''', [(user_id, d, a, s, f'2025-01-{day:02d} 09:00:00')
+              for day, (d, a, s) in enumerate(scores, start=1)])
+        conn.commit()
+        conn.close()
+    
+    def get_history(self, **params):
+        response = self.client.get('/api/dass21/history', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data)
+    
+    def test_history_averages_and_deltas(self):
+        """Test rolling averages and deltas computed over the full history."""
+        self.insert_assessments([(4, 2, 10), (10, 8, 16), (16, 2, 22), (4, 20, 40)])
+        self.insert_assessments([(42, 42, 42)], user_id=2)
+        
+        results = self.get_history()['results']
+        self.assertEqual([r['scores']['Depression'] for r in results], [4, 16, 10, 4])
+        
+        newest, oldest = results[0], results[-1]
+        self.assertEqual(newest['rolling_average'],
+                         {'Depression': 10.0, 'Anxiety': 10.0, 'Stress': 26.0})
+        self.assertEqual(newest['delta'], {'Depression': -12, 'Anxiety': 18, 'Stress': 18})
+        self.assertEqual(newest['severity'], {'Depression': 'Normal',
+                                              'Anxiety': 'Extremely Severe',
+                                              'Stress': 'Extremely Severe'})
+        self.assertIsNone(oldest['delta'])
+        self.assertEqual(oldest['rolling_average'],
+                         {'Depression': 4.0, 'Anxiety': 2.0, 'Stress': 10.0})
+    
+    def test_history_pagination(self):
+        """Test that cursors walk the history without gaps and keep windowed values."""
+        self.insert_assessments([(day, 0, 0) for day in range(1, 8)])
+        full = self.get_history()['results']
+        
+        seen = []
+        params = {'limit': 3}
+        while True:
+            page = self.get_history(**params)
+            seen.extend(page['results'])
+            if not page['next_cursor']:
+                break
+            params['before'] = page['next_cursor']
+        
+        self.assertEqual(seen, full)
+        self.assertEqual(len(seen), 7)
+    
+    def test_history_cache_invalidated_on_submit(self):
+        """Test that pages are cached and a new submission is visible at once."""
+        self.insert_assessments([(4, 2, 10)])
+        self.get_history()
+        hits = self.cache_hits()
+        self.assertEqual(len(self.get_history()['results']), 1)
+        self.assertEqual(self.cache_hits(), hits + 1)
+        
+        answers = {str(i): 1 for i in range(1, 22)}
+        self.client.post('/api/dass21/submit', data=json.dumps({'answers': answers}),
+                         content_type='application/json')
+        self.assertEqual(len(self.get_history()['results']), 2)
+    
+    def test_history_cache_entries_not_modified_in_place(self):
+        """Test that caching a page replaces the user's entry instead of changing it."""
+        self.insert_assessments([(day, 0, 0) for day in range(1, 8)])
+        self.get_history(limit=3)
+        with self.app.app_context():
+            first = get_dass_history_cache().get(1)
+        pages = dict(first[1])
+        
+        self.get_history(limit=5)
+        with self.app.app_context():
+            second = get_dass_history_cache().get(1)
+        self.assertEqual(first[1], pages)
+        self.assertEqual(len(second[1]), 2)
+    
+    def test_history_cache_checks_latest_assessment(self):
+        """Test that a write not seen by this process's cache still shows up."""
+        self.insert_assessments([(4, 2, 10)])
+        self.get_history()
+        self.insert_assessments([(4, 2, 10), (6, 2, 10)])
+        self.assertEqual(len(self.get_history()['results']), 3)
+    
+    def test_history_invalid_params(self):
+        """Test validation of limit and cursor."""
+        for params in ({'limit': 0}, {'limit': 101}, {'limit': 'x'}, {'before': '!!'}):
+            response = self.client.get('/api/dass21/history', query_string=params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class CatalogTestCase(unittest.TestCase):
+    """Test case for the cacheable quiz and exercise catalog."""
+    
+    def setUp(self):
+        self.client = create_app({'TESTING': True}).test_client()
+    
+    def test_catalog_content_and_headers(self):
+        """Test that the catalog holds all content and is publicly cacheable."""
+        response = self.client.get('/api/catalog')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.headers.get('ETag'))
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertIn('max-age=86400', response.headers['Cache-Control'])
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['mood_quiz']['questions'], MOOD_QUIZ_QUESTIONS)
+        self.assertEqual(data['grounding']['exercises'], GROUNDING_EXERCISES)
+        self.assertEqual(data['grounding']['keywords'][0]['exercise'], 'grounding')
+    
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag gets an empty 304 and a stale one the full body."""
+        etag = self.client.get('/api/catalog').headers['ETag']
+        
+        response = self.client.get('/api/catalog', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        
+        response = self.client.get('/api/catalog', headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_gzip_variant(self):
+        """Test the precompressed body and its separate ETag."""
+        plain = self.client.get('/api/catalog')
+        response = self.client.get('/api/catalog', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotEqual(response.headers['ETag'], plain.headers['ETag'])
+        self.assertEqual(zlib.decompress(response.data, 47), plain.data)
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """Test case for the in-process LRU cache."""
+    
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = LRUCache(ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        now[0] = 9.9
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 10.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+    
+    def test_per_entry_ttl_capped(self):
+        now = [0.0]
+        cache = LRUCache(ttl=10, clock=lambda: now[0])
+        cache.set('short', 1, ttl=2)
+        cache.set('long', 2, ttl=60)
+        now[0] = 2.0
+        self.assertIsNone(cache.get('short'))
+        self.assertEqual(cache.get('long'), 2)
+        now[0] = 10.0
+        self.assertIsNone(cache.get('long'))
+
+
+class ExportTestCase(AppTestCase):
+    """Test case for streaming NDJSON/CSV exports."""
+    
+    def insert_checkins(self, count, user_id=1):
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            INSERT INTO checkins (user_id, mood, stress_level, notes, timestamp)
+            VALUES (?, 'Calm', ?, 'synthetic', '2025-01-01 00:00:00')
+        ''', ((user_id, i % 10 + 1) for i in range(count)))
+        conn.commit()
+        conn.close()
+    
+    def submit_dass(self):
+        answers = {str(i): 1 for i in range(1, 22)}
+        self.client.post('/api/dass21/submit', data=json.dumps({'answers': answers}),
+                         content_type='application/json')
+    
+    def test_ndjson_export(self):
+        """Test that check-ins and DASS-21 results are exported as NDJSON."""
+        self.insert_checkins(3)
+        self.insert_checkins(2, user_id=2)
+        self.submit_dass()
+        
+        response = self.client.get('/api/export')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.data.decode().splitlines()]
+        
+        self.assertEqual([row['type'] for row in rows], ['checkin'] * 3 + ['dass21'])
+        self.assertEqual(rows[-1]['anxiety'], 14)
+        self.assertEqual(self.app.extensions['db_pool'].stats()['in_use'], 0)
+    
+    def test_csv_export(self):
+        """Test the CSV format."""
+        self.insert_checkins(2)
+        self.submit_dass()
+        
+        response = self.client.get('/api/export', query_string={'format': 'csv'})
+        self.assertEqual(response.mimetype, 'text/csv')
+        lines = response.data.decode().splitlines()
+        self.assertEqual(lines[0], 'type,id,timestamp,mood,stress_level,notes,depression,anxiety,stress')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith('checkin,1,2025-01-01 00:00:00,Calm,1,synthetic'))
+    
+    def test_invalid_format(self):
+        """Test that unknown formats are rejected."""
+        response = self.client.get('/api/export', query_string={'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_million_row_gzip_export_streams(self):
+        """Test that a 1M-row export streams in bounded chunks with constant memory."""
+        total = 1_000_000
+        self.insert_checkins(total)
+        
+        # Trace allocations from the request through the first 100k rows: an
+        # export that materialized the history would peak before the first block
+        tracemalloc.start()
+        response = self.client.get('/api/export', headers={'Accept-Encoding': 'gzip'},
+                                   buffered=False)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        
+        decompressor = zlib.decompressobj(31)
+        lines = 0
+        tail = b''
+        try:
+            for block in response.response:
+                data = tail + decompressor.decompress(block)
+                lines += data.count(b'\n')
+                tail = data[data.rfind(b'\n') + 1:]
+                if tracemalloc.is_tracing() and lines >= 100_000:
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+        finally:
+            tracemalloc.stop()
+            response.close()
+        
+        self.assertEqual(lines, total)
+        # A fully materialized export would need hundreds of MB
+        self.assertLess(peak, 5 * 1024 * 1024)
+        self.assertEqual(self.app.extensions['db_pool'].stats()['in_use'], 0)
+
+class AuthTestCase(AppTestCase):
+    """Test case for registration and login with pooled bcrypt hashing."""
+    
+    config = {'BCRYPT_ROUNDS': 4}
+    
+    def register(self, username='alice', password='secret123'):
+        return self.client.post('/api/auth/register',
+                                data=json.dumps({'username': username,
+                                                 'email': f'{username}@example.com',
+                                                 'password': password}),
+                                content_type='application/json')
+    
+    def login(self, username='alice', password='secret123'):
+        return self.client.post('/api/auth/login',
+                                data=json.dumps({'username': username, 'password': password}),
+                                content_type='application/json')
+    
+    def test_register_and_login(self):
+        """Test that a registered user can log in with the configured bcrypt cost."""
+        self.assertEqual(self.register().status_code, 200)
+        
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', json.loads(response.data))
+        
+        with self.app.app_context():
+            conn = get_db_connection()
+            stored = conn.execute('SELECT password_hash FROM users').fetchone()[0]
+        self.assertTrue(stored.startswith(b'$2b$04$'))
+    
+    def test_login_wrong_password(self):
+        """Test that a wrong password is rejected."""
+        self.register()
+        self.assertEqual(self.login(password='wrong-password').status_code, 401)
+    
+    def test_login_rejected_when_queue_full(self):
+        """Test that logins beyond the bcrypt queue depth get a fast 503."""
+        self.register()
+        self.app = self.make_app(BCRYPT_WORKERS=1, BCRYPT_MAX_QUEUE=0)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            hasher = get_password_hasher()
+        
+        # Occupy the only worker
+        release = threading.Event()
+        blocker = threading.Thread(target=hasher._submit, args=(release.wait,))
+        blocker.start()
+        try:
+            while hasher.stats()['running'] == 0:
+                release.wait(0.001)
+            response = self.login()
+        finally:
+            release.set()
+            blocker.join()
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(hasher.stats()['rejected'], 1)
+    
+    def test_logins_waiting_on_bcrypt_hold_no_connections(self):
+        """Test that queued logins leave the connection pool to other requests."""
+        self.register()
+        self.app = self.make_app(BCRYPT_WORKERS=1, DB_POOL_SIZE=2, DB_POOL_TIMEOUT=0.5)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            hasher = get_password_hasher()
+        
+        # Occupy the only worker so every login waits in the bcrypt queue
+        release = threading.Event()
+        blocker = threading.Thread(target=hasher._submit, args=(release.wait,))
+        blocker.start()
+        results = []
+        logins = [threading.Thread(target=lambda: results.append(self.login().status_code))
+                  for _ in range(4)]
+        try:
+            while hasher.stats()['running'] == 0:
+                release.wait(0.001)
+            for thread in logins:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while hasher.stats()['queued'] < len(logins) and time.monotonic() < deadline:
+                release.wait(0.001)
+            self.assertEqual(hasher.stats()['queued'], len(logins))
+            
+            self.assertEqual(self.app.extensions['db_pool'].stats()['in_use'], 0)
+            response = self.client.get('/api/checkin',
+                                       headers={'Authorization': f'Bearer {self.token()}'})
+            self.assertEqual(response.status_code, 200)
+        finally:
+            release.set()
+            blocker.join()
+            for thread in logins:
+                if thread.ident:
+                    thread.join()
+        self.assertEqual(results, [200] * len(logins))
+    
+    def test_bcrypt_metrics_exported(self):
+        """Test that bcrypt pool metrics appear on /metrics."""
+        self.register()
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.data.decode()
+        self.assertIn('mindbridge_bcrypt_queue_depth 0', body)
+        self.assertIn('mindbridge_bcrypt_completed_total', body)
+        self.assertIn('mindbridge_bcrypt_work_seconds_total', body)
+    
+    def auth_post(self, endpoint, token, payload=None):
+        return self.client.post(endpoint, json=payload,
+                                headers={'Authorization': f'Bearer {token}'})
+    
+    def test_refresh_rotates_tokens(self):
+        """Test that a refresh token is exchanged once for a new pair."""
+        tokens = json.loads(self.register().data)
+        self.assertIn('refresh_token', tokens)
+        
+        response = self.auth_post('/api/auth/refresh', tokens['refresh_token'])
+        self.assertEqual(response.status_code, 200)
+        renewed = json.loads(response.data)
+        self.assertNotEqual(renewed['refresh_token'], tokens['refresh_token'])
+        self.assertEqual(self.client.get('/api/auth/profile', headers={
+            'Authorization': f"Bearer {renewed['access_token']}"}).status_code, 200)
+        
+        # The old refresh token is spent; access tokens can't be used to refresh
+        replay = self.auth_post('/api/auth/refresh', tokens['refresh_token'])
+        self.assertEqual(replay.status_code, 401)
+        self.assertEqual(self.auth_post('/api/auth/refresh',
+                                        renewed['access_token']).status_code, 422)
+        self.assertEqual(self.auth_post('/api/auth/refresh',
+                                        renewed['refresh_token']).status_code, 200)
+    
+    def test_logout_revokes_tokens(self):
+        """Test that logout revokes the access token and the given refresh token."""
+        tokens = json.loads(self.register().data)
+        other = json.loads(self.register('bob').data)
+        
+        response = self.auth_post('/api/auth/logout', tokens['access_token'],
+                                  {'refresh_token': other['refresh_token']})
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.auth_post('/api/auth/logout', tokens['access_token'],
+                                  {'refresh_token': tokens['refresh_token']})
+        self.assertEqual(response.status_code, 200)
+        for endpoint, token in (('/api/auth/profile', tokens['access_token']),
+                                ('/api/auth/refresh', tokens['refresh_token'])):
+            response = self.client.open(endpoint, method='GET' if 'profile' in endpoint else 'POST',
+                                        headers={'Authorization': f'Bearer {token}'})
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(json.loads(response.data)['msg'], 'Token has been revoked')
+        
+        with self.app.app_context():
+            conn = get_db_connection()
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM revoked_tokens').fetchone()[0], 2)
+
+class ProfileCacheTestCase(AppTestCase):
+    """Test case for the cached GET /api/auth/profile lookup."""
+    
+    def setUp(self):
+        """Set up a temporary database with two users."""
+        super().setUp()
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+            [('alice', 'alice@example.com', 'x'), ('bob', 'bob@example.com', 'x')]
+        )
+        conn.commit()
+        conn.close()
+    
+    def get_profile(self, user_id):
+        response = self.client.get('/api/auth/profile',
+                                   headers={'Authorization': f'Bearer {self.token(user_id)}'})
+        return response.status_code, json.loads(response.data)
+    
+    def cache_stats(self):
+        with self.app.app_context():
+            return get_profile_cache().stats()
+    
+    def use_app(self, **config):
+        """Serve the remaining requests from a new app with these settings."""
+        self.app = self.make_app(**config)
+        self.client = self.app.test_client()
+    
+    def rename(self, user_id, username):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE users SET username = ? WHERE id = ?', (username, user_id))
+        conn.commit()
+        conn.close()
+    
+    def test_profile_served_from_cache(self):
+        """Test that repeat lookups hit the cache until the user is invalidated."""
+        status, data = self.get_profile(1)
+        self.assertEqual(status, 200)
+        self.assertEqual(data['user']['username'], 'alice')
+        
+        self.rename(1, 'alice2')
+        self.assertEqual(self.get_profile(1)[1]['user']['username'], 'alice')
+        stats = self.cache_stats()
+        self.assertEqual((stats['hits']['local'], stats['misses']), (1, 1))
+        
+        with self.app.app_context():
+            invalidate_profile(1)
+        self.assertEqual(self.get_profile(1)[1]['user']['username'], 'alice2')
+    
+    def test_missing_user_not_cached(self):
+        """Test that unknown users still get a 404 and nothing is stored."""
+        self.assertEqual(self.get_profile(99)[0], 404)
+        self.assertEqual(self.cache_stats()['size'], 0)
+    
+    def test_cache_is_bounded(self):
+        """Test that the in-process tier evicts beyond PROFILE_CACHE_SIZE."""
+        self.use_app(PROFILE_CACHE_SIZE=1)
+        self.get_profile(1)
+        self.get_profile(2)
+        stats = self.cache_stats()
+        self.assertEqual((stats['size'], stats['evictions']), (1, 1))
+    
+    def test_shared_tier(self):
+        """Test that a profile cached by one worker is a shared hit in another."""
+        shared_path = os.path.join(self.workdir.name, 'profiles.db')
+        self.use_app(PROFILE_CACHE_PATH=shared_path)
+        self.get_profile(1)
+        
+        other_worker = TieredCache(LRUCache(), SQLiteCache(shared_path))
+        self.assertEqual(other_worker.get('profile:1')['username'], 'alice')
+        self.assertEqual(other_worker.stats()['hits'], {'local': 0, 'shared': 1})
+        
+        with self.app.app_context():
+            invalidate_profile(1)
+        self.assertIsNone(other_worker.shared.get('profile:1'))
+        other_worker.close()
+    
+    def test_sqlite_cache_expiry(self):
+        """Test that shared entries expire after the TTL."""
+        now = [1000.0]
+        cache = SQLiteCache(':memory:', ttl=5, clock=lambda: now[0])
+        cache.set('k', {'v': 1})
+        self.assertEqual(cache.get('k'), {'v': 1})
+        now[0] += 5
+        self.assertIsNone(cache.get('k'))
+        cache.close()
+    
+    def test_metrics_exposed(self):
+        """Test that hit and miss counters appear on /metrics."""
+        self.get_profile(1)
+        self.get_profile(1)
+        body = self.client.get('/metrics').data.decode()
+        self.assertIn('mindbridge_profile_cache_hits_total{tier="local"} 1', body)
+        self.assertIn('mindbridge_profile_cache_misses_total 1', body)
+
+
+class RateLimitTestCase(AppTestCase):
+    """Test case for token-bucket rate limiting of auth and chat."""
+    
+    config = {'RATE_LIMITS': {
+        'auth': {'requests': 2, 'period': 60, 'key': 'ip'},
+        'chat': {'requests': 2, 'period': 60, 'key': 'user'}
+    }}
+    
+    def login(self, ip='10.0.0.1'):
+        return self.client.post('/api/auth/login',
+                                data=json.dumps({'username': 'nobody', 'password': 'x'}),
+                                content_type='application/json',
+                                environ_base={'REMOTE_ADDR': ip})
+    
+    def chat(self, user_id):
+        return self.client.post('/api/chat', data=json.dumps({'message': 'hi'}),
+                                content_type='application/json',
+                                headers={'Authorization': f'Bearer {self.token(user_id)}'})
+    
+    def test_login_limited_per_ip(self):
+        """Test that a client IP gets 429 with Retry-After once its burst is spent."""
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login().status_code, 401)
+        
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '30')
+        self.assertFalse(json.loads(response.data)['success'])
+        
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 401)
+    
+    def test_preflight_not_counted(self):
+        """Test that CORS preflight requests don't use up the auth budget."""
+        for _ in range(5):
+            self.client.options('/api/auth/login', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        self.assertEqual(self.login().status_code, 401)
+    
+    def test_chat_limited_per_user(self):
+        """Test that chat limits follow the JWT identity."""
+        self.assertEqual(self.chat(1).status_code, 200)
+        self.assertEqual(self.chat(1).status_code, 200)
+        self.assertEqual(self.chat(1).status_code, 429)
+        self.assertEqual(self.chat(2).status_code, 200)
+        
+        body = self.client.get('/metrics').data.decode()
+        self.assertIn('mindbridge_rate_limited_total{group="chat"} 1', body)
+    
+    def test_disabled_group(self):
+        """Test that a group set to None is not limited."""
+        self.app = self.make_app(RATE_LIMITS=dict(self.config['RATE_LIMITS'], chat=None))
+        self.client = self.app.test_client()
+        for _ in range(5):
+            self.assertEqual(self.chat(1).status_code, 200)
+    
+    def test_bucket_refills(self):
+        """Test token refill and the reported wait."""
+        now = [0.0]
+        limiter = RateLimiter(rate=0.5, burst=2, clock=lambda: now[0])
+        self.assertEqual(limiter.hit('a'), 0)
+        self.assertEqual(limiter.hit('a'), 0)
+        self.assertAlmostEqual(limiter.hit('a'), 2.0)
+        
+        now[0] = 1.0
+        self.assertAlmostEqual(limiter.hit('a'), 1.0)
+        now[0] = 2.0
+        self.assertEqual(limiter.hit('a'), 0)
+        self.assertEqual(limiter.rejected, 2)
+        self.assertEqual(retry_after_header(0.2), '1')
+        self.assertEqual(retry_after_header(2.5), '3')
+    
+    def test_buckets_bounded(self):
+        """Test that the least recently used bucket is evicted past max_keys."""
+        limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+        limiter.hit('a')
+        limiter.hit('b')
+        limiter.hit('a')
+        limiter.hit('c')
+        
+        self.assertEqual(len(limiter), 2)
+        self.assertEqual(limiter.hit('b'), 0)  # evicted, so it starts full again
+        self.assertGreater(limiter.hit('c'), 0)
+        self.assertEqual(len(limiter), 2)
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+    """Test case for the bcrypt worker pool."""
+    
+    def test_hash_and_verify(self):
+        """Test round-tripping a password through the pool."""
+        hasher = PasswordHasher(rounds=4, max_workers=1)
+        hashed = hasher.hash('secret123')
+        self.assertTrue(hasher.verify('secret123', hashed))
+        self.assertFalse(hasher.verify('wrong', hashed))
+        self.assertEqual(hasher.stats()['completed'], 3)
+        hasher.shutdown()
+    
+    def test_admission_limit(self):
+        """Test that jobs beyond workers + queue are rejected immediately."""
+        hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=0)
+        release = threading.Event()
+        blocker = threading.Thread(target=hasher._submit, args=(release.wait,))
+        blocker.start()
+        try:
+            while hasher.stats()['running'] == 0:
+                release.wait(0.001)
+            with self.assertRaises(HasherBusyError):
+                hasher.hash('secret123')
+        finally:
+            release.set()
+            blocker.join()
+        
+        # Capacity is restored once the blocking job finishes
+        self.assertTrue(hasher.verify('secret123', hasher.hash('secret123')))
+        hasher.shutdown()
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    """Test case for the pooled SQLite connection manager."""
+    
+    def setUp(self):
+        """Set up a pool over a temporary database file."""
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        self.pool = ConnectionPool(self.db_path, max_size=2, timeout=0.05)
+    
+    def tearDown(self):
+        """Close the pool and remove the database file."""
+        self.pool.close()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+    
+    def test_connection_is_reused(self):
+        """Test that a released connection is handed out again."""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(self.pool.stats()['size'], 1)
+    
+    def test_pool_is_bounded(self):
+        """Test that acquiring beyond max_size times out."""
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolExhaustedError):
+            self.pool.acquire()
+    
+    def test_release_rolls_back_open_transaction(self):
+        """Test that uncommitted work is discarded when a connection is returned."""
+        conn = self.pool.acquire()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.execute('INSERT INTO t VALUES (1)')
+        self.pool.release(conn)
+        
+        conn = self.pool.acquire()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+    
+    def test_unhealthy_connection_is_replaced(self):
+        """Test that a dead idle connection is swapped for a fresh one."""
+        self.pool.health_check_interval = 0
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        conn.close()
+        
+        fresh = self.pool.acquire()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(fresh.execute('SELECT 1').fetchone()[0], 1)
+        self.assertEqual(self.pool.stats()['size'], 1)
+    
+    def test_pragmas_applied(self):
+        """Test that configured PRAGMAs are set on new connections."""
+        pool = ConnectionPool(self.db_path, pragmas={'foreign_keys': 'ON'})
+        conn = pool.acquire()
+        self.assertEqual(conn.execute('PRAGMA foreign_keys').fetchone()[0], 1)
+        pool.release(conn)
+        pool.close()
+
+class PragmaProfileTestCase(AppTestCase):
+    """Test case for the SQLite durability/performance profiles."""
+    
+    def test_init_db_enables_wal(self):
+        """Test that the database file is switched to WAL on creation."""
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+    
+    def test_fast_profile_on_pooled_connection(self):
+        """Test that pooled connections get the fast profile settings."""
+        with self.make_app(DB_PROFILE='fast').app_context():
+            conn = get_db_connection()
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute('PRAGMA temp_store').fetchone()[0], 2)  # MEMORY
+            self.assertEqual(conn.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+    
+    def test_safe_profile_on_pooled_connection(self):
+        """Test that the safe profile keeps full fsync on commit."""
+        with self.make_app(DB_PROFILE='safe').app_context():
+            conn = get_db_connection()
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 2)  # FULL
+    
+    def test_overrides_and_unknown_profile(self):
+        """Test per-PRAGMA overrides and rejection of unknown profiles."""
+        pragmas = resolve_pragmas('fast', {'cache_size': -2000})
+        self.assertEqual(pragmas['cache_size'], -2000)
+        self.assertEqual(pragmas['journal_mode'], 'WAL')
+        with self.assertRaises(ValueError):
+            resolve_pragmas('reckless')
+
+class MigrationTestCase(AppTestCase):
+    """Test case for versioned schema migrations and the indexes they add."""
+    
+    def setUp(self):
+        """Initialize a temporary database and open it directly."""
+        super().setUp()
+        self.conn = sqlite3.connect(self.db_path)
+    
+    def tearDown(self):
+        """Close the direct connection before removing the database."""
+        self.conn.close()
+        super().tearDown()
+    
+    def test_init_db_applies_all_migrations(self):
+        """Test that init_db brings user_version to the latest migration."""
+        self.assertEqual(get_schema_version(self.conn), len(MIGRATIONS))
+    
+    def test_migrate_is_idempotent(self):
+        """Test that re-running migrations is a no-op."""
+        init_db(self.app)
+        self.assertEqual(migrate(self.conn), len(MIGRATIONS))
+    
+    def test_failed_migration_rolls_back(self):
+        """Test that a failing migration leaves the version and schema untouched."""
+        version = get_schema_version(self.conn)
+        broken = MIGRATIONS + [[
+            'CREATE TABLE half_done (x INTEGER)',
+            'INSERT INTO no_such_table VALUES (1)'
+        ]]
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate(self.conn, broken)
+        
+        self.assertEqual(get_schema_version(self.conn), version)
+        tables = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'half_done'"
+        ).fetchall()
+        self.assertEqual(tables, [])
+    
+    def test_checkin_history_uses_index(self):
+        """Test that the check-in history query is served by the composite index."""
+        plan = self.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, mood, stress_level, notes, timestamp 
+            FROM checkins 
+            WHERE user_id = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT 5
+        ''', (1,)).fetchall()
+        details = ' '.join(row[3] for row in plan)
+        
+        self.assertIn('USING INDEX idx_checkins_user_timestamp', details)
+        self.assertNotIn('TEMP B-TREE', details)
+    
+    def test_dass_scores_backfilled(self):
+        """Test that migration 5 copies legacy JSON scores into typed columns."""
+        legacy_fd, legacy_path = tempfile.mkstemp(suffix='.db')
+        conn = sqlite3.connect(legacy_path)
+        try:
+            conn.executescript('''
+                CREATE TABLE checkins (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    mood TEXT NOT NULL,
+                    stress_level INTEGER NOT NULL,
+                    notes TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE dass_assessments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    scores TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            ''')
+            migrate(conn, MIGRATIONS[:4])
+            conn.executemany(
+                'INSERT INTO dass_assessments (user_id, scores) VALUES (?, ?)',
+                [(1, json.dumps({'d': i, 'a': i + 1, 's': i + 2})) for i in range(25)]
+            )
+            conn.commit()
+            
+            self.assertEqual(migrate(conn), len(MIGRATIONS))
+            rows = conn.execute('''
+                SELECT depression, anxiety, stress, answers
+                FROM dass_assessments ORDER BY id
+            ''').fetchall()
+            self.assertEqual(rows, [(i, i + 1, i + 2, None) for i in range(25)])
+        finally:
+            conn.close()
+            os.close(legacy_fd)
+            os.unlink(legacy_path)
+    
+    def test_backfill_dass_score_columns_in_chunks(self):
+        """Test that the backfill covers every row, committing each chunk on its own."""
+        self.conn.executemany(
+            'INSERT INTO dass_assessments (user_id, scores) VALUES (?, ?)',
+            [(1, json.dumps({'d': 2, 'a': 4, 's': 6}))] * 7
+        )
+        self.conn.commit()
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        self.assertEqual(backfill_dass_score_columns(self.conn, chunk_size=3), 7)
+        self.conn.set_trace_callback(None)
+        # Chunks of 3, 3 and 1, then an empty check
+        self.assertEqual(statements.count('BEGIN IMMEDIATE'), 4)
+        self.assertEqual(statements.count('COMMIT'), 4)
+        self.assertFalse(self.conn.in_transaction)
+        
+        plan = self.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, scores FROM dass_assessments
+            WHERE id > ? AND depression IS NULL ORDER BY id LIMIT ?
+        ''', (0, 3)).fetchall()
+        self.assertIn('idx_dass_assessments_unscored', ' '.join(row[3] for row in plan))
+        
+        totals = self.conn.execute(
+            'SELECT SUM(depression), SUM(anxiety), SUM(stress) FROM dass_assessments'
+        ).fetchone()
+        self.assertEqual(totals, (14, 28, 42))
+        self.assertEqual(backfill_dass_score_columns(self.conn), 0)
+    
+    def test_dass_history_uses_index(self):
+        """Test that per-user DASS-21 lookups are served by the composite index."""
+        plan = self.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id, scores, created_at
+            FROM dass_assessments
+            WHERE user_id = ?
+            ORDER BY created_at
+        ''', (1,)).fetchall()
+        details = ' '.join(row[3] for row in plan)
+        
+        self.assertIn('USING INDEX idx_dass_assessments_user_created', details)
+        self.assertNotIn('TEMP B-TREE', details)
+
+class RequestConnectionTestCase(AppTestCase):
+    """Test case for per-request connection handling in the Flask app."""
+    
+    def test_connection_shared_within_request(self):
+        """Test that one app context reuses a single connection."""
+        with self.app.app_context():
+            self.assertIs(get_db_connection(), get_db_connection())
+    
+    def test_connection_returned_on_exception(self):
+        """Test that teardown releases the connection when a handler raises."""
+        with self.assertRaises(sqlite3.OperationalError):
+            with self.app.app_context():
+                get_db_connection().execute('INSERT INTO missing_table VALUES (1)')
+        
+        stats = self.app.extensions['db_pool'].stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['idle'], 1)
+
+class AppFactoryTestCase(unittest.TestCase):
+    """Test case for create_app() and one-time schema initialization."""
+    
+    def setUp(self):
+        """Give each app its own not-yet-created database file."""
+        self.workdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.workdir.name, 'factory.db')
+        self.app = create_app({'DATABASE': self.db_path, 'BCRYPT_ROUNDS': 4})
+    
+    def tearDown(self):
+        """Close the app's pool and remove its database."""
+        pool = self.app.extensions.get('db_pool')
+        if pool is not None:
+            pool.close()
+        self.workdir.cleanup()
+    
+    def test_apps_are_isolated(self):
+        """Test that each app gets its own config and state."""
+        other = create_app({'RATE_LIMITS': {}})
+        self.assertEqual(self.app.config['DATABASE'], self.db_path)
+        self.assertEqual(other.config['DATABASE'], DEFAULT_CONFIG['DATABASE'])
+        self.assertEqual(other.config['RATE_LIMITS'], {})
+        
+        self.app.config['RATE_LIMITS']['auth']['requests'] = 1
+        self.assertEqual(DEFAULT_CONFIG['RATE_LIMITS']['auth']['requests'], 10)
+        self.assertIsNot(self.app.extensions['dass_history_cache'],
+                         other.extensions['dass_history_cache'])
+    
+    def test_create_app_does_not_touch_database(self):
+        """Test that building an app leaves the database alone until it's needed."""
+        self.assertFalse(os.path.exists(self.db_path))
+    
+    def test_first_request_creates_schema(self):
+        """Test that the first request needing a connection initializes the database."""
+        response = self.app.test_client().post('/api/auth/register', json={
+            'username': 'factory', 'email': 'factory@example.com', 'password': 'secret123'
+        })
+        self.assertEqual(response.status_code, 200)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM users').fetchone()[0], 1)
+        conn.close()
+    
+    def test_ensure_db_runs_once(self):
+        """Test that concurrent ensure_db() calls initialize the database once."""
+        with mock.patch('app.init_db', wraps=init_db) as wrapped:
+            threads = [threading.Thread(target=ensure_db, args=(self.app,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            ensure_db(self.app)
+        self.assertEqual(wrapped.call_count, 1)
+    
+    def test_failed_init_is_retried(self):
+        """Test that a database that failed to initialize isn't marked as done."""
+        with mock.patch('app.init_db', return_value=False) as failing:
+            ensure_db(self.app)
+            ensure_db(self.app)
+        self.assertEqual(failing.call_count, 2)
+    
+    def test_import_does_not_load_numpy(self):
+        """Test that importing the app module leaves numpy to the first DASS-21 request."""
+        output = subprocess.run(
+            [sys.executable, '-c', 'import sys, app; app.create_app(); print("numpy" in sys.modules)'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+            check=True
+        ).stdout
+        self.assertEqual(output.strip(), 'False')
+
+class AsgiTestCase(AppTestCase):
+    """Smoke test for the ASGI entry point, driven in-process."""
+    
+    config = {'RATE_LIMITS': {}}
+    
+    def setUp(self):
+        """Wrap the test's app the way asgi.py wraps the default one."""
+        super().setUp()
+        self.application = create_application(self.app)
+    
+    def request(self, method, path, body=None, token=None):
+        """Send one HTTP request through the ASGI interface; returns (status, JSON body)."""
+        headers = [(b'host', b'testserver')]
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers += [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(payload)).encode())]
+        if token is not None:
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'headers': headers,
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80)
+        }
+        sent = []
+        
+        async def receive():
+            if sent:
+                # Nothing more to read: wait like a client holding the connection open
+                await asyncio.sleep(3600)
+            sent.append(True)
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        
+        response = {'status': None, 'body': b''}
+        
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'] += message.get('body', b'')
+        
+        asyncio.run(asyncio.wait_for(self.application(scope, receive, send), timeout=30))
+        return response['status'], json.loads(response['body'])
+    
+    def test_health(self):
+        """Test that /api/health answers through the ASGI app."""
+        status, data = self.request('GET', '/api/health')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['status'], 'healthy')
+    
+    def test_authenticated_route(self):
+        """Test that a JWT-protected route works end to end through the ASGI app."""
+        status, data = self.request('POST', '/api/checkin', {'mood': 'Happy', 'stress_level': 4},
+                                    token=self.access_token)
+        self.assertEqual(status, 200)
+        self.assertTrue(data['success'])
+        
+        status, data = self.request('GET', '/api/checkin', token=self.access_token)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(data['checkins']), 1)
+    
+    def test_missing_token_rejected(self):
+        """Test that a protected route still requires a token behind the ASGI app."""
+        status, _ = self.request('GET', '/api/checkin')
+        self.assertEqual(status, 401)
+
+class LoadReportTestCase(unittest.TestCase):
+    """Test case for load test summaries and baseline comparison."""
+    
+    def report(self, latency, requests):
+        """A one-endpoint report whose requests all took `latency` seconds."""
+        return {'mixes': {'chat': summarize({'chat': [latency] * requests}, {}, 1.0)}}
+    
+    def test_summary(self):
+        """Test throughput, percentiles and errors in a mix summary."""
+        summary = summarize({'chat': [0.001] * 99 + [0.1]}, {'chat': 2, 'login': 1}, 2.0)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['errors'], 3)
+        self.assertEqual(summary['endpoints']['chat']['throughput'], 50.0)
+        self.assertAlmostEqual(summary['endpoints']['chat']['p50_ms'], 1.0)
+        self.assertAlmostEqual(summary['endpoints']['chat']['p99_ms'], 100.0)
+        self.assertIsNone(summary['endpoints']['login']['p95_ms'])
+    
+    def test_regressions_flagged(self):
+        """Test that slower p95 and lower throughput beyond the tolerance are reported."""
+        baseline = self.report(0.010, 100)
+        self.assertEqual(compare_reports(baseline, self.report(0.011, 90)), [])
+        self.assertEqual(len(compare_reports(baseline, self.report(0.020, 100))), 1)
+        self.assertEqual(len(compare_reports(baseline, self.report(0.010, 50))), 1)
+    
+    def test_small_latency_changes_ignored(self):
+        """Test that sub-millisecond p95 jitter isn't a regression."""
+        self.assertEqual(compare_reports(self.report(0.0002, 100), self.report(0.0004, 100)), [])
+
+class DataGeneratorTestCase(AppTestCase):
+    """Test case for the synthetic data generator."""
+    
+    END = int(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+    config = {'BCRYPT_ROUNDS': 4}
+    
+    def setUp(self):
+        """Create an initialized database in its own app."""
+        super().setUp()
+        self.password_hash = datagen.hash_fixture_password(rounds=4)
+    
+    def generate(self, database=None, seed=0, users=20):
+        """Fill a database with a small data set; returns the generator's counts."""
+        conn = sqlite3.connect(database or self.db_path)
+        try:
+            return datagen.generate(conn, users, 30, 3, self.password_hash, self.END, seed=seed)
+        finally:
+            conn.close()
+    
+    def dump(self, database):
+        """Every generated row, for comparing data sets."""
+        conn = sqlite3.connect(database)
+        rows = [conn.execute(f'SELECT * FROM {table} ORDER BY 1, 2').fetchall()
+                for table in ('users', 'checkins', 'dass_assessments')]
+        conn.close()
+        return rows
+    
+    def test_counts_and_aggregates(self):
+        """Test row counts, and that checkin_daily_agg matches a full rebuild."""
+        self.assertEqual(self.generate(), {'users': 20, 'checkins': 600, 'dass_assessments': 60})
+        conn = sqlite3.connect(self.db_path)
+        for table, count in (('users', 20), ('checkins', 600), ('dass_assessments', 60)):
+            self.assertEqual(conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0], count)
+        
+        generated = conn.execute('SELECT * FROM checkin_daily_agg ORDER BY 1, 2, 3').fetchall()
+        rebuild_checkin_daily_agg(conn)
+        rebuilt = conn.execute('SELECT * FROM checkin_daily_agg ORDER BY 1, 2, 3').fetchall()
+        self.assertEqual(generated, rebuilt)
+        
+        newest = conn.execute('SELECT MAX(timestamp) FROM checkins').fetchone()[0]
+        self.assertLessEqual(newest, '2025-06-01 00:00:00')
+        conn.close()
+    
+    def test_same_seed_same_rows(self):
+        """Test that a seed always produces the same data, and another seed doesn't."""
+        self.generate()
+        for seed, same in ((0, True), (1, False)):
+            other = os.path.join(self.workdir.name, f'seed{seed}.db')
+            init_db(create_app({'DATABASE': other}))
+            self.generate(other, seed=seed)
+            self.assertEqual(self.dump(other) == self.dump(self.db_path), same)
+    
+    def test_generated_users_work_with_the_api(self):
+        """Test that generated users can log in and read their history and scores."""
+        self.generate()
+        self.generate(users=5)  # A second load appends users after the first
+        client = self.app.test_client()  # Without the default user 1 token
+        response = client.post('/api/auth/login', json={
+            'username': 'user25', 'password': datagen.DEFAULT_PASSWORD
+        })
+        self.assertEqual(response.status_code, 200)
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        checkins = client.get('/api/checkin?limit=100', headers=headers).get_json()
+        self.assertEqual(len(checkins['checkins']), 30)
+        self.assertIn(checkins['checkins'][0]['mood'], datagen.MOODS)
+        
+        history = client.get('/api/dass21/history', headers=headers).get_json()
+        self.assertEqual(len(history['results']), 3)
+        scores = history['results'][0]['scores']
+        self.assertEqual(set(scores), {'Depression', 'Anxiety', 'Stress'})
+    
+    def test_cli_command(self):
+        """Test the generate-data command end to end."""
+        result = self.app.test_cli_runner().invoke(args=[
+            'generate-data', '--users', '3', '--checkins', '4', '--dass', '2'
+        ])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Generated 3 users, 12 check-ins and 6 DASS-21 results', result.output)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+
+class TokenCacheTestCase(AppTestCase):
+    """Test case for cached JWT verification and the token denylist."""
+    
+    def setUp(self):
+        """Build an app with a controllable token cache clock."""
+        super().setUp()
+        self.jwt = self.app.extensions['flask-jwt-extended']
+        self.now = [0.0]
+        self.jwt.token_cache = LRUCache(max_size=100, ttl=300, clock=lambda: self.now[0])
+        self.client = self.app.test_client()
+    
+    def get(self, token):
+        return self.client.get('/api/mood_quiz/generate',
+                               headers={'Authorization': f'Bearer {token}'})
+    
+    def test_repeat_requests_hit_cache(self):
+        """Test that a token is verified once and then served from the cache."""
+        token = self.token()
+        for _ in range(3):
+            self.assertEqual(self.get(token).status_code, 200)
+        stats = self.jwt.token_cache.stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['size']), (1, 2, 1))
+    
+    def test_cache_entry_ends_with_token(self):
+        """Test that a token is only cached until its exp claim."""
+        token = self.token(expires_delta=timedelta(seconds=30))
+        self.get(token)
+        self.now[0] = 31.0
+        self.get(token)
+        self.assertEqual(self.jwt.token_cache.stats()['misses'], 2)
+    
+    def test_invalid_tokens_not_cached(self):
+        """Test that expired and tampered tokens are rejected and never cached."""
+        expired = self.token(expires_delta=timedelta(seconds=-1))
+        self.assertEqual(self.get(expired).status_code, 401)
+        
+        token = self.token()
+        tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+        self.assertEqual(self.get(tampered).status_code, 422)
+        self.assertEqual(len(self.jwt.token_cache), 0)
+    
+    def test_revoked_token_refused_while_cached(self):
+        """Test that revocation applies immediately, even to cached tokens."""
+        token = self.token()
+        self.assertEqual(self.get(token).status_code, 200)
+        with self.app.app_context():
+            revoke_token(decode_token(token))
+        response = self.get(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.get_json()['msg'], 'Token has been revoked')
+        self.assertEqual(self.get(self.token()).status_code, 200)
+    
+    def test_cache_can_be_disabled(self):
+        """Test that JWT_CACHE_SIZE = 0 verifies every request."""
+        uncached = self.make_app(JWT_CACHE_SIZE=0)
+        self.assertIsNone(uncached.extensions['flask-jwt-extended'].token_cache)
+        with uncached.app_context():
+            token = create_access_token(identity='1')
+        response = uncached.test_client().get('/api/mood_quiz/generate',
+                                              headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_bloom_filter(self):
+        """Test that the filter has no false negatives and few false positives."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        keys = [os.urandom(16) for _ in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(os.urandom(16) in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+    
+    def test_revocations_reach_other_workers(self):
+        """Test that each worker's store syncs revocations made by another."""
+        conn = sqlite3.connect(self.db_path)
+        now = [0.0]
+        worker = RevocationStore(sync_interval=1.0, clock=lambda: now[0])
+        other = RevocationStore()
+        jti = '6f1c1f0e-3d4b-4a51-9c55-0d3f1d2b7a10'
+        
+        self.assertFalse(worker.is_revoked(jti, lambda: conn))
+        self.assertTrue(other.revoke(conn, jti, 1, expires_at=None))
+        self.assertFalse(other.revoke(conn, jti, 1, expires_at=None))
+        conn.commit()
+        self.assertTrue(other.is_revoked(jti, lambda: conn))
+        
+        # Not seen until the next sync; unrevoked tokens never need a lookup
+        self.assertFalse(worker.is_revoked(jti, lambda: conn))
+        now[0] = 1.0
+        self.assertTrue(worker.is_revoked(jti, lambda: conn))
+        self.assertFalse(worker.is_revoked('not-revoked', mock.Mock(side_effect=AssertionError)))
+        conn.close()
+    
+    def test_store_purges_and_grows(self):
+        """Test that expired rows are purged and the filter grows past capacity."""
+        conn = sqlite3.connect(self.db_path)
+        store = RevocationStore(capacity=4, purge_interval=5, sync_interval=0,
+                                wall_clock=lambda: 1000.0)
+        for i in range(5):
+            store.revoke(conn, f'token-{i}', 1, expires_at=999 if i < 2 else 2000)
+        conn.commit()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM revoked_tokens').fetchone()[0], 3)
+        
+        for i in range(5, 10):
+            store.revoke(conn, f'token-{i}', 1, expires_at=2000)
+        conn.commit()
+        store.sync(conn)
+        self.assertEqual(store.capacity, 16)
+        self.assertTrue(all(store.is_revoked(f'token-{i}', lambda: conn) for i in range(2, 10)))
+        self.assertFalse(store.is_revoked('token-0', lambda: conn))
+        conn.close()
+
+class ShardingTestCase(AppTestCase):
+    """Test case for per-user shard files and rebalancing between layouts."""
+    
+    END = int(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+    config = {'DB_SHARDS': 3, 'RATE_LIMITS': {}}
+    
+    def setUp(self):
+        """Create an app with three shards in a temporary directory."""
+        super().setUp()
+        self.database = self.db_path
+    
+    def redeploy(self, shards):
+        """An initialized app on the same databases with a given DB_SHARDS."""
+        flask_app = self.make_app(DB_SHARDS=shards)
+        ensure_db(flask_app)
+        return flask_app
+    
+    def post_checkin(self, flask_app, user_id, stress_level):
+        response = flask_app.test_client().post(
+            '/api/checkin', json={'mood': 'Happy', 'stress_level': stress_level},
+            headers={'Authorization': f'Bearer {self.token(user_id, flask_app)}'})
+        self.assertEqual(response.status_code, 200)
+    
+    def agg_total(self, database, user_id):
+        conn = sqlite3.connect(database)
+        total = conn.execute('SELECT COALESCE(SUM(checkin_count), 0) FROM checkin_daily_agg '
+                             'WHERE user_id = ?', (user_id,)).fetchone()[0]
+        conn.close()
+        return total
+    
+    def count(self, database, user_id=None, table='checkins'):
+        conn = sqlite3.connect(database)
+        if user_id is None:
+            count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        else:
+            count = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE user_id = ?',
+                                 (user_id,)).fetchone()[0]
+        conn.close()
+        return count
+    
+    def history(self):
+        """Every user's rows, from wherever they live, without ids."""
+        rows = []
+        for database in [self.database] + [shard_path(self.database, i) for i in range(3)]:
+            conn = sqlite3.connect(database)
+            rows += conn.execute('SELECT user_id, mood, stress_level, notes, timestamp '
+                                 'FROM checkins').fetchall()
+            rows += conn.execute('SELECT user_id, day, mood, checkin_count, stress_sum '
+                                 'FROM checkin_daily_agg').fetchall()
+            rows += conn.execute('SELECT user_id, created_at, depression, anxiety, stress, answers '
+                                 'FROM dass_assessments').fetchall()
+            conn.close()
+        return sorted(rows)
+    
+    def test_shard_for_spreads_and_moves_few_users(self):
+        """Test that users spread evenly and adding a shard only moves users onto it."""
+        placements = [shard_for(user_id, 4) for user_id in range(1, 4001)]
+        for shard in range(4):
+            self.assertTrue(800 < placements.count(shard) < 1200)
+        
+        moved = [(old, shard_for(user_id, 5))
+                 for user_id, old in enumerate(placements, start=1)
+                 if shard_for(user_id, 5) != old]
+        self.assertTrue(0.15 < len(moved) / 4000 < 0.25)
+        self.assertTrue(all(new == 4 for _, new in moved))
+    
+    def test_rows_routed_to_user_shard(self):
+        """Test that each user's writes land in their shard and reads find them there."""
+        for user_id in range(1, 7):
+            headers = {'Authorization': f'Bearer {self.token(user_id)}'}
+            for stress in (3, 7):
+                response = self.client.post('/api/checkin', headers=headers,
+                                            json={'mood': 'Happy', 'stress_level': stress})
+                self.assertEqual(response.status_code, 200)
+            response = self.client.post('/api/dass21/submit', headers=headers,
+                                        json={'answers': {str(i): 1 for i in range(1, 22)}})
+            self.assertEqual(response.status_code, 200)
+            
+            shard = shard_path(self.database, shard_for(user_id, 3))
+            self.assertEqual(self.count(shard, user_id), 2)
+            self.assertEqual(self.count(shard, user_id, 'dass_assessments'), 1)
+            response = self.client.get('/api/checkin', headers=headers)
+            self.assertEqual(len(response.get_json()['checkins']), 2)
+            response = self.client.get('/api/checkin/stats?days=7', headers=headers)
+            self.assertEqual(response.get_json()['total_checkins'], 2)
+            response = self.client.get('/api/dass21/history', headers=headers)
+            self.assertEqual(len(response.get_json()['results']), 1)
+        
+        self.assertEqual(self.count(self.database), 0)
+        self.assertEqual(sum(self.count(shard_path(self.database, i)) for i in range(3)), 12)
+    
+    def test_rebalance_between_layouts(self):
+        """Test moving rows from one database to shards, between shard counts, and back."""
+        conn = sqlite3.connect(self.database)
+        datagen.generate(conn, 20, 10, 2, datagen.hash_fixture_password(rounds=4), self.END)
+        conn.close()
+        expected = self.history()
+        
+        result = self.app.test_cli_runner().invoke(args=['rebalance-shards'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('for 20 users', result.output)
+        self.assertEqual(self.count(self.database), 0)
+        self.assertEqual(self.history(), expected)
+        for user_id in range(1, 21):
+            shard = shard_path(self.database, shard_for(user_id, 3))
+            self.assertEqual(self.count(shard, user_id), 10)
+        
+        with self.app.app_context():
+            self.assertEqual(move_user_rows()['users'], 0)
+        with self.redeploy(2).app_context():
+            moved = move_user_rows()
+        self.assertEqual(moved['users'], sum(shard_for(user_id, 3) != shard_for(user_id, 2)
+                                             for user_id in range(1, 21)))
+        self.assertEqual(self.count(shard_path(self.database, 2)), 0)
+        self.assertEqual(self.history(), expected)
+        
+        with self.redeploy(0).app_context():
+            move_user_rows()
+        self.assertEqual(self.count(self.database), 200)
+        self.assertEqual(self.history(), expected)
+
+    def test_rebalance_keeps_rows_already_in_target(self):
+        """Test that rows written to the new shard before rebalancing survive it."""
+        unsharded = self.redeploy(0)
+        for stress in (1, 2, 3):
+            self.post_checkin(unsharded, 1, stress)
+        # Redeployed with two shards; the API writes there before the rebalance runs
+        sharded = self.redeploy(2)
+        for stress in (4, 5):
+            self.post_checkin(sharded, 1, stress)
+        
+        with sharded.app_context():
+            self.assertEqual(move_user_rows()['rows'], 3)
+        shard = shard_path(self.database, shard_for(1, 2))
+        self.assertEqual(self.count(shard, 1), 5)
+        self.assertEqual(self.agg_total(shard, 1), 5)
+        self.assertEqual(self.count(self.database), 0)
+        self.assertEqual(self.agg_total(self.database, 1), 0)
+    
+    def test_rebalance_merges_rows_from_two_sources(self):
+        """Test that a user with rows in several databases ends up with all of them."""
+        user_id = next(u for u in range(1, 100) if shard_for(u, 3) != shard_for(u, 2))
+        self.post_checkin(self.app, user_id, 6)
+        self.post_checkin(self.redeploy(0), user_id, 7)
+        
+        sharded = self.redeploy(2)
+        with sharded.app_context():
+            move_user_rows()
+        shard = shard_path(self.database, shard_for(user_id, 2))
+        self.assertEqual(self.count(shard, user_id), 2)
+        self.assertEqual(self.agg_total(shard, user_id), 2)
+    
+    def test_interrupted_rebalance_resumes(self):
+        """Test that a move interrupted after the copy neither loses nor doubles rows."""
+        conn = sqlite3.connect(self.database)
+        datagen.generate(conn, 10, 5, 1, datagen.hash_fixture_password(rounds=4), self.END)
+        conn.close()
+        expected = self.history()
+        
+        original = db.rebuild_user_checkin_daily_agg
+        
+        def crash_before_source_delete(conn, schema, user_ids):
+            if schema == 'source':
+                raise sqlite3.OperationalError('disk I/O error')
+            original(conn, schema, user_ids)
+        
+        with self.app.app_context():
+            with mock.patch('db.rebuild_user_checkin_daily_agg',
+                            side_effect=crash_before_source_delete):
+                with self.assertRaises(sqlite3.OperationalError):
+                    move_user_rows()
+            self.assertGreater(sum(self.count(shard_path(self.database, i)) for i in range(3)), 0)
+            move_user_rows()
+        
+        self.assertEqual(self.count(self.database), 0)
+        self.assertEqual(self.history(), expected)
+        for i in range(3):
+            self.assertEqual(self.count(shard_path(self.database, i), table='rebalance_journal'), 0)
+
 class MoodInsightTestCase(unittest.TestCase):
     """Test case for mood insight generation logic."""
     
@@ -349,5 +2137,280 @@ class ChatResponseTestCase(unittest.TestCase):
         response = self.generate_chat_response('random message')
         self.assertIn('sharing', response.lower())
 
+class DassScoringTestCase(unittest.TestCase):
+    """Test case for the vectorized DASS-21 scoring engine."""
+    
+    # Item -> subscale, as published for DASS-21
+    TAGS = {
+        1: 's', 2: 'a', 3: 'd', 4: 'a', 5: 'd', 6: 's', 7: 'a',
+        8: 's', 9: 'a', 10: 'd', 11: 's', 12: 's', 13: 'd',
+        14: 's', 15: 'a', 16: 'd', 17: 'd', 18: 's', 19: 'a',
+        20: 'a', 21: 'd'
+    }
+    
+    def reference_scores(self, answers):
+        scores = {'d': 0, 'a': 0, 's': 0}
+        for item, value in answers.items():
+            scores[self.TAGS[int(item)]] += 2 * value
+        return scores
+    
+    def random_answers(self, rng):
+        return {str(item): rng.randint(0, 3) for item in range(1, 22)}
+    
+    def test_batch_matches_reference(self):
+        """Test batch scoring against a straightforward per-item loop."""
+        rng = random.Random(7)
+        submissions = [self.random_answers(rng) for _ in range(500)]
+        results = dass.score_submissions(submissions)
+        
+        for answers, result in zip(submissions, results):
+            expected = self.reference_scores(answers)
+            self.assertEqual(result['scores'], {'Depression': expected['d'],
+                                                'Anxiety': expected['a'],
+                                                'Stress': expected['s']})
+            self.assertEqual(result['severity'], classify_dass_scores(expected))
+    
+    def test_severity_thresholds(self):
+        """Test each subscale's severity boundaries."""
+        cases = [
+            ({'d': 9, 'a': 7, 's': 14}, 'Normal'),
+            ({'d': 10, 'a': 8, 's': 15}, 'Mild'),
+            ({'d': 14, 'a': 10, 's': 19}, 'Moderate'),
+            ({'d': 27, 'a': 19, 's': 33}, 'Severe'),
+            ({'d': 28, 'a': 20, 's': 34}, 'Extremely Severe'),
+            ({'d': 42, 'a': 42, 's': 42}, 'Extremely Severe')
+        ]
+        for scores, level in cases:
+            self.assertEqual(set(classify_dass_scores(scores).values()), {level}, scores)
+    
+    def test_blob_round_trip(self):
+        """Test that packed answer vectors score the same as the dicts."""
+        rng = random.Random(3)
+        submissions = [self.random_answers(rng) for _ in range(10)]
+        matrix = dass.parse_answers(submissions)
+        blobs = [dass.pack_answers(row) for row in matrix]
+        self.assertEqual(len(blobs[0]), 21)
+        self.assertTrue((dass.score(dass.answers_from_blobs(blobs)) == dass.score(matrix)).all())
+    
+    def test_invalid_answers(self):
+        """Test that incomplete or out-of-range answers are rejected."""
+        valid = {str(item): 1 for item in range(1, 22)}
+        invalid = [
+            None,
+            {str(item): 1 for item in range(1, 21)},
+            dict(valid, **{'21': 4}),
+            dict(valid, **{'21': 'often'}),
+            {str(item): 1 for item in range(0, 21)},
+            {str(item): 1.7 for item in range(1, 22)},
+            dict(valid, **{'21': 2.0}),
+            dict(valid, **{'21': True}),
+            dict(valid, **{'21': '2'})
+        ]
+        for answers in invalid:
+            with self.assertRaises(ValueError):
+                dass.parse_answers([answers])
+
+class InstrumentationTestCase(AppTestCase):
+    """Test case for per-thread metrics and request instrumentation."""
+    
+    def test_histogram_buckets_and_quantiles(self):
+        """Test cumulative buckets, sum/count and interpolated quantiles."""
+        histogram = Histogram('latency', 'test', ('route',), buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value, '/x')
+        
+        cumulative, total, count = histogram.snapshot()[('/x',)]
+        self.assertEqual(cumulative, [1, 3, 4, 5])
+        self.assertEqual((total, count), (16.5, 5))
+        self.assertAlmostEqual(histogram.quantile(0.5, cumulative), 1.75)
+        self.assertEqual(histogram.quantile(0.99, cumulative), 4)
+        self.assertIsNone(histogram.quantile(0.5, [0, 0, 0, 0]))
+        
+        registry = MetricsRegistry()
+        registry.register(histogram.collect)
+        body = registry.render()
+        self.assertIn('latency_bucket{le="2.0",route="/x"} 3', body)
+        self.assertIn('latency_bucket{le="+Inf",route="/x"} 5', body)
+        self.assertIn('latency_count{route="/x"} 5', body)
+        self.assertIn('latency_quantile{quantile="0.5",route="/x"} 1.75', body)
+    
+    def test_per_thread_buffers_merge(self):
+        """Test that counts from live and exited threads are all reported."""
+        counter = Counter('hits_total', 'test', ('route',))
+        release = threading.Event()
+        
+        def work(wait):
+            for _ in range(1000):
+                counter.inc('/x')
+            if wait:
+                release.wait()
+        
+        threads = [threading.Thread(target=work, args=(i % 2 == 0,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads[1::2]:
+            thread.join()
+        self.assertEqual(counter.values(), {('/x',): 8000})
+        
+        release.set()
+        for thread in threads:
+            thread.join()
+        counter.inc('/x')  # registering this thread folds the exited threads' buffers
+        self.assertEqual(counter.values(), {('/x',): 8001})
+        self.assertLessEqual(len(counter._buffers), 2)
+    
+    def test_request_metrics_exported(self):
+        """Test that route latency, in-flight, SQLite and bcrypt metrics are exported."""
+        self.client.get('/api/checkin')
+        self.client.get('/api/checkin?limit=1')
+        self.client.get('/no/such/path')
+        
+        body = self.client.get('/metrics').data.decode()
+        self.assertRegex(body, r'mindbridge_http_request_duration_seconds_count'
+                               r'\{method="GET",route="/api/checkin"\} \d+')
+        self.assertIn('route="unmatched"', body)
+        self.assertIn('mindbridge_http_requests_in_flight{method="GET",route="/api/checkin"} 0', body)
+        self.assertIn('mindbridge_http_requests_in_flight{method="GET",route="/metrics"} 1', body)
+        self.assertIn('mindbridge_sqlite_query_duration_seconds_count{operation="execute"}', body)
+        self.assertIn('mindbridge_sqlite_query_duration_seconds_quantile', body)
+        self.assertIn('# TYPE mindbridge_bcrypt_duration_seconds histogram', body)
+
+
+class LoggingTestCase(AppTestCase):
+    """Test case for structured, queued logging with sampling and redaction."""
+    
+    def setUp(self):
+        """Send the app's logs to a buffer at DEBUG level."""
+        super().setUp()
+        self.stream = io.StringIO()
+        self.logger = configure_logging(level='DEBUG', stream=self.stream)
+    
+    def tearDown(self):
+        """Restore the default logging configuration."""
+        configure_logging(level=DEFAULT_CONFIG['LOG_LEVEL'],
+                          debug_sample_rate=DEFAULT_CONFIG['LOG_DEBUG_SAMPLE_RATE'])
+        super().tearDown()
+    
+    def records(self):
+        get_log_handler().flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+    
+    def test_structured_and_redacted(self):
+        """Test that events are JSON lines with sensitive fields masked."""
+        log_event(self.logger, logging.INFO, 'dass21_rescored', user_id=7,
+                  answers={'1': 3}, context={'notes': 'private', 'count': 2})
+        
+        record, = self.records()
+        self.assertEqual(record['event'], 'dass21_rescored')
+        self.assertEqual(record['level'], 'INFO')
+        self.assertEqual(record['user_id'], 7)
+        self.assertEqual(record['answers'], '[REDACTED]')
+        self.assertEqual(record['context'], {'notes': '[REDACTED]', 'count': 2})
+    
+    def test_debug_sampling(self):
+        """Test that DEBUG records are sampled while higher levels always pass."""
+        self.logger = configure_logging(level='DEBUG', debug_sample_rate=0.0, stream=self.stream)
+        log_event(self.logger, logging.DEBUG, 'noisy')
+        log_event(self.logger, logging.WARNING, 'important')
+        self.assertEqual([r['event'] for r in self.records()], ['important'])
+    
+    def test_handlers_log_without_payloads(self):
+        """Test that quiz and DASS-21 submissions never log answers."""
+        self.client.post('/api/mood_quiz/submit',
+                         data=json.dumps({'question_id': 1, 'answer': 'Worried'}),
+                         content_type='application/json')
+        answers = {str(i): 3 for i in range(1, 22)}
+        self.client.post('/api/dass21/submit', data=json.dumps({'answers': answers}),
+                         content_type='application/json')
+        
+        events = [r['event'] for r in self.records()]
+        self.assertIn('quiz_answer_received', events)
+        self.assertIn('dass21_submission_received', events)
+        self.assertNotIn('Worried', self.stream.getvalue())
+    
+    def test_new_apps_keep_logging_setup(self):
+        """Test that building another app doesn't replace the process's log handler."""
+        handler = get_log_handler()
+        self.make_app(LOG_LEVEL='ERROR', LOG_DEBUG_SAMPLE_RATE=0.0)
+        self.assertIs(get_log_handler(), handler)
+        self.assertEqual(self.logger.level, logging.DEBUG)
+        log_event(self.logger, logging.DEBUG, 'still_logged')
+        self.assertEqual([r['event'] for r in self.records()], ['still_logged'])
+    
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that a stalled writer makes records drop, not callers wait."""
+        release = threading.Event()
+        
+        class StalledHandler(logging.Handler):
+            def emit(self, record):
+                release.wait()
+        
+        handler = AsyncLogHandler(StalledHandler(), max_queue=1)
+        logger = logging.getLogger('mindbridge.test_stalled')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for _ in range(10):
+                logger.warning('event')
+            self.assertGreaterEqual(handler.dropped, 8)
+        finally:
+            release.set()
+            logger.removeHandler(handler)
+            handler.close()
+
+
+class IntentMatcherTestCase(unittest.TestCase):
+    """Test case for the compiled keyword intent matcher."""
+    
+    INTENTS = [
+        ('sad', ['sad', 'down']),
+        ('happy', ['happy', 'good']),
+        ('help', ['help', 'down'])
+    ]
+    
+    def backends(self):
+        backends = ['table']
+        if ahocorasick is not None:
+            backends.append('ahocorasick')
+        return [IntentMatcher(self.INTENTS, backend=backend) for backend in backends]
+    
+    def test_priority_beats_position(self):
+        """Test that the earliest intent wins even if its keyword appears later."""
+        for matcher in self.backends():
+            self.assertEqual(matcher.match('good morning, but sad later'), 'sad', matcher.backend)
+            self.assertEqual(matcher.match('please help, all good'), 'happy', matcher.backend)
+    
+    def test_substring_and_overlapping_keywords(self):
+        """Test substring semantics, including keywords overlapping each other."""
+        for matcher in self.backends():
+            self.assertEqual(matcher.match('saddened'), 'sad', matcher.backend)
+            # 'down' starts inside 'good' and must still be found
+            self.assertEqual(matcher.match('goodown'), 'sad', matcher.backend)
+            self.assertEqual(matcher.match('helpdown'), 'sad', matcher.backend)
+    
+    def test_no_match(self):
+        """Test that text without keywords matches nothing."""
+        for matcher in self.backends():
+            self.assertIsNone(matcher.match(''), matcher.backend)
+            self.assertIsNone(matcher.match('x' * 20000), matcher.backend)
+    
+    def test_grounding_prompts(self):
+        """Test that copilot prompts map to the right exercises."""
+        from app import GROUNDING_MATCHER
+        self.assertEqual(GROUNDING_MATCHER.match('a calm breathing exercise'), 'breathing')
+        self.assertEqual(GROUNDING_MATCHER.match('grounding and meditation'), 'grounding')
+        self.assertIsNone(GROUNDING_MATCHER.match('general wellness'))
+    
+    def test_unknown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with self.assertRaises(ValueError):
+            IntentMatcher(self.INTENTS, backend='regex')
+    
+    def test_app_matchers_scan_once(self):
+        """Test that the app's matchers use the automaton from requirements.txt."""
+        from app import CHAT_MATCHER, GROUNDING_MATCHER, MOOD_INSIGHT_MATCHER
+        for matcher in (CHAT_MATCHER, GROUNDING_MATCHER, MOOD_INSIGHT_MATCHER):
+            self.assertEqual(matcher.backend, 'ahocorasick')
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+MindBridge Tokens - JWT verification with a verified-token cache, and token revocation
+Repeat requests with the same access token skip signature checks and claim parsing; revoked tokens are
+stored in SQLite until they would have expired anyway, behind a Bloom filter so checking a token that
+was never revoked doesn't touch the database.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from flask_jwt_extended import JWTManager
+
+from cache import LRUCache
+
+
+def token_digest(encoded_token):
+    """A short fixed-size cache key for a token, so raw tokens aren't kept in memory."""
+    if isinstance(encoded_token, str):
+        encoded_token = encoded_token.encode('ascii')
+    return hashlib.blake2b(encoded_token, digest_size=16).digest()
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that remembers tokens it has already verified.
+
+    The first request with a token is decoded and verified as usual (base64,
+    HMAC signature, exp/nbf/type claims). Its claims are then cached under
+    the token's digest until the token expires, capped at cache_ttl, and
+    later requests with the same token get a copy of those claims back
+    without redoing that work. A token that is already cached was already
+    verified with the same secret, so skipping the work is only unsafe if
+    the secret changes. cache_ttl bounds how long old tokens are accepted
+    after that happens.
+
+    Revocation, token type and freshness are still checked on every request
+    by flask_jwt_extended, after this step, so a revoked token is refused
+    right away even while it is cached.
+    """
+
+    def __init__(self, app=None, cache_size=10000, cache_ttl=300.0, **kwargs):
+        """
+        Args:
+            app (Flask): App to initialize, or None to call init_app() later
+            cache_size (int): Tokens kept; 0 disables the cache
+            cache_ttl (float): Longest a verified token is trusted without re-checking
+        """
+        self.token_cache = LRUCache(max_size=cache_size, ttl=cache_ttl) if cache_size else None
+        super().__init__(app, **kwargs)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # CSRF double-submit checks and expired-token decoding vary per call; don't cache them
+        if self.token_cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = token_digest(encoded_token)
+        claims = self.token_cache.get(key)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            lifetime = claims['exp'] - time.time() if 'exp' in claims else None
+            if lifetime is None or lifetime > 0:
+                self.token_cache.set(key, claims, ttl=lifetime)
+        # Callers get their own copy, so nothing can alter the cached claims
+        return dict(claims)
+
+    def collect(self):
+        """Return cache metrics for MetricsRegistry."""
+        if self.token_cache is None:
+            return []
+        stats = self.token_cache.stats()
+        return [
+            ('mindbridge_jwt_cache_hits_total', 'counter',
+             'Requests whose token was already verified', stats['hits']),
+            ('mindbridge_jwt_cache_misses_total', 'counter',
+             'Requests whose token was decoded and verified', stats['misses']),
+            ('mindbridge_jwt_cache_entries', 'gauge', 'Verified tokens cached', stats['size'])
+        ]
+
+
+class BloomFilter:
+    """
+    Fixed-size set of byte strings that can answer "definitely not present".
+
+    Membership tests never give false negatives; false positives happen at
+    about error_rate once `capacity` keys have been added, more often past
+    that. Keys must be 16 bytes that are already uniformly distributed, like
+    the output of pack_jti(): the two halves are used directly as the two
+    hashes that every bit position is derived from (Kirsch-Mitzenmacher
+    double hashing), so nothing is hashed again.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        Args:
+            capacity (int): Keys expected before the false positive rate rises past error_rate
+            error_rate (float): Target false positive rate, between 0 and 1
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key):
+        """Add a key (16 bytes)."""
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:], 'little') | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        # Most keys looked up are absent, and usually the first bit or two says so
+        bits, size = self._bits, self.size
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:], 'little') | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+def pack_jti(jti):
+    """
+    Compact 16-byte form of a jti claim, for storage and the Bloom filter.
+
+    UUID jtis, which flask_jwt_extended issues (random, version 4), become
+    their raw bytes rather than 36-character strings; anything else is
+    digested.
+    """
+    if isinstance(jti, str) and len(jti) == 36:
+        try:
+            # Same bytes as uuid.UUID(jti).bytes, without the validation cost
+            return bytes.fromhex(jti.replace('-', ''))
+        except ValueError:
+            pass
+    return token_digest(str(jti))
+
+
+class RevocationStore:
+    """
+    Revoked token IDs, kept in the revoked_tokens table with a Bloom filter in front.
+
+    Almost every token a request brings has not been revoked, and for those
+    the in-memory filter answers without touching the database. Only a
+    filter hit (a revoked token, or a false positive about error_rate of the
+    time) is confirmed with an indexed lookup on revoked_tokens.jti.
+
+    Every worker keeps its own filter. Revocations made in this process are
+    added to it straight away; ones made by other workers are picked up by
+    sync(), which reads the rows added since the last sync and runs at most
+    once per sync_interval, so they take effect everywhere within that
+    interval. Rows are deleted once their token would have expired anyway,
+    and the filter is rebuilt from the remaining rows (with twice the
+    capacity if they still don't fit) once it holds more than `capacity`.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, sync_interval=1.0,
+                 purge_interval=1000, clock=time.monotonic, wall_clock=time.time):
+        """
+        Args:
+            capacity (int): Revoked tokens the filter is sized for before it is rebuilt
+            error_rate (float): Target share of unrevoked tokens that still need a lookup
+            sync_interval (float): Seconds between reads of other workers' revocations
+            purge_interval (int): Revocations between deletes of expired rows
+            clock (callable): Monotonic time source for sync_interval
+            wall_clock (callable): Wall-clock time source, compared with exp claims
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.filter = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._last_id = 0  # Highest revoked_tokens.id already in the filter
+        self._entries = 0  # Rows added to the filter by sync(), which the capacity applies to
+        self._synced_at = None
+        self._revoked = 0
+        self.checks = 0
+        self.lookups = 0
+        self.false_positives = 0
+
+    def is_revoked(self, jti, connect):
+        """
+        Check a token, syncing first if sync_interval has passed.
+
+        Args:
+            jti (str): The token's jti claim
+            connect (callable): Returns a database connection; only called if one is needed
+
+        Returns:
+            bool: Whether the token has been revoked
+        """
+        self.checks += 1
+        if self._synced_at is None or self._clock() - self._synced_at >= self.sync_interval:
+            self.sync(connect())
+
+        key = pack_jti(jti)
+        if key not in self.filter:
+            return False
+        self.lookups += 1
+        revoked = connect().execute(
+            'SELECT 1 FROM revoked_tokens WHERE jti = ?', (key,)
+        ).fetchone() is not None
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def revoke(self, conn, jti, user_id, expires_at=None):
+        """
+        Revoke a token. Runs inside the caller's transaction; the caller commits.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            jti (str): The token's jti claim
+            user_id (int): The token's owner
+            expires_at (float): The token's exp claim; None keeps the row forever
+
+        Returns:
+            bool: True if this call revoked the token, False if it already was
+        """
+        key = pack_jti(jti)
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO revoked_tokens (jti, user_id, expires_at) VALUES (?, ?, ?)',
+            (key, user_id, None if expires_at is None else int(expires_at))
+        )
+        # Adding before the commit is harmless: a filter hit only costs a lookup
+        self.filter.add(key)
+
+        self._revoked += 1
+        if self._revoked % self.purge_interval == 0:
+            conn.execute('DELETE FROM revoked_tokens WHERE expires_at <= ?',
+                         (int(self._wall_clock()),))
+        return cursor.rowcount == 1
+
+    def sync(self, conn):
+        """Add revocations made since the last sync, by any process, to the filter."""
+        with self._lock:
+            rows = conn.execute(
+                'SELECT id, jti FROM revoked_tokens WHERE id > ? ORDER BY id', (self._last_id,)
+            ).fetchall()
+            for row in rows:
+                self.filter.add(row[1])
+            if rows:
+                self._last_id = rows[-1][0]
+                self._entries += len(rows)
+            self._synced_at = self._clock()
+            if self._entries > self.capacity:
+                self._rebuild(conn)
+
+    def _rebuild(self, conn):
+        # Caller holds self._lock
+        rows = conn.execute(
+            'SELECT id, jti FROM revoked_tokens WHERE expires_at IS NULL OR expires_at > ?',
+            (int(self._wall_clock()),)
+        ).fetchall()
+        while len(rows) > self.capacity // 2:
+            self.capacity *= 2
+        rebuilt = BloomFilter(self.capacity, self.error_rate)
+        for row in rows:
+            rebuilt.add(row[1])
+        # A revocation whose transaction was still open isn't in `rows`; its id
+        # is above _last_id, so the next sync() adds it back
+        self.filter = rebuilt
+        self._entries = len(rows)
+        self._last_id = max([self._last_id] + [row[0] for row in rows])
+
+    def collect(self):
+        """Return filter and lookup metrics for MetricsRegistry."""
+        return [
+            ('mindbridge_revocation_checks_total', 'counter',
+             'Tokens checked against the revocation store', self.checks),
+            ('mindbridge_revocation_lookups_total', 'counter',
+             'Checks that passed the Bloom filter and queried revoked_tokens', self.lookups),
+            ('mindbridge_revocation_false_positives_total', 'counter',
+             'Lookups that found the token was not revoked', self.false_positives),
+            ('mindbridge_revocation_filter_entries', 'gauge',
+             'Revoked tokens in the Bloom filter', self._entries)
+        ]
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react'; // Import useCallback
+import React, { useState, useEffect, useCallback, useRef } from 'react'; // Import useCallback
 import {
   Home,
   Heart,
@@ -117,12 +117,29 @@ function App() {
     setSuccess('');
   }, []);
 
+  // In-flight token refresh, shared so concurrent 401s only refresh once
+  const refreshRequest = useRef(null);
+
   // logout: Does not depend on any changing state/props, only state setters
   const logout = useCallback(() => {
+    // Revoke both tokens server-side; the local session ends either way
+    const accessToken = localStorage.getItem('mindbridge_token');
+    const refreshToken = localStorage.getItem('mindbridge_refresh_token');
+    if (accessToken) {
+      fetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${accessToken}`
+        },
+        body: JSON.stringify(refreshToken ? { refresh_token: refreshToken } : {})
+      }).catch(() => {});
+    }
     setToken(null);
     setUser(null);
     setIsAuthenticated(false);
     localStorage.removeItem('mindbridge_token');
+    localStorage.removeItem('mindbridge_refresh_token');
     setCurrentPage('home');
     setSuccess('Logged out successfully!');
     setTimeout(() => setSuccess(''), 3000);
@@ -146,6 +163,41 @@ function App() {
     }
   }, []);
 
+  // storeTokens: Saves a new token pair from login, register or refresh
+  const storeTokens = useCallback((response) => {
+    setToken(response.access_token);
+    localStorage.setItem('mindbridge_token', response.access_token);
+    localStorage.setItem('mindbridge_refresh_token', response.refresh_token);
+  }, []);
+
+  // refreshTokens: Trades the stored refresh token for a new pair; resolves to
+  // the new access token, or null if the session can't be renewed
+  const refreshTokens = useCallback(() => {
+    const refreshToken = localStorage.getItem('mindbridge_refresh_token');
+    if (!refreshToken) {
+      return Promise.resolve(null);
+    }
+    if (!refreshRequest.current) {
+      refreshRequest.current = fetch(`${API_BASE_URL}/auth/refresh`, {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${refreshToken}` }
+      })
+        .then(async (response) => {
+          if (!response.ok) {
+            return null;
+          }
+          const data = await response.json();
+          storeTokens(data);
+          return data.access_token;
+        })
+        .catch(() => null)
+        .finally(() => {
+          refreshRequest.current = null;
+        });
+    }
+    return refreshRequest.current;
+  }, [storeTokens]);
+
   // apiCall: Depends on 'token' and calls 'logout'
   const apiCall = useCallback(async (endpoint, options = {}) => {
     try {
@@ -158,12 +210,23 @@ function App() {
         headers.Authorization = `Bearer ${token}`;
       }
 
-      const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+      const send = () => fetch(`${API_BASE_URL}${endpoint}`, {
         method: options.method || 'GET',
         headers: headers,
         body: options.body || null
       });
 
+      let response = await send();
+
+      // Access tokens are short-lived: renew once and retry before giving up
+      if (response.status === 401 && headers.Authorization && !endpoint.startsWith('/auth/refresh')) {
+        const accessToken = await refreshTokens();
+        if (accessToken) {
+          headers.Authorization = `Bearer ${accessToken}`;
+          response = await send();
+        }
+      }
+
       if (!response.ok) {
         if (response.status === 401) {
           logout(); // Now 'logout' is a stable dependency
@@ -177,7 +240,7 @@ function App() {
       console.error('API call failed:', error);
       throw error;
     }
-  }, [token, logout]); // Correct: Included 'logout' as a dependency
+  }, [token, logout, refreshTokens]); // Correct: Included 'logout' as a dependency
 
   // loadRecentCheckins: Depends on 'apiCall' and 'updateMoodFromCheckin'
   const loadRecentCheckins = useCallback(async () => {
@@ -208,10 +271,12 @@ function App() {
           setIsAuthenticated(true);
         } else {
           localStorage.removeItem('mindbridge_token');
+          localStorage.removeItem('mindbridge_refresh_token');
           setToken(null);
         }
       } catch (error) {
         localStorage.removeItem('mindbridge_token');
+        localStorage.removeItem('mindbridge_refresh_token');
         setToken(null);
       }
     }
@@ -295,10 +360,9 @@ Don't worry - you're not alone, and we're here to help you through it ☺️.
       });
 
       if (response.success) {
-        setToken(response.access_token);
+        storeTokens(response);
         setUser(response.user);
         setIsAuthenticated(true);
-        localStorage.setItem('mindbridge_token', response.access_token);
         setAuthData({ username: '', email: '', password: '', confirmPassword: '' });
         setSuccess('Login successful!');
         setTimeout(() => setSuccess(''), 3000);
@@ -343,10 +407,9 @@ Don't worry - you're not alone, and we're here to help you through it ☺️.
       });
 
       if (response.success) {
-        setToken(response.access_token);
+        storeTokens(response);
         setUser(response.user);
         setIsAuthenticated(true);
-        localStorage.setItem('mindbridge_token', response.access_token);
         setAuthData({ username: '', email: '', password: '', confirmPassword: '' });
         setSuccess('Registration successful! Welcome to MindBridge!');
         setTimeout(() => setSuccess(''), 3000);